@@ -0,0 +1,60 @@
+"""Compares the latency of adding a rule by rewriting the whole file with appending to it.
+
+Usage: python benchmarks/bench_add_rule.py [--repeat N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import udev_manager  # noqa: E402
+
+SIZES = (10, 100, 1000, 10000, 100000)
+
+
+def create_rule_file(filepath, size):
+    with open(filepath, 'w') as file:
+        for index in range(size):
+            file.write(udev_manager.create_udev_rule(f'Printer{index}', serial=f'serial{index}') + '\n')
+        # both methods fsync, the first sample must not pay for writing back the setup file
+        file.flush()
+        os.fsync(file.fileno())
+
+
+def add_by_rewrite(filepath, rule):
+    with open(filepath) as file:
+        file_content = file.read()
+    udev_manager.write_rule_file(filepath, udev_manager.add_rule(file_content, rule))
+
+
+def add_by_append(filepath, rule):
+    udev_manager.append_rule_to_file(filepath, rule)
+
+
+def measure(function, size, repeat):
+    with tempfile.TemporaryDirectory() as directory:
+        filepath = os.path.join(directory, '99-serial.rules')
+        create_rule_file(filepath, size)
+        start = time.perf_counter()
+        for index in range(repeat):
+            function(filepath, udev_manager.create_udev_rule(f'New{index}', serial=f'new{index}'))
+        return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'rules':>8} {'rewrite (ms)':>14} {'append (ms)':>12}")
+    for size in SIZES:
+        rewrite = measure(add_by_rewrite, size, args.repeat)
+        append = measure(add_by_append, size, args.repeat)
+        print(f"{size:>8} {rewrite * 1000:>14.3f} {append * 1000:>12.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Measures the time from a printer reconnect until octoprint answers HTTP requests, with and without warm standby.
+
+The container of the compose file is disconnected and reconnected the way the udev rules do it:
+stop/up -d without standby, pause/unpause with standby. Requires docker and an existing compose file
+created by 'octodocker add ... -d PORT'.
+
+Usage: python benchmarks/bench_reconnect.py COMPOSE_FILE PORT [--repeat N]
+"""
+import argparse
+import os
+import shlex
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import docker_manager  # noqa: E402
+
+
+def run(command):
+    subprocess.run(shlex.split(command), check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_for_http(port, timeout=300):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://localhost:{port}/', timeout=1) as response:
+                if response.status < 500:
+                    return
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.1)
+    raise TimeoutError(f'octoprint on port {port} did not answer within {timeout} s')
+
+
+def measure(compose_file, port, standby):
+    if standby:
+        disconnect, reconnect = docker_manager.create_pause_command(compose_file), docker_manager.create_unpause_command(compose_file)
+    else:
+        disconnect, reconnect = docker_manager.create_stop_command(compose_file), docker_manager.create_start_command(compose_file)
+
+    run(disconnect)
+    start = time.monotonic()
+    run(reconnect)
+    wait_for_http(port)
+    return time.monotonic() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('compose_file')
+    parser.add_argument('port', type=int)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    run(docker_manager.create_start_command(args.compose_file))
+    wait_for_http(args.port)
+
+    for standby in (False, True):
+        results = [measure(args.compose_file, args.port, standby) for _ in range(args.repeat)]
+        mode = 'standby (pause/unpause)' if standby else 'cold (stop/up)'
+        print(f"{mode:<24} min {min(results):7.2f} s  avg {sum(results) / len(results):7.2f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""Times the rule file engine on synthetic rule files from 10 to 100k rules.
+
+The files mix ATTRS and ENV rules as created by create_udev_rule with start/stop pairs created by
+create_startstop_udev_rule. Every operation looks up the rule in the middle of the file.
+
+Usage: python benchmarks/bench_rule_engine.py [--sizes 10 100 ...] [--repeat N] [--output results.json]
+                                              [--compare baseline.json [--threshold 0.25]]
+
+With --compare, the results are compared with a stored baseline by their median and the script exits with 1 if an
+operation got slower than the threshold plus the noise band of the two runs allows. A fixed calibration workload not
+using the repo code is timed alongside every operation and the medians are compared relative to it, so a machine
+running faster or slower as a whole (frequency scaling, other load) does not show up as a change.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import udev_manager  # noqa: E402
+import controller  # noqa: E402
+
+SIZES = (10, 100, 1000, 10000, 100000)
+# differences below this are treated as noise when comparing with a baseline
+NOISE_FLOOR = 50e-6
+# the allowed slowdown is widened by this many relative median absolute deviations of the noisier run
+NOISE_BAND = 3
+CALIBRATION_LINES = [f'SUBSYSTEM=="tty", ATTRS{{serial}}=="serial{index}", SYMLINK+="Printer{index}"' for index in range(200)]
+CALIBRATION_PATTERN = re.compile(r'([A-Z]+(?:\{[a-z]+\})?)(==|\+=)"([^"]*)"')
+
+
+def create_rule(index):
+    """Creates the rule with the given index, cycling through the rule forms of the repo"""
+    name = f'Printer{index}'
+    kind = index % 4
+    if kind == 0:
+        return udev_manager.create_udev_rule(name, serial=f'serial{index}', vendor_id='0483', product_id='5740')
+    if kind == 1:
+        return udev_manager.create_udev_rule(name, path=f'pci-0000:00:14.0-usb-0:{index}:1.0', vendor_id='1a86')
+    if kind == 2:
+        return udev_manager.create_udev_rule(name, devpath=f'1.{index}')
+    compose = f'/opt/octodocker/docker-compose.{name}.yml'
+    return udev_manager.create_startstop_udev_rule(name, f'/usr/bin/docker compose -f {compose} up -d',
+                                                   f'/usr/bin/docker compose -f {compose} stop', serial=f'serial{index}')
+
+
+def create_rule_content(size):
+    return '\n'.join(create_rule(index) for index in range(size)) + '\n'
+
+
+def get_targets(size):
+    """Gets the name, serial and path of rules in the middle of the file"""
+    middle = size // 2
+    serial_index = middle - middle % 4
+    path_index = serial_index + 1 if serial_index + 1 < size else serial_index
+    return {
+        'name': f'Printer{middle}',
+        'serial': f'serial{serial_index}',
+        'path': f'pci-0000:00:14.0-usb-0:{path_index}:1.0',
+    }
+
+
+def create_operations(targets):
+    new_rule = udev_manager.create_udev_rule('NewPrinter', serial='new-serial')
+    return {
+        'parse_rules': lambda content: udev_manager.parse_rules(content),
+        'get_device_rules': lambda content: udev_manager.get_device_rules(content),
+        'get_names': lambda content: udev_manager.get_names(content),
+        'get_paths': lambda content: udev_manager.get_paths(content),
+        'get_serial_numbers': lambda content: udev_manager.get_serial_numbers(content),
+        'check_for_duplicates': lambda content: controller.check_for_duplicates(
+            udev_manager.parse_rules(content), 'NewPrinter', 'new-path', 'new-serial'),
+        'add_rule': lambda content: udev_manager.add_rule(content, new_rule),
+        'remove_rule_by_serial': lambda content: udev_manager.remove_rule_by_serial(content, targets['serial']),
+        'remove_rule_by_path': lambda content: udev_manager.remove_rule_by_path(content, targets['path']),
+        'remove_rule_by_name': lambda content: udev_manager.remove_rule_by_name(content, targets['name']),
+    }
+
+
+def calibrate():
+    """Fixed workload of regular expression matching and dictionary building, which does not change with the repo"""
+    index = {}
+    for line in CALIBRATION_LINES:
+        for key, operator, value in CALIBRATION_PATTERN.findall(line):
+            index.setdefault(key, []).append(value)
+    return index
+
+
+def get_spread(durations, median):
+    """Gets the median absolute deviation of the durations relative to their median"""
+    return statistics.median(abs(duration - median) for duration in durations) / median if median else 0.0
+
+
+def measure(function, content, repeat):
+    """Times repeated runs of an operation, each run is preceded by a run of the calibration workload
+
+    Returns:
+        fastest run, median run, relative median absolute deviation of the runs and median calibration run
+    """
+    durations = []
+    calibrations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        calibrate()
+        calibrations.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        function(content)
+        durations.append(time.perf_counter() - start)
+    median = statistics.median(durations)
+    return min(durations), median, get_spread(durations, median), statistics.median(calibrations)
+
+
+def run(sizes, repeat, operations=None):
+    """Runs the benchmark
+
+    Returns:
+        List of {operation, rules, min, median, spread, calibration} dictionaries, durations in seconds, spread
+        relative to the median
+    """
+    results = []
+    for size in sizes:
+        content = create_rule_content(size)
+        for operation, function in create_operations(get_targets(size)).items():
+            if operations and operation not in operations:
+                continue
+            fastest, median, spread, calibration = measure(function, content, repeat)
+            results.append({'operation': operation, 'rules': size, 'min': fastest, 'median': median, 'spread': spread,
+                            'calibration': calibration})
+            print(f"{operation:>22} {size:>8} {fastest * 1000:>12.3f} {median * 1000:>12.3f}", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Compares results with a baseline by their median run relative to the calibration workload.
+    An operation regressed if its median grew by more than the threshold plus NOISE_BAND times the relative median
+    absolute deviation of the noisier of both runs, so a run compared with itself or an equally noisy run passes.
+
+    Returns:
+        List of (operation, rules, baseline, current, ratio) tuples of the regressions
+    """
+    reference = {(entry['operation'], entry['rules']): entry for entry in baseline['results']}
+    regressions = []
+
+    print(f"\n{'operation':>22} {'rules':>8} {'baseline ms':>12} {'current ms':>12} {'ratio':>7} {'allowed':>8}")
+    for entry in results:
+        key = (entry['operation'], entry['rules'])
+        if key not in reference:
+            continue
+        before, after = reference[key]['median'], entry['median']
+        # baselines written before the calibration and spread were recorded are compared directly
+        speed = entry['calibration'] / reference[key]['calibration'] if 'calibration' in reference[key] else 1.0
+        ratio = after / (before * speed) if before else float('inf')
+        allowed = 1 + threshold + NOISE_BAND * max(reference[key].get('spread', 0.0), entry['spread'])
+        regressed = ratio > allowed and after - before > NOISE_FLOOR
+        flag = '  REGRESSION' if regressed else ''
+        print(f"{key[0]:>22} {key[1]:>8} {before * 1000:>12.3f} {after * 1000:>12.3f} {ratio:>7.2f} {allowed:>8.2f}{flag}")
+        if regressed:
+            regressions.append((key[0], key[1], before, after, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', type=str, nargs='+', default=None, help='operations to run')
+    parser.add_argument('--output', type=str, default=None, help='write the results to this JSON file')
+    parser.add_argument('--compare', type=str, default=None, help='baseline JSON file written with --output')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown of the median before a regression is flagged, widened by the noise of the runs')
+    args = parser.parse_args()
+
+    print(f"{'operation':>22} {'rules':>8} {'min (ms)':>12} {'median (ms)':>12}")
+    results = run(args.sizes, args.repeat, args.only)
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'repeat': args.repeat,
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        print(f"\n{len(regressions)} regressions (threshold {args.threshold:.0%})")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Measures the cold start of the command line interface per subcommand.
+
+For every subcommand the wall time of the whole process is measured and `python -X importtime` is used to sum up
+the import time and list the slowest top level imports.
+
+Usage: python benchmarks/bench_startup.py [--repeat N] [--budget MS]
+
+With --budget, the script exits with 1 if the median wall time of a subcommand exceeds the budget.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CLI = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'octodocker.py')
+
+
+def get_commands(directory):
+    rule_file = os.path.join(directory, '99-serial.rules')
+    with open(rule_file, 'w') as file:
+        file.write('SUBSYSTEM=="tty", ATTRS{serial}=="serial1", SYMLINK+="Printer1"\n')
+    return {
+        'help': ['--help'],
+        'rules': ['rules', '-f', rule_file],
+        'remove': ['remove', '-f', rule_file, 'name', 'Unknown'],
+        'conflicts': ['conflicts', '--dir', directory],
+        'add --help': ['add', '--help'],
+        'devices': ['devices'],
+    }
+
+
+def measure_wall_time(arguments, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, CLI, *arguments], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def measure_imports(arguments):
+    """Runs the command with -X importtime
+
+    Returns:
+        (float, list) total import time in seconds and (seconds, module) tuples of the top level imports
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', CLI, *arguments], stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True)
+    top_level = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        # nested imports are indented by two additional spaces
+        if module.startswith('  '):
+            continue
+        top_level.append((int(cumulative) / 1e6, module.strip()))
+    return sum(duration for duration, _ in top_level), sorted(top_level, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=None, help='allowed median wall time per command in ms')
+    args = parser.parse_args()
+
+    over_budget = []
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'command':>12} {'wall (ms)':>10} {'imports (ms)':>13}  slowest imports")
+        for name, arguments in get_commands(directory).items():
+            wall_time = measure_wall_time(arguments, args.repeat)
+            import_time, modules = measure_imports(arguments)
+            slowest = ', '.join(f"{module} {duration * 1000:.0f}" for duration, module in modules[:3])
+            print(f"{name:>12} {wall_time * 1000:>10.1f} {import_time * 1000:>13.1f}  {slowest}")
+            if args.budget is not None and wall_time * 1000 > args.budget:
+                over_budget.append(name)
+
+    if over_budget:
+        print(f"over the budget of {args.budget:.0f} ms: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Compares the device enumeration of the pyudev backend with the direct sysfs backend of udev_manager.
+
+cold: a fresh interpreter imports udev_manager, creates the inventory and lists the devices once, which is what
+      every cli call without command server pays (the time includes the interpreter start).
+warm: the devices are listed again in the same process, median of --repeat runs.
+
+Runs against the devices of this host, pyudev has to be installed. On a host without usb serial devices, both
+backends still walk all tty devices (virtual consoles, ptmx, ...).
+
+Usage: python benchmarks/bench_udev_backend.py [--repeat 20]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC)
+
+import udev_manager  # noqa: E402
+
+COLD_SCRIPT = '''
+import sys
+sys.path.insert(0, {src!r})
+import udev_manager
+context = udev_manager.SysfsContext() if {sysfs!r} else None
+print(len(udev_manager.DeviceInventory(context).get_device_list()))
+'''
+
+
+def create_inventory(backend):
+    if backend == 'sysfs':
+        return udev_manager.DeviceInventory(udev_manager.SysfsContext())
+    import pyudev
+    return udev_manager.DeviceInventory(pyudev.Context())
+
+
+def time_cold(backend, repeat):
+    durations = []
+    script = COLD_SCRIPT.format(src=SRC, sysfs=backend == 'sysfs')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', script], check=True, stdout=subprocess.DEVNULL)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def time_warm(backend, repeat):
+    inventory = create_inventory(backend)
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        devices = inventory.get_device_list()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations), devices
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    results = {}
+    for backend in ('pyudev', 'sysfs'):
+        warm, devices = time_warm(backend, args.repeat)
+        results[backend] = devices
+        print(f"{backend:<7} cold {time_cold(backend, args.repeat) * 1000:8.1f} ms   warm {warm * 1000:8.2f} ms   {len(devices)} devices")
+    if results['pyudev'] != results['sysfs']:
+        print("The backends found different devices:")
+        print(f"pyudev: {results['pyudev']}")
+        print(f"sysfs:  {results['sysfs']}")
+
+
+if __name__ == '__main__':
+    main()
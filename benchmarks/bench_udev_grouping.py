@@ -0,0 +1,99 @@
+"""Compares the udev rule processing cost of standalone rules with the grouped GOTO/LABEL block for 100 printers.
+
+The printers are spread over 10 vendor/model pairs and use the rule forms of the repo (ATTRS rules of
+create_udev_rule and ENV start/stop pairs of create_startstop_udev_rule). The cost of each event is estimated
+with the static model of udev_manager.estimate_rule_cost: rules evaluated, comparisons and parent devices walked
+by ATTRS comparisons.
+
+With --udevadm SYSPATH, both files are additionally installed as /run/udev/rules.d/99-octodocker-bench.rules and
+'udevadm test --action=add SYSPATH' is timed for each (requires root; the time includes reading all rule files).
+
+Usage: python benchmarks/bench_udev_grouping.py [--printers 100] [--udevadm /sys/class/tty/ttyUSB0] [--repeat N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import udev_manager  # noqa: E402
+
+MODELS = [(f'{0x1a00 + index:04x}', f'{0x7500 + index:04x}') for index in range(10)]
+RULES_FILEPATH = '/run/udev/rules.d/99-octodocker-bench.rules'
+
+
+def create_rules(printers):
+    rules = []
+    for index in range(printers):
+        vendor_id, model_id = MODELS[index % len(MODELS)]
+        name = f'Printer{index}'
+        if index % 2 == 0:
+            rules.append(udev_manager.create_udev_rule(name, serial=f'serial{index}', vendor_id=vendor_id, product_id=model_id))
+        else:
+            compose = f'/opt/octodocker/docker-compose.{name}.yml'
+            rules.append(udev_manager.create_startstop_udev_rule(name, f'/usr/bin/docker compose -f {compose} up -d',
+                                                                 f'/usr/bin/docker compose -f {compose} stop',
+                                                                 serial=f'serial{index}', vendor_id=vendor_id, model_id=model_id))
+    return rules
+
+
+def create_tty_event(serial, vendor_id, model_id, action='add'):
+    """A usb serial adapter: tty device, ttyUSB device, usb interface, usb device and the parent hub"""
+    properties = {'SUBSYSTEM': 'tty', 'ACTION': action, 'ID_VENDOR_ID': vendor_id, 'ID_MODEL_ID': model_id,
+                  'ID_SERIAL': serial, 'ID_SERIAL_SHORT': serial}
+    device = {'idVendor': vendor_id, 'idProduct': model_id, 'serial': serial, 'devpath': '1.2'}
+    hub = {'idVendor': '1d6b', 'idProduct': '0002', 'devpath': '0'}
+    return udev_manager.UdevEvent(properties, [{}, {}, {}, device, hub])
+
+
+def get_events(printers):
+    middle = printers // 2
+    vendor_id, model_id = MODELS[middle % len(MODELS)]
+    return {
+        'non-tty event (block device)': udev_manager.UdevEvent({'SUBSYSTEM': 'block', 'ACTION': 'add'}),
+        'tty event of another device': create_tty_event('other', 'ffff', '0001'),
+        f'add of Printer{middle}': create_tty_event(f'serial{middle}', vendor_id, model_id),
+        f'remove of Printer{middle}': create_tty_event(f'serial{middle}', vendor_id, model_id, 'remove'),
+    }
+
+
+def time_udevadm(content, syspath, repeat):
+    with open(RULES_FILEPATH, 'w') as file:
+        file.write(content)
+    try:
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(['udevadm', 'test', '--action=add', syspath], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            durations.append(time.perf_counter() - start)
+        return statistics.median(durations)
+    finally:
+        os.unlink(RULES_FILEPATH)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--printers', type=int, default=100)
+    parser.add_argument('--udevadm', metavar='SYSPATH', default=None)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    rules = create_rules(args.printers)
+    formats = {'standalone': '\n'.join(rules) + '\n', 'grouped': udev_manager.create_grouped_rules(rules)}
+
+    print(f"{'event':<32} {'format':<11} {'rules':>6} {'compares':>9} {'parents':>8} {'units':>7} {'matched':>8}")
+    for event_name, event in get_events(args.printers).items():
+        for format_name, content in formats.items():
+            cost = udev_manager.estimate_rule_cost(content, event)
+            print(f"{event_name:<32} {format_name:<11} {cost.lines:>6} {cost.comparisons:>9} {cost.parent_lookups:>8} {cost.units:>7} {cost.matched:>8}")
+
+    if args.udevadm:
+        for format_name, content in formats.items():
+            print(f"udevadm test {format_name}: {time_udevadm(content, args.udevadm, args.repeat) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+import io
+import json
+import os
+import socket
+import socketserver
+import struct
+from contextlib import redirect_stderr, redirect_stdout
+from typing import AnyStr, Callable, Optional
+
+# commands the server runs for the cli, long running commands (watch, serve) always run in their own process
+SERVED_COMMANDS = ('devices', 'rules', 'add', 'remove', 'conflicts')
+# options changing the state of the process (e.g. the device backend), commands using them run in their own process
+LOCAL_OPTIONS = ('sysfs',)
+REQUEST_TIMEOUT = 30
+ROOT_RUNTIME_DIR = '/run/octodocker'
+
+
+def get_socket_path() -> AnyStr:
+    """Gets the default socket of the command server.
+    Root uses /run/octodocker/octodocker.sock, other users $XDG_RUNTIME_DIR/octodocker.sock or
+    /run/user/<uid>/octodocker.sock. These directories can only be written by their owner, so no other user can
+    create the socket in their place.
+
+    Returns:
+        path of the unix socket
+    """
+    if os.getuid() == 0:
+        return os.path.join(ROOT_RUNTIME_DIR, 'octodocker.sock')
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or f'/run/user/{os.getuid()}'
+    return os.path.join(runtime_dir, 'octodocker.sock')
+
+
+def is_trusted_uid(uid: int) -> bool:
+    """Checks if a user id is root or the user running this process"""
+    return uid in (0, os.getuid())
+
+
+def is_private_directory(path: AnyStr) -> bool:
+    """Checks if a directory is owned by a trusted user and can not be written by other users
+
+    Args:
+        path: path of the directory
+
+    Returns:
+        False if the directory is missing, owned by another user or writable by group or others
+    """
+    try:
+        status = os.stat(path)
+    except OSError:
+        return False
+    return is_trusted_uid(status.st_uid) and not status.st_mode & 0o022
+
+
+def get_peer_uid(connection: socket.socket) -> int:
+    """Gets the user id of the process connected to a unix socket
+
+    Args:
+        connection: connected unix socket
+
+    Returns:
+        user id of the peer
+    """
+    credentials = connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    return struct.unpack('3i', credentials)[1]
+
+
+def run_command(handlers: dict, args: dict, cwd: Optional[AnyStr] = None) -> dict:
+    """Runs a command handler and captures its output.
+    The handlers end with sys.exit(), which is caught and turned into the exit status of the response.
+
+    Args:
+        handlers: command name -> handler(args, file)
+        args: arguments as returned by get_args of the cli
+        cwd: working directory of the client, relative paths in the arguments are resolved against it
+
+    Returns:
+        response dictionary with status, stdout and stderr
+    """
+    stdout, stderr = io.StringIO(), io.StringIO()
+    status = 0
+    previous_cwd = os.getcwd()
+    try:
+        if cwd:
+            os.chdir(cwd)
+        file = args.get('file') or args.get('file2') or args.get('file3') or '/etc/udev/rules.d/99-serial.rules'
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            handlers[args['command']](args, file)
+    except SystemExit as exit_request:
+        if isinstance(exit_request.code, int):
+            status = exit_request.code
+        elif exit_request.code is not None:
+            stderr.write(f"{exit_request.code}\n")
+            status = 1
+    except Exception as error:
+        stderr.write(f"{type(error).__name__}: {error}\n")
+        status = 1
+    finally:
+        os.chdir(previous_cwd)
+    return {'status': status, 'stdout': stdout.getvalue(), 'stderr': stderr.getvalue()}
+
+
+class CommandRequestHandler(socketserver.StreamRequestHandler):
+    """Handles one request of the command server: a single JSON line with the command arguments and the working
+    directory of the client, answered with a single JSON line containing the exit status and the output"""
+
+    def handle(self):
+        self.connection.settimeout(REQUEST_TIMEOUT)
+        peer_uid = get_peer_uid(self.connection)
+        if not is_trusted_uid(peer_uid):
+            self.send({'status': 1, 'stdout': '', 'stderr': 'permission denied\n'})
+            return
+
+        try:
+            request = json.loads(self.rfile.readline())
+            args = request['args']
+        except (ValueError, KeyError, TypeError):
+            self.send({'status': 1, 'stdout': '', 'stderr': 'invalid request\n'})
+            return
+
+        if args.get('command') not in self.server.handlers:
+            self.send({'status': 1, 'stdout': '', 'stderr': f"command {args.get('command')} is not served\n"})
+            return
+        local_options = [option for option in LOCAL_OPTIONS if args.get(option)]
+        if local_options:
+            self.send({'status': 1, 'stdout': '', 'stderr': f"--{', --'.join(local_options)} is not supported by the server, use --no-server\n"})
+            return
+        self.send(run_command(self.server.handlers, args, request.get('cwd')))
+
+    def send(self, response: dict):
+        self.wfile.write(json.dumps(response).encode() + b'\n')
+
+
+class CommandServer(socketserver.UnixStreamServer):
+    """Class for the resident command server ('octodocker serve').
+    The server keeps the parsed rule files and the monitored device inventory in memory, so the cli only pays for
+    the interpreter start and a round trip over the socket. Requests are handled one after another, which keeps
+    writes to the rule files serialized. Only the user running the server and root may send requests."""
+
+    def __init__(self, socket_path: AnyStr, handlers: dict):
+        self.handlers = handlers
+        remove_stale_socket(socket_path)
+        previous_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, CommandRequestHandler)
+        finally:
+            os.umask(previous_umask)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def remove_stale_socket(socket_path: AnyStr):
+    """Removes the socket of a server that is no longer running
+
+    Args:
+        socket_path: path of the unix socket
+
+    Raises:
+        ValueError: if a server is listening on the socket
+    """
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(socket_path)
+            return
+    raise ValueError(f"A server is already listening on {socket_path}")
+
+
+def run_server(handlers: dict, socket_path: Optional[AnyStr] = None, prepare: Optional[Callable[[], None]] = None):
+    """Serves the commands until interrupted
+
+    Args:
+        handlers: command name -> handler(args, file)
+        socket_path: path of the unix socket, defaults to get_socket_path()
+        prepare: called before the first request is accepted (e.g. to load the state kept in memory)
+    """
+    if socket_path is None:
+        socket_path = get_socket_path()
+        if os.getuid() == 0:
+            os.makedirs(ROOT_RUNTIME_DIR, mode=0o755, exist_ok=True)
+    if not is_private_directory(os.path.dirname(os.path.abspath(socket_path))):
+        raise ValueError(f"The directory of {socket_path} has to be owned by you or root and not writable by others")
+    with CommandServer(socket_path, handlers) as server:
+        if prepare is not None:
+            prepare()
+        print(f"Serving {', '.join(handlers)} on {socket_path}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def send_request(args: dict, socket_path: Optional[AnyStr] = None, timeout: float = REQUEST_TIMEOUT) -> Optional[dict]:
+    """Sends the arguments of a command to a running command server.
+    The arguments are only sent if the directory of the socket is private (see is_private_directory) and the
+    server runs as root or as the user of this process.
+
+    Args:
+        args: arguments as returned by get_args of the cli
+        socket_path: path of the unix socket, defaults to get_socket_path()
+        timeout: seconds to wait for the response
+
+    Returns:
+        response dictionary with status, stdout and stderr or None if no trusted server is running or the command
+        is not served
+    """
+    socket_path = socket_path or get_socket_path()
+    if args.get('command') not in SERVED_COMMANDS or any(args.get(option) for option in LOCAL_OPTIONS):
+        return None
+    if not is_private_directory(os.path.dirname(os.path.abspath(socket_path))):
+        return None
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(timeout)
+        try:
+            connection.connect(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError, PermissionError):
+            return None
+        if not is_trusted_uid(get_peer_uid(connection)):
+            return None
+        connection.sendall(json.dumps({'args': args, 'cwd': os.getcwd()}).encode() + b'\n')
+        with connection.makefile('rb') as response:
+            line = response.readline()
+    if not line:
+        # the request may already have been applied, running it again in process could apply it twice
+        return {'status': 1, 'stdout': '', 'stderr': f"no response from the server on {socket_path}\n"}
+    return json.loads(line)
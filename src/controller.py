@@ -1,7 +1,10 @@
+import os
 import sys
+import manifest
+import timing
 import udev_manager
 import docker_manager
-from typing import AnyStr, Optional
+from typing import AnyStr, Optional, Union
 
 
 def print_properties(device_data):
@@ -24,23 +27,33 @@ def print_properties(device_data):
 
 def print_devices():
     """Prints the device properties of all currently connected usb devices."""
-    devices = udev_manager.get_device_list()
+    with timing.phase('udev.enumerate'):
+        devices = udev_manager.get_device_list()
     for device in devices:
         print("Device:")
         print_properties(device)
         print("")
 
 
+def start_device_monitoring():
+    """Keeps the device list of the process up to date with udev events instead of enumerating the devices for
+    every request (used by the command server)"""
+    try:
+        udev_manager.get_default_inventory().start_monitoring()
+    except (ImportError, OSError) as error:
+        print(f"Devices are enumerated on every request, monitoring failed: {error}", flush=True)
+
+
 def print_rules(filepath: AnyStr):
     """Prints udev rules present in the specified file
 
     Args:
         filepath: filepath of the rule file
     """
-    with open(filepath) as file:
-        file_content = file.read()
-
-    rules = udev_manager.get_device_rules(file_content)
+    with timing.phase('rules.load'):
+        rule_file = udev_manager.load_rule_file(filepath)
+    with timing.phase('rules.extract'):
+        rules = udev_manager.get_device_rules(rule_file)
 
     for key, item in rules.items():
         print(f"{key}:")
@@ -48,11 +61,94 @@ def print_rules(filepath: AnyStr):
         print("")
 
 
-def check_for_duplicates(file_content: AnyStr, name: AnyStr, path: AnyStr, serial: AnyStr) -> (bool, AnyStr):
+def _describe_rule(rule: udev_manager.Rule) -> dict:
+    return {'line': rule.line_number, 'name': rule.name, 'rule': rule.text.strip()}
+
+
+def print_matches(filepath: AnyStr, as_json: bool = False):
+    """Prints which connected device matches which rule of the rule file, the devices without or with several
+    rules and the rules without connected device
+
+    Args:
+        filepath: filepath of the udev rule file
+        as_json: print the result as json object instead of text
+    """
+    with timing.phase('rules.load'):
+        rule_file = udev_manager.load_rule_file(filepath)
+    with timing.phase('udev.enumerate'):
+        devices = udev_manager.get_device_list()
+    with timing.phase('rules.match'):
+        report = udev_manager.match_devices(rule_file, devices)
+
+    if as_json:
+        import json
+        from dataclasses import asdict
+        print(json.dumps({
+            'matched': [{'device': asdict(match.device), 'rules': [_describe_rule(rule) for rule in match.rules]} for match in report.matched],
+            'ambiguous': [{'device': asdict(match.device), 'rules': [_describe_rule(rule) for rule in match.rules]} for match in report.ambiguous],
+            'unmatched': [asdict(device) for device in report.unmatched],
+            'unused': [_describe_rule(rule) for rule in report.unused],
+        }, indent=2))
+        return
+
+    for title, matches in (("Matched", report.matched), ("Ambiguous", report.ambiguous)):
+        for match in matches:
+            print(f"{title}: {match.device.serial or match.device.path or match.device.devpath}")
+            print_properties(match.device)
+            for rule in match.rules:
+                print(f"  line {rule.line_number}: {rule.text.strip()}")
+            print("")
+    for device in report.unmatched:
+        print(f"Unmatched: {device.serial or device.path or device.devpath}")
+        print_properties(device)
+        print("")
+    for rule in report.unused:
+        print(f"Unused rule, line {rule.line_number}: {rule.text.strip()}")
+    print(f"{len(report.matched)} matched, {len(report.ambiguous)} ambiguous, {len(report.unmatched)} unmatched devices, {len(report.unused)} unused rules")
+
+
+def print_conflicts(directory: AnyStr):
+    """Prints all names, paths and serial numbers used by more than one rule in the rule files of a directory
+
+    Args:
+        directory: rule directory to scan
+    """
+    with timing.phase('rules.scan_directory'):
+        index = udev_manager.scan_rule_directory(directory)
+    with timing.phase('rules.find_conflicts'):
+        conflicts = udev_manager.find_conflicts(index)
+
+    for conflict in conflicts:
+        print(f"{conflict.kind} {conflict.value}:")
+        for location in conflict.locations:
+            print(f"  {location.filepath}:{location.line_number} ({location.name or 'no name'})")
+        print("")
+
+    print(f"{len(conflicts)} conflicts in {len(index.files)} files ({len(index.skipped)} files skipped)")
+
+
+def load_rule_index(filepath: AnyStr, global_check: bool = False) -> Union[udev_manager.RuleFile, udev_manager.GlobalRuleIndex]:
+    """Loads the rules used for the duplicate checks
+
+    Args:
+        filepath: filepath of the udev rule file
+        global_check: use the rules of all rule files in the directory of the file instead of the file only
+
+    Returns:
+        RuleFile of the file or GlobalRuleIndex of its directory
+    """
+    if global_check:
+        with timing.phase('rules.scan_directory'):
+            return udev_manager.scan_rule_directory(os.path.dirname(os.path.abspath(filepath)))
+    with timing.phase('rules.load'):
+        return udev_manager.load_rule_file(filepath)
+
+
+def check_for_duplicates(rule_file: Union[udev_manager.RuleFile, udev_manager.GlobalRuleIndex], name: AnyStr, path: AnyStr, serial: AnyStr) -> (bool, AnyStr):
     """Checks if the specified name, path or serial number is present in the rule file.
 
     Args:
-        file_content: content of the rule file as a string
+        rule_file: parsed rule file or global rule index
         name: name (symlink name) to check for
         path: path (id path or devpath) to check for
         serial: serial number to check for
@@ -61,19 +157,39 @@ def check_for_duplicates(file_content: AnyStr, name: AnyStr, path: AnyStr, seria
         (bool, str) If one of the attributes is present in the file, true is returned, otherwise false.
         The string contains the name of the attribute (name, path, serial) that was found or is empty if none were found.
     """
-    if name in udev_manager.get_names(file_content):
+    if name in rule_file.names:
         return True, "name"
 
-    if path and path in udev_manager.get_paths(file_content):
+    if path and rule_file.has_path(path):
         return True, "path"
 
-    if serial and serial in udev_manager.get_serial_numbers(file_content):
+    if serial and serial in rule_file.serials:
         return True, "Serial"
 
     return False, ''
 
 
-def add_rule(filepath: AnyStr, name: AnyStr, vendor_id: AnyStr, model_id: AnyStr, devpath: Optional[AnyStr], path: Optional[AnyStr], serial: Optional[AnyStr], force: bool = False):
+def reload_udev_rules(rules: list, action: AnyStr = 'change'):
+    """Makes udevd reload the rule files and replays an event only for the connected devices matching the changed
+    rules, instead of triggering every device of the host
+
+    Args:
+        rules: parsed rules that were added or removed
+        action: action of the triggered events, 'add' runs the start commands of added rules
+    """
+    with timing.phase('udev.reload'):
+        try:
+            sys_paths = udev_manager.find_rule_sys_paths(rules)
+        except (ImportError, OSError) as error:
+            print(f"Connected devices could not be determined, no device is triggered: {error}")
+            sys_paths = []
+        if not udev_manager.reload_rules(sys_paths, action):
+            print("Reloading the udev rules failed, run 'udevadm control --reload' as root")
+            return
+    print(f"Udev rules reloaded, {len(sys_paths)} connected devices triggered")
+
+
+def add_rule(filepath: AnyStr, name: AnyStr, vendor_id: AnyStr, model_id: AnyStr, devpath: Optional[AnyStr], path: Optional[AnyStr], serial: Optional[AnyStr], force: bool = False, global_check: bool = False, reload: bool = True):
     """Adds a rule to the udev rule file.
     Either the devpath, path or serial has to be specified.
     Checks if the given name, serial, path or devpath is already used in another rule. If another rule is found,
@@ -88,6 +204,8 @@ def add_rule(filepath: AnyStr, name: AnyStr, vendor_id: AnyStr, model_id: AnyStr
         path: id path to use in the rule
         serial: serial number to use in the rule
         force: force the new rule to be added and already existing duplicates.
+        global_check: check for duplicates in all rule files of the directory
+        reload: reload the udev rules and trigger the device if it is connected
 
     Raises:
         ValueError: if devpath, serial and path are None
@@ -97,23 +215,118 @@ def add_rule(filepath: AnyStr, name: AnyStr, vendor_id: AnyStr, model_id: AnyStr
         print("Either devpath or serial or path has to be specified")
         sys.exit()
 
-    with open(filepath) as file:
-        file_content = file.read()
+    rule_file = load_rule_index(filepath, global_check)
 
     if force is False:
-        has_attr, attr_type = check_for_duplicates(file_content, name, devpath, serial)
+        has_attr, attr_type = check_for_duplicates(rule_file, name, devpath, serial)
         if has_attr:
             print(f"{attr_type} is already in use")
             sys.exit()
 
     udev_rule = udev_manager.create_udev_rule(name, serial, devpath, path, vendor_id, model_id)
-    file_content = udev_manager.add_rule(file_content, udev_rule)
+    with timing.phase('rules.append'):
+        udev_manager.append_rule_to_file(filepath, udev_rule)
+    if reload:
+        reload_udev_rules(udev_manager.parse_rules(udev_rule).rules, 'add')
 
-    with open(filepath, "w") as file:
-        file.write(file_content)
 
+def create_docker_rule(compose_filepath: AnyStr, name: AnyStr, vendor_id: AnyStr, model_id: AnyStr, path: Optional[AnyStr], serial: Optional[AnyStr], use_daemon: bool = False, standby_timeout: Optional[int] = None, service: Optional[AnyStr] = None, boot_guard: bool = False) -> AnyStr:
+    """Creates the udev rule for a printer with an octoprint container
 
-def add_rule_docker(filepath: AnyStr, port: int, name: AnyStr, vendor_id: AnyStr, model_id: AnyStr, path: Optional[AnyStr], serial: Optional[AnyStr], force=False, docker_filepath: Optional[AnyStr] = None):
+    Args:
+        compose_filepath: filepath of the docker compose file of the container
+        name: name (symlink name) of the new rule
+        vendor_id: vendor id to use in the rule
+        model_id: model id to use in the rule
+        path: id path to use in the rule
+        serial: serial number to use in the rule
+        use_daemon: create a symlink only rule for the hotplug daemon instead of a start and stop rule
+        standby_timeout: pause the container on disconnect and stop it after this many seconds, None to stop it right away
+        service: service of the container if the compose file is the shared compose project
+        boot_guard: the start command does nothing until the boot start ran (see create_boot_guarded_command), for
+            setups whose oneshot unit runs `start --boot`
+
+    Returns:
+        string of the udev rule
+    """
+    if use_daemon:
+        return udev_manager.create_symlink_udev_rule(name, compose_filepath, serial, path, vendor_id, model_id, standby_timeout, service)
+
+    if standby_timeout is not None:
+        start_command = docker_manager.create_standby_start_command(compose_filepath, name, service)
+        stop_command = docker_manager.create_standby_stop_command(compose_filepath, name, standby_timeout, service)
+    else:
+        start_command = docker_manager.create_start_command(compose_filepath, service)
+        stop_command = docker_manager.create_stop_command(compose_filepath, service)
+    if boot_guard:
+        start_command = docker_manager.create_boot_guarded_command(start_command)
+    return udev_manager.create_startstop_udev_rule(name, start_command, stop_command, serial, path, vendor_id, model_id)
+
+
+def load_resource_profile(overrides: dict, defaults_filepath: Optional[AnyStr] = None) -> Optional[docker_manager.ResourceProfile]:
+    """Merges the resource limits given for a printer with the default resource profile and validates them
+    against the cores and memory of the host
+
+    Args:
+        overrides: resource limits given for the printer (field name -> value, None if not given)
+        defaults_filepath: filepath of the default resource profile (JSON), defaults to
+            ~/.config/octodocker/resources.json
+
+    Returns:
+        ResourceProfile or None if no limit is set
+    """
+    try:
+        with timing.phase('resources.load'):
+            defaults = docker_manager.read_resource_defaults(defaults_filepath)
+        profile = docker_manager.merge_resource_profiles(defaults, docker_manager.create_resource_profile(overrides))
+        docker_manager.validate_resource_profile(profile)
+    except ValueError as error:
+        print(error)
+        sys.exit()
+    return None if profile.is_empty else profile
+
+
+def has_resource_limits(overrides: Optional[dict], defaults_filepath: Optional[AnyStr] = None) -> bool:
+    """Checks if resource limits were given for a printer
+
+    Args:
+        overrides: resource limits given for the printer (field name -> value, None if not given)
+        defaults_filepath: filepath of the default resource profile given for the printer
+
+    Returns:
+        True if a limit or a default resource profile was given
+    """
+    return defaults_filepath is not None or any(value is not None for value in (overrides or {}).values())
+
+
+def create_compose_project(port: int, name: AnyStr, docker_filepath: Optional[AnyStr] = None, standby_timeout: Optional[int] = None, shared: bool = False, resources: Optional[docker_manager.ResourceProfile] = None) -> (AnyStr, Optional[AnyStr]):
+    """Creates the docker compose file of a printer or adds its service to the shared compose project
+
+    Args:
+        port: Port under which the octoprint instance should be accessible
+        name: name (symlink name) of the printer
+        docker_filepath: file path of the docker compose file
+        standby_timeout: pause the container on disconnect and stop it after this many seconds
+        shared: add the printer as a service to the shared compose project
+        resources: cpu, memory and block io limits of the container
+
+    Returns:
+        (str, str) filepath of the docker compose file and the service of the printer (None if not shared)
+    """
+    if not shared:
+        with timing.phase('compose.write'):
+            return docker_manager.create_docker_compose(port, name, docker_filepath, standby_timeout, resources), None
+
+    try:
+        with timing.phase('compose.add_service'):
+            file_name = docker_manager.add_shared_service(port, name, docker_filepath, standby_timeout, resources)
+    except ValueError as error:
+        print(error)
+        sys.exit()
+    return file_name, docker_manager.get_service_name(name)
+
+
+def add_rule_docker(filepath: AnyStr, port: int, name: AnyStr, vendor_id: AnyStr, model_id: AnyStr, path: Optional[AnyStr], serial: Optional[AnyStr], force=False, docker_filepath: Optional[AnyStr] = None, global_check: bool = False, use_daemon: bool = False, standby_timeout: Optional[int] = None, shared: bool = False, resources: Optional[docker_manager.ResourceProfile] = None, prepare: bool = False, reload: bool = True, boot_guard: bool = False):
     """Adds a rule to the udev rule file.
     Either the path or serial has to be specified.
     Checks if the given name, serial oa path is already used in another rule. If another rule is found,
@@ -131,31 +344,443 @@ def add_rule_docker(filepath: AnyStr, port: int, name: AnyStr, vendor_id: AnyStr
         serial: serial number to use in the rule
         force: force the new rule to be added and already existing duplicates.
         docker_filepath: file path to save the docker compose file
+        global_check: check for duplicates in all rule files of the directory
+        use_daemon: only create the symlink in the rule and leave starting and stopping the container to the
+            hotplug daemon ('octodocker watch')
+        standby_timeout: pause the container on disconnect (warm standby) and stop it after this many seconds.
+            If None, the container is stopped right away.
+        shared: add the container as a service to the shared compose project instead of creating its own project.
+            The udev commands then only start and stop this service.
+        resources: cpu, memory and block io limits of the container
+        prepare: pull the image if it is missing and create the container, network and volume, so the first
+            connect only has to start the container
+        reload: reload the udev rules and trigger the device if it is connected, which starts the container
+        boot_guard: the start commands do nothing until the boot start ran (see create_docker_rule)
     """
     if path is None and serial is None and path is None:
         print("Either path or serial has to be specified")
 
-    with open(filepath, 'r') as file:
-        file_content = file.read()
+    rule_file = load_rule_index(filepath, global_check)
 
     if force is False:
-        has_attr, attr_type = check_for_duplicates(file_content, name, path, serial)
+        has_attr, attr_type = check_for_duplicates(rule_file, name, path, serial)
         if has_attr:
             print(f"{attr_type} is already in use")
             sys.exit()
 
-    file_name = docker_manager.create_docker_compose(port, name, docker_filepath)
-    start_command = docker_manager.create_start_command(file_name)
-    stop_command = docker_manager.create_stop_command(file_name)
+    file_name, service = create_compose_project(port, name, docker_filepath, standby_timeout, shared, resources)
+    udev_rule = create_docker_rule(file_name, name, vendor_id, model_id, path, serial, use_daemon, standby_timeout, service, boot_guard)
+    with timing.phase('rules.append'):
+        udev_manager.append_rule_to_file(filepath, udev_rule)
+    if prepare:
+        prepare_compose_projects([(file_name, service)])
+    if reload:
+        reload_udev_rules(udev_manager.parse_rules(udev_rule).rules, 'add')
+
+
+def validate_manifest(rule_file: Union[udev_manager.RuleFile, udev_manager.GlobalRuleIndex], entries: list, force: bool = False) -> list:
+    """Validates the entries of a manifest against the rule file and against each other.
+
+    Args:
+        rule_file: parsed rule file or global rule index
+        entries: list of ManifestEntry objects
+        force: skip the duplicate checks against the rule file
+
+    Returns:
+        List of error messages, empty if all entries are valid
+    """
+    errors = []
+    names, paths, serials = set(), set(), set()
+
+    for entry in entries:
+        path = entry.path or entry.devpath
+        if entry.serial is None and path is None:
+            errors.append(f"{entry.name}: either devpath or serial or path has to be specified")
+        if entry.devpath and entry.port:
+            errors.append(f"{entry.name}: docker is not supported when using devpath")
+
+        if force is False:
+            has_attr, attr_type = check_for_duplicates(rule_file, entry.name, path, entry.serial)
+            if has_attr:
+                errors.append(f"{entry.name}: {attr_type} is already in use")
+
+        if entry.name in names:
+            errors.append(f"{entry.name}: name is used more than once in the manifest")
+        if path and path in paths:
+            errors.append(f"{entry.name}: path is used more than once in the manifest")
+        if entry.serial and entry.serial in serials:
+            errors.append(f"{entry.name}: Serial is used more than once in the manifest")
+
+        names.add(entry.name)
+        if path:
+            paths.add(path)
+        if entry.serial:
+            serials.add(entry.serial)
+
+    return errors
+
+
+def add_rules_from_manifest(filepath: AnyStr, manifest_filepath: AnyStr, force: bool = False, global_check: bool = False, use_daemon: bool = False, standby_timeout: Optional[int] = None, shared: bool = False, resource_overrides: Optional[dict] = None, resources_filepath: Optional[AnyStr] = None, prepare: bool = False, grouped: bool = False, reload: bool = True, boot_guard: bool = False):
+    """Adds the rules for all printers of a manifest to the udev rule file.
+    All entries are validated before anything is written. The docker compose files are created for every entry with
+    a port and the rule file is written once, if writing the rules fails the created compose files are removed again.
+    The time spent in each phase is printed from the PhaseRecorder of the process (see timing.enable_timings).
+
+    Args:
+        filepath: filepath of the udev rule file
+        manifest_filepath: filepath of the manifest (.json or .csv)
+        force: force the new rules to be added and already existing duplicates.
+        global_check: check for duplicates in all rule files of the directory
+        use_daemon: leave starting and stopping the containers to the hotplug daemon
+        standby_timeout: pause the containers on disconnect and stop them after this many seconds
+        shared: add the containers as services to the shared compose project
+        resource_overrides: cpu, memory and block io limits of every container (field name -> value, None if not given)
+        resources_filepath: filepath of the default resource profile, the profile is only loaded if the manifest
+            contains entries with a port
+        prepare: pull the image if it is missing and create the containers without starting them
+        grouped: write the rules as a guarded block grouped by vendor and model id (see create_grouped_rules)
+        reload: reload the udev rules and trigger the connected devices of the manifest
+        boot_guard: the start commands do nothing until the boot start ran (see create_docker_rule)
+    """
+    # the phases are printed in any case, the recorder of --timings prints them together with the command phases
+    recorder = None if timing.get_recorder() is not None else timing.enable_timings()
+    try:
+        _add_manifest_rules(filepath, manifest_filepath, force, global_check, use_daemon, standby_timeout, shared, resource_overrides, resources_filepath, prepare, grouped, reload, boot_guard)
+    finally:
+        if recorder is not None:
+            timing.disable_timings()
+            print(recorder.format_summary())
+
+
+def _add_manifest_rules(filepath: AnyStr, manifest_filepath: AnyStr, force: bool, global_check: bool, use_daemon: bool, standby_timeout: Optional[int], shared: bool, resource_overrides: Optional[dict], resources_filepath: Optional[AnyStr], prepare: bool, grouped: bool, reload: bool, boot_guard: bool):
+    try:
+        with timing.phase('manifest.read'):
+            entries = manifest.read_manifest(manifest_filepath)
+    except ValueError as error:
+        print(error)
+        sys.exit()
+    rule_file = load_rule_index(filepath, global_check)
+
+    with timing.phase('manifest.validate'):
+        errors = validate_manifest(rule_file, entries, force)
+    if errors:
+        print("\n".join(errors))
+        sys.exit()
+
+    resources = None
+    if any(entry.port for entry in entries):
+        resources = load_resource_profile(resource_overrides or {}, resources_filepath)
+    elif has_resource_limits(resource_overrides, resources_filepath):
+        print("Resource limits can only be set if the manifest contains entries with a port")
+        sys.exit()
 
-    udev_rule = udev_manager.create_startstop_udev_rule(name, start_command, stop_command, serial, path, vendor_id, model_id)
-    file_content = udev_manager.add_rule(file_content, udev_rule)
+    udev_rules = []
+    projects = []
+    with timing.phase('manifest.generate'):
+        for entry in entries:
+            if entry.port:
+                file_name, service = create_compose_project(entry.port, entry.name, standby_timeout=standby_timeout, shared=shared, resources=resources)
+                projects.append((file_name, service))
+                udev_rules.append(create_docker_rule(file_name, entry.name, entry.vendor, entry.model, entry.path, entry.serial, use_daemon, standby_timeout, service, boot_guard))
+            else:
+                udev_rules.append(udev_manager.create_udev_rule(entry.name, entry.serial, entry.devpath, entry.path, entry.vendor, entry.model))
+        content = udev_manager.create_grouped_rules(udev_rules) if grouped else "\n".join(udev_rules)
+
+    try:
+        with timing.phase('rules.append'):
+            udev_manager.append_rule_to_file(filepath, content)
+    except OSError as error:
+        remove_compose_projects(projects, [entry.name for entry in entries if entry.port])
+        print(f"Writing the rules failed, the docker compose files of the manifest were removed: {error}")
+        sys.exit()
+
+    if prepare:
+        prepare_compose_projects(projects)
+
+    if reload:
+        reload_udev_rules(udev_manager.parse_rules(content).rules, 'add')
+
+    print(f"Added {len(entries)} rules")
+
+
+def remove_compose_projects(projects: list, names: list):
+    """Removes the docker compose files or shared services created for printers whose rules could not be written
+
+    Args:
+        projects: (compose file, service) of each project, service is None for a project of its own
+        names: names of the printers in the order of the projects
+    """
+    for (compose_file, service), name in zip(projects, names):
+        try:
+            if service is None:
+                os.remove(compose_file)
+            else:
+                docker_manager.remove_shared_service(name, compose_file)
+        except OSError:
+            pass
 
-    with open(filepath, "w") as file:
-        file.write(file_content)
 
+def prepare_compose_projects(projects: list, concurrency: int = 4) -> bool:
+    """Pulls the octoprint image if it is missing and creates the containers, networks and volumes of compose projects
+    without starting them, so a hotplug event only has to start the container
 
-def remove_rule(filepath: AnyStr, name: Optional[AnyStr], path: Optional[AnyStr], serial: Optional[AnyStr]):
+    Args:
+        projects: (compose file, service) of each project, service is None for a project of its own
+        concurrency: number of projects prepared at the same time
+
+    Returns:
+        True if every project was prepared
+    """
+    commands = [docker_manager.create_prepare_command(compose_file, service) for compose_file, service in projects]
+    with timing.phase('docker.prepare'):
+        exit_codes = docker_manager.run_commands(commands, concurrency)
+    failed = [command for command, exit_code in zip(commands, exit_codes) if exit_code != 0]
+    for command in failed:
+        print(f"Preparing the container failed: {command}")
+    return not failed
+
+
+def check_instances(filepath: AnyStr, socket_path: AnyStr = '/var/run/docker.sock'):
+    """Prints for every rule with a docker container whether it is prepared: the compose file exists, the octoprint
+    image is present and the container was created, so connecting the printer only starts the container.
+    Exits with status 1 if an instance is not prepared.
+
+    Args:
+        filepath: filepath of the udev rule file
+        socket_path: docker socket the image and container states are read from
+    """
+    with timing.phase('rules.load'):
+        rule_file = udev_manager.load_rule_file(filepath)
+    targets = create_start_targets(rule_file.rules)
+
+    try:
+        with timing.phase('docker.engine_api'), docker_manager.DockerEngineClient(socket_path) as client:
+            image_present = client.inspect_image(docker_manager.OCTOPRINT_IMAGE) is not None
+            containers = docker_manager.index_containers(client.list_containers([docker_manager.PROJECT_LABEL]))
+    except (docker_manager.DockerEngineError, OSError) as error:
+        print(f"Image and container states could not be read from {socket_path}: {error}")
+        sys.exit(1)
+
+    if not image_present:
+        print(f"Image {docker_manager.OCTOPRINT_IMAGE} is not present")
+    prepared = 0
+    for target in targets:
+        container = containers.get(docker_manager.get_container_key(target))
+        if not os.path.isfile(target.compose_file):
+            status = "not prepared (compose file missing)"
+        elif container is None:
+            status = "not prepared (container missing)"
+        elif not image_present:
+            status = f"not prepared (image missing, container {container.get('State', 'unknown')})"
+        else:
+            status = f"prepared (container {container.get('State', 'unknown')})"
+            prepared += 1
+        print(f"{target.name}: {status}")
+
+    print(f"{prepared} of {len(targets)} instances prepared")
+    if prepared != len(targets):
+        sys.exit(1)
+
+
+def run_hotplug_daemon(filepath: AnyStr, max_workers: int = 4, socket_path: Optional[AnyStr] = None, settle_window: float = 0.5):
+    """Starts the hotplug daemon which starts and stops the containers of the rules in the rule file
+
+    Args:
+        filepath: filepath of the udev rule file
+        max_workers: number of docker commands that may run at the same time
+        socket_path: docker socket to use the engine api instead of docker compose for existing containers
+        settle_window: seconds without further events of a printer before its container is started or stopped
+    """
+    import hotplug_daemon
+    daemon = hotplug_daemon.HotplugDaemon(filepath, max_workers, socket_path=socket_path, settle_window=settle_window)
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        pass
+
+
+def find_connected_rules(rule_file: udev_manager.RuleFile) -> list:
+    """Finds the rules matching the connected usb devices
+
+    Args:
+        rule_file: parsed rule file
+
+    Returns:
+        List of matching rules in file order
+    """
+    with timing.phase('udev.enumerate'):
+        devices = udev_manager.get_device_list()
+    rules = {rule.line_number: rule for device in devices for rule in udev_manager.find_device_rules(rule_file, device)}
+    return [rule for _, rule in sorted(rules.items())]
+
+
+def create_start_targets(rules: list, priorities: Optional[list] = None) -> list:
+    """Creates the start targets of the docker compose projects (or services of the shared project) started by rules
+
+    Args:
+        rules: parsed rules
+        priorities: names of the printers to start first, in this order
+
+    Returns:
+        List of docker_manager.StartTarget objects, one per compose project or service
+    """
+    priorities = priorities or []
+    targets = {}
+    for rule in rules:
+        if rule.is_comment or rule.action == 'remove':
+            continue
+        if rule.compose_file:
+            compose_file, service = rule.compose_file, rule.service
+        elif rule.run and docker_manager.parse_start_command(rule.run):
+            compose_file, service = docker_manager.parse_start_command(rule.run)
+        else:
+            continue
+        if (compose_file, service) in targets:
+            continue
+        name = rule.name or service or compose_file
+        priority = len(priorities) - priorities.index(name) if name in priorities else 0
+        port = docker_manager.read_compose_port(compose_file, service)
+        targets[(compose_file, service)] = docker_manager.StartTarget(name, compose_file, service, port, priority)
+    return list(targets.values())
+
+
+def collect_start_targets(filepath: AnyStr, priorities: Optional[list] = None, connected_only: bool = True) -> list:
+    """Collects the docker compose projects (or services of the shared project) started by the rules of a rule file
+
+    Args:
+        filepath: filepath of the udev rule file
+        priorities: names of the printers to start first, in this order
+        connected_only: only collect the rules of the connected printers
+
+    Returns:
+        List of docker_manager.StartTarget objects
+    """
+    with timing.phase('rules.load'):
+        rule_file = udev_manager.load_rule_file(filepath)
+    rules = find_connected_rules(rule_file) if connected_only else rule_file.rules
+    return create_start_targets(rules, priorities)
+
+
+def start_all(filepath: AnyStr, concurrency: int = 3, ready_timeout: float = 120, priorities: Optional[list] = None, connected_only: bool = True, boot: bool = False):
+    """Starts the docker containers of the rules with a limited number of containers starting at the same time and
+    prints the time until each octoprint instance answered.
+    The start commands of rules added with boot_guard do nothing after a reboot until the boot start (boot=True,
+    run by a oneshot systemd unit) enabled them, so the boot start replaces the storm of udev starts.
+
+    Args:
+        filepath: filepath of the udev rule file
+        concurrency: number of containers starting at the same time
+        ready_timeout: seconds to wait for an octoprint instance to answer
+        priorities: names of the printers to start first, in this order
+        connected_only: only start the containers of the connected printers
+        boot: enable the guarded start commands of the udev rules before collecting the containers
+    """
+    if boot:
+        docker_manager.mark_boot_started()
+    targets = collect_start_targets(filepath, priorities, connected_only)
+    if not targets:
+        print("No containers to start")
+        return
+
+    with timing.phase('docker.bulk_start'):
+        results = docker_manager.bulk_start(targets, concurrency, ready_timeout)
+    for result in results:
+        if result.time_to_ready is not None:
+            status = f"ready after {result.time_to_ready:.1f} s"
+        elif result.exit_code != 0:
+            status = f"failed (exit code {result.exit_code})"
+        else:
+            status = "not ready"
+        print(f"{result.name}: started at {result.started:.1f} s, {status}")
+        for error in result.errors:
+            print(f"  {error}")
+
+    ready = [result.time_to_ready for result in results if result.time_to_ready is not None]
+    if ready:
+        print(f"{len(ready)} of {len(results)} instances ready after {max(ready):.1f} s")
+    else:
+        print(f"0 of {len(results)} instances ready")
+
+
+def reconcile(filepath: AnyStr, socket_path: AnyStr = '/var/run/docker.sock', concurrency: int = 4, dry_run: bool = False):
+    """Starts the containers of connected printers and stops the containers of disconnected printers that are not in
+    the expected state (e.g. after a failed udev RUN or a restart of the docker daemon).
+    The states of all containers are read with a single engine api request, commands are only run for containers
+    that differ, so running it periodically (e.g. from a systemd timer) costs one rule file check, one device
+    enumeration and one request. Runs overlapping with a previous run are skipped.
+
+    Args:
+        filepath: filepath of the udev rule file
+        socket_path: docker socket used to read the container states
+        concurrency: number of docker commands running at the same time
+        dry_run: only print the actions
+    """
+    lock = docker_manager.acquire_reconcile_lock()
+    if lock is None:
+        print("Another reconcile is running")
+        return
+
+    with lock:
+        with timing.phase('rules.load'):
+            rule_file = udev_manager.load_rule_file(filepath)
+        targets = create_start_targets(rule_file.rules)
+        if not targets:
+            return
+        connected = {(target.compose_file, target.service) for target in create_start_targets(find_connected_rules(rule_file))}
+
+        try:
+            with timing.phase('docker.engine_api'), docker_manager.DockerEngineClient(socket_path) as client:
+                containers = docker_manager.index_containers(client.list_containers([docker_manager.PROJECT_LABEL]))
+        except (docker_manager.DockerEngineError, OSError) as error:
+            print(f"Container states could not be read from {socket_path}: {error}")
+            sys.exit(1)
+
+        actions = docker_manager.plan_reconcile(targets, connected, containers)
+        if dry_run:
+            for action in actions:
+                print(f"{action.name}: {action.action} ({action.state})")
+            return
+
+        with timing.phase('docker.reconcile'):
+            exit_codes = docker_manager.run_actions(actions, concurrency)
+        for action, exit_code in zip(actions, exit_codes):
+            result = "done" if exit_code == 0 else f"failed (exit code {exit_code})"
+            print(f"{action.name}: {action.action} ({action.state}) {result}")
+
+
+def optimize_rule_file(filepath: AnyStr, dry_run: bool = False):
+    """Removes dead and duplicate rules of the rule file, converts ATTRS comparisons to ENV comparisons and rewrites
+    the rules as a guarded block (see udev_manager.optimize_rules). Prints the changes and the estimated matching
+    cost before and after; with dry_run, the changes are printed as diff and the file is left untouched.
+
+    Args:
+        filepath: filepath of the udev rule file
+        dry_run: only print the changes
+    """
+    try:
+        with timing.phase('rules.optimize'):
+            content, result = udev_manager.optimize_rule_file(filepath, write=not dry_run)
+    except ValueError as error:
+        print(error)
+        sys.exit(1)
+
+    if result.content == content:
+        print("The rule file is already optimized")
+        return
+    if dry_run:
+        import difflib
+        sys.stdout.writelines(difflib.unified_diff(content.splitlines(keepends=True), result.content.splitlines(keepends=True), filepath, f"{filepath} (optimized)"))
+        print("")
+
+    print(f"{len(result.dead)} dead rules removed, {len(result.duplicates)} duplicate rules removed, {result.converted} rules converted to ENV matches")
+    print(f"{'estimated cost per event':<36} {'before':>8} {'after':>8}")
+    for event, (before, after) in udev_manager.compare_file_costs(content, result.content).items():
+        print(f"{event:<36} {before.units:>8} {after.units:>8}")
+    if not dry_run:
+        print("Rule file optimized")
+
+
+def remove_rule(filepath: AnyStr, name: Optional[AnyStr], path: Optional[AnyStr], serial: Optional[AnyStr], shared: bool = False, reload: bool = True):
     """Removes a rule from an udev rule file.
     Only one of the optional parameters has to be specified for the corresponding rules to be removed.
 
@@ -164,16 +789,22 @@ def remove_rule(filepath: AnyStr, name: Optional[AnyStr], path: Optional[AnyStr]
         name: name (symlink name) of the new rule
         path: id path to use in the rule
         serial: serial number to use in the rule
+        shared: also remove the services of the removed rules from the shared compose project
+        reload: reload the udev rules and trigger the connected devices of the removed rules
     """
-    with open(filepath, 'r') as file:
-        file_content = file.read()
-
-    if serial:
-        file_content = udev_manager.remove_rule_by_serial(file_content, serial)
-    elif path:
-        file_content = udev_manager.remove_rule_by_path(file_content, path)
-    elif name:
-        file_content = udev_manager.remove_rule_by_name(file_content, name)
-
-    with open(filepath, 'w') as file:
-        file.write(file_content)
+    removed = []
+    if shared or reload:
+        with timing.phase('rules.load'):
+            rule_file = udev_manager.load_rule_file(filepath)
+        for index, value in ((rule_file.names, name), (rule_file.paths, path), (rule_file.devpaths, path), (rule_file.serials, serial)):
+            if value is not None:
+                removed.extend(index.get(value, []))
+
+    with timing.phase('rules.remove'):
+        udev_manager.remove_rules_from_file(filepath, name, path, serial)
+    if shared:
+        for rule_name in sorted({rule.name for rule in removed if rule.name}):
+            with timing.phase('compose.remove_service'):
+                docker_manager.remove_shared_service(rule_name)
+    if reload and removed:
+        reload_udev_rules(removed)
@@ -1 +1,16 @@
+from .resource_profile import *
 from .docker_creator import *
+from .shared_compose import *
+
+# the engine api client needs http.client, which loads ssl and email, the bulk start and the reconciler need
+# asyncio. They are imported on first use, so commands that only write compose files do not pay for them.
+_LAZY_MODULES = ('engine_client', 'bulk_starter', 'reconciler')
+
+
+def __getattr__(name):
+    import importlib
+    for module_name in _LAZY_MODULES:
+        module = importlib.import_module(f'{__name__}.{module_name}')
+        if hasattr(module, name):
+            return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
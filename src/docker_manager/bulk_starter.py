@@ -0,0 +1,265 @@
+import asyncio
+import os
+import re
+import shlex
+import subprocess
+import time
+from dataclasses import dataclass, field
+from typing import AnyStr, Awaitable, Callable, Optional
+from .docker_creator import BOOT_MARKER, create_start_command
+from .shared_compose import split_compose_sections
+
+# matches the start commands of create_start_command, also within the shell commands of the standby rules
+_START_COMMAND_PATTERN = re.compile(r'compose -f (\S+) up -d(?: ([^\s\';|&]+))?')
+_PORT_PATTERN = re.compile(r'^\s*- "?(\d+):80"?\s*$', re.MULTILINE)
+
+
+@dataclass
+class StartTarget:
+    """Class for an octoprint instance to be started by bulk_start"""
+    name: AnyStr
+    compose_file: AnyStr
+    service: Optional[AnyStr] = None
+    port: Optional[int] = None
+    priority: int = 0
+
+
+@dataclass
+class StartResult:
+    """Class for the outcome of starting one instance, all times are seconds since the bulk start began"""
+    name: AnyStr
+    exit_code: int
+    started: float = 0.0
+    finished: float = 0.0
+    ready: Optional[float] = None
+    errors: list = field(default_factory=list)
+
+    @property
+    def time_to_ready(self) -> Optional[float]:
+        """Seconds from the bulk start until the instance answered, None if it did not become ready"""
+        return self.ready
+
+
+def mark_boot_started(marker: AnyStr = BOOT_MARKER):
+    """Creates the marker which enables the guarded start commands of the udev rules (see create_boot_guarded_command).
+    It is created before the connected printers are enumerated, so a printer connected during the boot start is
+    either started by the boot start or by its udev rule.
+
+    Args:
+        marker: file enabling the start commands
+    """
+    os.makedirs(os.path.dirname(marker), mode=0o755, exist_ok=True)
+    with open(marker, 'a'):
+        pass
+
+
+def parse_start_command(command: AnyStr) -> Optional[tuple]:
+    """Gets the compose file and service of a start command created by create_start_command
+
+    Args:
+        command: command of an udev RUN key
+
+    Returns:
+        (str, str) compose file and service (None if the whole project is started) or None if the command does not
+        start a compose project
+    """
+    match = _START_COMMAND_PATTERN.search(command)
+    if match is None:
+        return None
+    return match.group(1), match.group(2)
+
+
+def get_compose_port(content: AnyStr) -> Optional[int]:
+    """Gets the host port of the octoprint web interface from a compose service entry or file
+
+    Args:
+        content: text of the service entry (or of a compose file with a single service)
+
+    Returns:
+        port or None if no port mapping to port 80 is found
+    """
+    match = _PORT_PATTERN.search(content)
+    return int(match.group(1)) if match else None
+
+
+def read_compose_port(compose_file: AnyStr, service: Optional[AnyStr] = None) -> Optional[int]:
+    """Reads the host port of the octoprint web interface from a compose file
+
+    Args:
+        compose_file: filepath of the docker compose file
+        service: service of a shared compose project
+
+    Returns:
+        port or None if the file, the service or the port mapping does not exist
+    """
+    try:
+        with open(compose_file, 'r') as file:
+            content = file.read()
+    except OSError:
+        return None
+    if service is not None:
+        content = split_compose_sections(content)[1].get(service, '')
+    return get_compose_port(content)
+
+
+async def run_command_async(command: AnyStr) -> int:
+    """Runs a command without a shell and without blocking the event loop
+
+    Args:
+        command: command line to run
+
+    Returns:
+        exit code of the command
+    """
+    process = await asyncio.create_subprocess_exec(*shlex.split(command), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return await process.wait()
+
+
+async def run_commands_async(commands: list, concurrency: int = 4,
+                             runner: Callable[[AnyStr], Awaitable[int]] = run_command_async) -> list:
+    """Runs commands with at most `concurrency` of them at the same time
+
+    Args:
+        commands: command lines to run
+        concurrency: number of commands running at the same time
+        runner: coroutine function running a command and returning its exit code
+
+    Returns:
+        List of exit codes in the order of the commands, -1 if a command could not be run
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(command):
+        async with semaphore:
+            try:
+                return await runner(command)
+            except OSError:
+                return -1
+
+    return list(await asyncio.gather(*(run(command) for command in commands)))
+
+
+def run_commands(commands: list, concurrency: int = 4) -> list:
+    """Runs commands in parallel, see run_commands_async
+
+    Args:
+        commands: command lines to run
+        concurrency: number of commands running at the same time
+
+    Returns:
+        List of exit codes in the order of the commands
+    """
+    if not commands:
+        return []
+    return asyncio.run(run_commands_async(commands, concurrency))
+
+
+async def check_http_ready(port: int, host: AnyStr = '127.0.0.1', timeout: float = 2.0) -> bool:
+    """Checks if a web server answers on a port
+
+    Args:
+        port: port of the web server
+        host: host of the web server
+        timeout: seconds to wait for the connection and the status line
+
+    Returns:
+        True if a HTTP status line was received
+    """
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    try:
+        writer.write(b'GET / HTTP/1.0\r\nHost: localhost\r\n\r\n')
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        return status_line.startswith(b'HTTP/')
+    except (OSError, asyncio.TimeoutError):
+        return False
+    finally:
+        writer.close()
+
+
+async def wait_until_ready(port: int, ready_timeout: float, interval: float = 0.5,
+                           check: Callable[[int], Awaitable[bool]] = check_http_ready) -> bool:
+    """Polls the web interface of an instance until it answers
+
+    Args:
+        port: port of the web interface
+        ready_timeout: seconds to wait at most
+        interval: seconds between two checks
+        check: readiness check
+
+    Returns:
+        True if the instance became ready within the timeout
+    """
+    deadline = time.monotonic() + ready_timeout
+    while True:
+        if await check(port):
+            return True
+        if time.monotonic() + interval > deadline:
+            return False
+        await asyncio.sleep(interval)
+
+
+async def bulk_start_async(targets: list, concurrency: int = 3, ready_timeout: float = 120,
+                           runner: Callable[[AnyStr], Awaitable[int]] = run_command_async,
+                           wait_ready: Callable[[int, float], Awaitable[bool]] = wait_until_ready,
+                           clock: Callable[[], float] = time.monotonic) -> list:
+    """Starts the instances with at most `concurrency` of them starting at the same time.
+    An instance occupies its slot until its web interface answers (or the ready timeout elapsed), since starting
+    octoprint itself, not docker compose, is what competes for the disk. Instances with a higher priority are
+    started first, instances with the same priority in the given order.
+
+    Args:
+        targets: list of StartTarget objects
+        concurrency: number of instances starting at the same time
+        ready_timeout: seconds to wait for an instance to become ready
+        runner: coroutine function running a command and returning its exit code
+        wait_ready: coroutine function waiting for the web interface of a port
+        clock: monotonic clock
+
+    Returns:
+        List of StartResult objects in start order
+    """
+    origin = clock()
+    queue = asyncio.PriorityQueue()
+    for position, target in enumerate(targets):
+        queue.put_nowait((-target.priority, position, target))
+    results = []
+
+    async def worker():
+        while not queue.empty():
+            _, _, target = queue.get_nowait()
+            result = StartResult(target.name, -1, clock() - origin)
+            results.append(result)
+            try:
+                result.exit_code = await runner(create_start_command(target.compose_file, target.service))
+            except OSError as error:
+                result.errors.append(str(error))
+            result.finished = clock() - origin
+            if result.exit_code != 0:
+                continue
+            if target.port is None:
+                result.ready = result.finished
+            elif await wait_ready(target.port, ready_timeout):
+                result.ready = clock() - origin
+            else:
+                result.errors.append(f"not ready after {ready_timeout:g} s")
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(targets))))))
+    return results
+
+
+def bulk_start(targets: list, concurrency: int = 3, ready_timeout: float = 120) -> list:
+    """Starts the instances with a concurrency limit, see bulk_start_async
+
+    Args:
+        targets: list of StartTarget objects
+        concurrency: number of instances starting at the same time
+        ready_timeout: seconds to wait for an instance to become ready
+
+    Returns:
+        List of StartResult objects in start order
+    """
+    return asyncio.run(bulk_start_async(targets, concurrency, ready_timeout))
@@ -1,56 +1,203 @@
 from typing import AnyStr, TextIO, Optional
 import os
+from .resource_profile import ResourceProfile, create_resource_config
 
+# created by the boot start, guarded start commands of udev rules (add --boot-guard) do nothing until it exists
+BOOT_MARKER = '/run/octodocker/booted'
 
-def write_docker_compose(port: int, device: AnyStr, file_object: TextIO):
+
+def create_octoprint_service(service: AnyStr, port: int, device: AnyStr, volume: AnyStr, standby_timeout: Optional[int] = None, resources: Optional[ResourceProfile] = None) -> AnyStr:
+    """Creates the entry of an octoprint service for the services section of a docker compose file
+
+    Args:
+        service: name of the service
+        port: port under which octoprint should be accessible
+        device: device name (name in /dev) of the 3d printer for octoprint to connect to
+        volume: name of the volume holding the octoprint data
+        standby_timeout: seconds a disconnected printer's container stays paused before it is stopped.
+            Stored as a label of the service, None if the container is stopped right away.
+        resources: cpu, memory and block io limits of the container
+
+    Returns:
+        service entry indented for the services section
+    """
+    labels = ""
+    if standby_timeout is not None:
+        labels = ("    labels:\n"
+                  f"      octodocker.standby-timeout: \"{standby_timeout}\"\n")
+
+    return (f"  {service}:\n"
+            "    image: octoprint/octoprint\n"
+            "    restart: unless-stopped\n"
+            f"{create_resource_config(resources)}"
+            f"{labels}"
+            "    ports:\n"
+            f"      - {port}:80\n"
+            "    devices:\n"
+            f"      - /dev/{device}:/dev/ttyUSB0\n"
+            "    volumes:\n"
+            f"      - {volume}:/octoprint\n")
+
+
+def write_docker_compose(port: int, device: AnyStr, file_object: TextIO, standby_timeout: Optional[int] = None, resources: Optional[ResourceProfile] = None):
     """Writes an octoprint docker compose configuration to the given file object
 
     Args:
         port: port under which octoprint should be accessible
         device: device name (name in /dev) of the 3d printer for octoprint to connect to
         file_object: file object to write to
+        standby_timeout: seconds a disconnected printer's container stays paused before it is stopped.
+            Stored as a label of the service, None if the container is stopped right away.
+        resources: cpu, memory and block io limits of the container
     """
     file_object.write("version: '2.4'\n"
                       f"name: {device}\n\n"
                       "services:\n"
-                      "  octoprint:\n"
-                      "    image: octoprint/octoprint\n"
-                      "    restart: unless-stopped\n"
-                      "    ports:\n"
-                      f"      - {port}:80\n"
-                      "    devices:\n"
-                      f"      - /dev/{device}:/dev/ttyUSB0\n"
-                      "    volumes:\n"
-                      "      - octoprint:/octoprint\n\n"
+                      f"{create_octoprint_service('octoprint', port, device, 'octoprint', standby_timeout, resources)}\n"
                       "volumes:\n"
                       "  octoprint:\n")
 
 
-def create_start_command(filepath_compose: AnyStr) -> AnyStr:
+def _append_service(command: AnyStr, service: Optional[AnyStr]) -> AnyStr:
+    return command if service is None else f"{command} {service}"
+
+
+def create_start_command(filepath_compose: AnyStr, service: Optional[AnyStr] = None) -> AnyStr:
     """Creates a start(up) command for a docker compose file
 
     Args:
         filepath_compose: filepath of the docker-compose.yml to start
+        service: only start this service of a shared compose project
 
     Returns:
         docker compose up command for the specified file
     """
-    return f"/usr/bin/docker compose -f {filepath_compose} up -d"
+    return _append_service(f"/usr/bin/docker compose -f {filepath_compose} up -d", service)
+
+
+def create_prepare_command(filepath_compose: AnyStr, service: Optional[AnyStr] = None) -> AnyStr:
+    """Creates a command pulling the image if it is missing and creating the container, network and volume of a
+    docker compose file without starting them
 
+    Args:
+        filepath_compose: filepath of the docker-compose.yml to prepare
+        service: only prepare this service of a shared compose project
+
+    Returns:
+        docker compose create command for the specified file
+    """
+    return _append_service(f"/usr/bin/docker compose -f {filepath_compose} create --pull missing", service)
 
-def create_stop_command(filepath_compose: AnyStr) -> AnyStr:
+
+def create_stop_command(filepath_compose: AnyStr, service: Optional[AnyStr] = None) -> AnyStr:
     """Creates a stop command for a docker compose file
 
     Args:
         filepath_compose: filepath of the docker-compose.yml to stop
+        service: only stop this service of a shared compose project
 
     Returns:
         docker compose stop command for the specified file
     """
-    return f"/usr/bin/docker compose -f {filepath_compose} stop"
+    return _append_service(f"/usr/bin/docker compose -f {filepath_compose} stop", service)
+
+
+def create_pause_command(filepath_compose: AnyStr, service: Optional[AnyStr] = None) -> AnyStr:
+    """Creates a pause command for a docker compose file, which freezes the processes of the container
+
+    Args:
+        filepath_compose: filepath of the docker-compose.yml to pause
+        service: only pause this service of a shared compose project
+
+    Returns:
+        docker compose pause command for the specified file
+    """
+    return _append_service(f"/usr/bin/docker compose -f {filepath_compose} pause", service)
+
+
+def create_unpause_command(filepath_compose: AnyStr, service: Optional[AnyStr] = None) -> AnyStr:
+    """Creates an unpause command for a docker compose file
+
+    Args:
+        filepath_compose: filepath of the docker-compose.yml to unpause
+        service: only unpause this service of a shared compose project
+
+    Returns:
+        docker compose unpause command for the specified file
+    """
+    return _append_service(f"/usr/bin/docker compose -f {filepath_compose} unpause", service)
+
+
+def create_boot_guarded_command(command: AnyStr, marker: AnyStr = BOOT_MARKER) -> AnyStr:
+    """Creates an udev RUN command which only runs once the boot start ('octodocker start --boot') created the
+    marker. /run is empty after a reboot, so the add events udev replays for every printer at boot do not start
+    all containers at once, the boot start starts them with a limited concurrency instead.
+
+    Args:
+        command: start command, a single program or a '/bin/sh -c' command
+        marker: file created by the boot start
+
+    Returns:
+        shell command for an udev RUN key
+    """
+    guard = f"test -e {marker} || exit 0; "
+    prefix = "/bin/sh -c '"
+    if command.startswith(prefix):
+        return f"{prefix}{guard}{command[len(prefix):]}"
+    return f"{prefix}{guard}{command}'"
+
+
+def get_standby_unit(device: AnyStr) -> AnyStr:
+    """Gets the name of the transient systemd unit stopping a paused container after the standby timeout
+
+    Args:
+        device: device name (name in /dev) of the 3d printer
+
+    Returns:
+        unit name without suffix
+    """
+    return f"octodocker-standby-{device}"
+
+
+def create_standby_start_command(filepath_compose: AnyStr, device: AnyStr, service: Optional[AnyStr] = None) -> AnyStr:
+    """Creates the start command of a container with warm standby.
+    The pending standby stop (timer and a stop already running) is cancelled and the paused container is thawed.
+    If it is not paused (e.g. it was already stopped after the timeout), it is started normally.
+
+    Args:
+        filepath_compose: filepath of the docker-compose.yml to start
+        device: device name (name in /dev) of the 3d printer
+        service: only start this service of a shared compose project
+
+    Returns:
+        shell command for an udev RUN key
+    """
+    unit = get_standby_unit(device)
+    return (f"/bin/sh -c '/usr/bin/systemctl stop {unit}.timer {unit}.service; "
+            f"{create_unpause_command(filepath_compose, service)} || {create_start_command(filepath_compose, service)}'")
+
+
+def create_standby_stop_command(filepath_compose: AnyStr, device: AnyStr, standby_timeout: int, service: Optional[AnyStr] = None) -> AnyStr:
+    """Creates the stop command of a container with warm standby.
+    The container is paused, which freezes its cgroup but keeps octoprint loaded, and a transient systemd timer
+    stops it once the standby timeout elapsed. The units are collected even if the stop failed, so the unit name
+    can be used again by the next disconnect.
+
+    Args:
+        filepath_compose: filepath of the docker-compose.yml to stop
+        device: device name (name in /dev) of the 3d printer
+        standby_timeout: seconds the container stays paused before it is stopped
+        service: only stop this service of a shared compose project
+
+    Returns:
+        shell command for an udev RUN key
+    """
+    return (f"/bin/sh -c '{create_pause_command(filepath_compose, service)} && "
+            f"/usr/bin/systemd-run --collect --unit={get_standby_unit(device)} --on-active={standby_timeout} "
+            f"{create_stop_command(filepath_compose, service)}'")
 
 
-def create_docker_compose(port: int, device: AnyStr, filepath: Optional[AnyStr] = None) -> AnyStr:
+def create_docker_compose(port: int, device: AnyStr, filepath: Optional[AnyStr] = None, standby_timeout: Optional[int] = None, resources: Optional[ResourceProfile] = None) -> AnyStr:
     """Creates a new docker compose file for an octoprint instance
     If no filepath is specified, a file called docker-compose.device_name.yml will be created
     under src/docker_manager/docker_files/.
@@ -59,6 +206,8 @@ def create_docker_compose(port: int, device: AnyStr, filepath: Optional[AnyStr]
         port: port under which the octoprint container should be accessible
         device: device name (name in /dev) of the 3d printer for octoprint to connect to
         filepath: filepath to save the file to.
+        standby_timeout: seconds a disconnected printer's container stays paused before it is stopped
+        resources: cpu, memory and block io limits of the container
 
     Returns:
         absolute file path of the newly created file
@@ -73,6 +222,6 @@ def create_docker_compose(port: int, device: AnyStr, filepath: Optional[AnyStr]
         filepath = os.path.join(directory, "docker_files", f"docker-compose.{device}.yml")
 
     with open(filepath, 'w+') as file:
-        write_docker_compose(port, device, file)
+        write_docker_compose(port, device, file, standby_timeout, resources)
 
     return filepath
@@ -0,0 +1,248 @@
+import http.client
+import json
+import socket
+from typing import AnyStr, Optional
+from urllib.parse import quote, urlencode
+from .shared_compose import SHARED_PROJECT_NAME, get_service_name
+
+DEFAULT_SOCKET_PATH = '/var/run/docker.sock'
+DEFAULT_API_VERSION = 'v1.41'
+OCTOPRINT_IMAGE = 'octoprint/octoprint'
+
+
+class DockerEngineError(Exception):
+    """Error returned by the docker engine api"""
+
+    def __init__(self, status: int, message: AnyStr):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a unix domain socket"""
+
+    def __init__(self, socket_path: AnyStr, timeout: Optional[float] = None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+def get_project_name(device: AnyStr) -> AnyStr:
+    """Gets the docker compose project name of a device, compose only accepts lower case project names
+
+    Args:
+        device: device name (name in /dev) of the 3d printer
+
+    Returns:
+        project name
+    """
+    return device.lower()
+
+
+def get_container_name(device: AnyStr, shared: bool = False) -> AnyStr:
+    """Gets the name docker compose uses for the octoprint container of a device
+
+    Args:
+        device: device name (name in /dev) of the 3d printer
+        shared: the container is a service of the shared compose project
+
+    Returns:
+        container name
+    """
+    if shared:
+        return f"{SHARED_PROJECT_NAME}-{get_service_name(device)}-1"
+    return f"{get_project_name(device)}-octoprint-1"
+
+
+class DockerEngineClient:
+    """Small client for the docker engine api.
+    The client keeps one HTTP connection to the docker socket open, so consecutive requests do not pay for a new
+    connection or docker process. A connection closed by the daemon is reopened once per request."""
+
+    def __init__(self, socket_path: AnyStr = DEFAULT_SOCKET_PATH, api_version: AnyStr = DEFAULT_API_VERSION, timeout: Optional[float] = 60):
+        self.socket_path = socket_path
+        self.api_version = api_version
+        self.timeout = timeout
+        self._connection = None
+
+    def close(self):
+        """Closes the connection to the docker socket"""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _get_connection(self) -> UnixHTTPConnection:
+        if self._connection is None:
+            self._connection = UnixHTTPConnection(self.socket_path, self.timeout)
+        return self._connection
+
+    def request(self, method: AnyStr, path: AnyStr, body: Optional[dict] = None, query: Optional[dict] = None) -> (int, object):
+        """Sends a request to the engine api
+
+        Args:
+            method: HTTP method
+            path: api path without the version prefix (e.g. /containers/json)
+            body: json body of the request
+            query: query parameters of the request
+
+        Returns:
+            (int, object) HTTP status and decoded json response (None for empty responses)
+        """
+        url = f"/{self.api_version}{path}"
+        if query:
+            url += f"?{urlencode(query)}"
+        headers = {'Host': 'docker'}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+
+        for attempt in range(2):
+            connection = self._get_connection()
+            try:
+                connection.request(method, url, body=data, headers=headers)
+                response = connection.getresponse()
+                content = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self.close()
+                if attempt == 1:
+                    raise
+
+        if response.will_close:
+            self.close()
+
+        if not content:
+            return response.status, None
+        if 'json' in response.getheader('Content-Type', ''):
+            return response.status, json.loads(content)
+        return response.status, content.decode(errors='replace')
+
+    def _check(self, status: int, content: object, accepted: tuple):
+        if status not in accepted:
+            message = content.get('message', '') if isinstance(content, dict) else str(content or '')
+            raise DockerEngineError(status, message)
+
+    def start_container(self, name: AnyStr) -> bool:
+        """Starts a container
+
+        Args:
+            name: name or id of the container
+
+        Returns:
+            False if the container was already running
+
+        Raises:
+            DockerEngineError: if the container could not be started
+        """
+        status, content = self.request('POST', f'/containers/{quote(name)}/start')
+        self._check(status, content, (204, 304))
+        return status == 204
+
+    def stop_container(self, name: AnyStr, timeout: Optional[int] = None) -> bool:
+        """Stops a container
+
+        Args:
+            name: name or id of the container
+            timeout: seconds to wait before the container is killed
+
+        Returns:
+            False if the container was already stopped
+
+        Raises:
+            DockerEngineError: if the container could not be stopped
+        """
+        query = {'t': timeout} if timeout is not None else None
+        status, content = self.request('POST', f'/containers/{quote(name)}/stop', query=query)
+        self._check(status, content, (204, 304))
+        return status == 204
+
+    def pause_container(self, name: AnyStr):
+        """Pauses (freezes) all processes of a running container
+
+        Args:
+            name: name or id of the container
+
+        Raises:
+            DockerEngineError: if the container could not be paused (e.g. it is not running)
+        """
+        status, content = self.request('POST', f'/containers/{quote(name)}/pause')
+        self._check(status, content, (204,))
+
+    def unpause_container(self, name: AnyStr):
+        """Unpauses (thaws) a paused container
+
+        Args:
+            name: name or id of the container
+
+        Raises:
+            DockerEngineError: if the container could not be unpaused (e.g. it is not paused)
+        """
+        status, content = self.request('POST', f'/containers/{quote(name)}/unpause')
+        self._check(status, content, (204,))
+
+    def inspect_container(self, name: AnyStr) -> Optional[dict]:
+        """Gets the low level information of a container
+
+        Args:
+            name: name or id of the container
+
+        Returns:
+            dictionary as returned by the engine api or None if the container does not exist
+        """
+        status, content = self.request('GET', f'/containers/{quote(name)}/json')
+        if status == 404:
+            return None
+        self._check(status, content, (200,))
+        return content
+
+    def list_containers(self, labels: Optional[list] = None, all_containers: bool = True) -> list:
+        """Lists the containers with one request
+
+        Args:
+            labels: only list containers with these labels ('key' or 'key=value')
+            all_containers: also list containers that are not running
+
+        Returns:
+            List of container summaries as returned by the engine api (Id, Names, State, Labels, ...)
+
+        Raises:
+            DockerEngineError: if the containers could not be listed
+        """
+        query = {'all': int(all_containers)}
+        if labels:
+            query['filters'] = json.dumps({'label': labels})
+        status, content = self.request('GET', '/containers/json', query=query)
+        self._check(status, content, (200,))
+        return content
+
+    def inspect_image(self, name: AnyStr) -> Optional[dict]:
+        """Gets the low level information of an image
+
+        Args:
+            name: name or id of the image (e.g. octoprint/octoprint)
+
+        Returns:
+            dictionary as returned by the engine api or None if the image is not present
+        """
+        status, content = self.request('GET', f'/images/{quote(name)}/json')
+        if status == 404:
+            return None
+        self._check(status, content, (200,))
+        return content
@@ -0,0 +1,133 @@
+import fcntl
+import os
+from dataclasses import dataclass
+from typing import AnyStr, Optional, TextIO
+from .bulk_starter import StartTarget, run_commands
+from .docker_creator import create_start_command, create_stop_command, create_unpause_command
+from .engine_client import get_project_name
+from .shared_compose import SHARED_PROJECT_NAME
+
+PROJECT_LABEL = 'com.docker.compose.project'
+SERVICE_LABEL = 'com.docker.compose.service'
+STANDBY_LABEL = 'octodocker.standby-timeout'
+RUNTIME_DIR = '/run/octodocker'
+
+
+@dataclass
+class ReconcileAction:
+    """Class for a docker compose command converging the container of a printer to the state of the printer"""
+    name: AnyStr
+    action: AnyStr
+    command: AnyStr
+    state: AnyStr
+
+
+def get_container_key(target: StartTarget) -> tuple:
+    """Gets the compose project and service of the container of a target
+
+    Args:
+        target: compose file and service of a printer
+
+    Returns:
+        (str, str) values of the compose project and service labels
+    """
+    if target.service is not None:
+        return SHARED_PROJECT_NAME, target.service
+    return get_project_name(target.name), 'octoprint'
+
+
+def index_containers(containers: list) -> dict:
+    """Indexes container summaries of the engine api by their compose project and service
+
+    Args:
+        containers: container summaries as returned by DockerEngineClient.list_containers
+
+    Returns:
+        (project, service) -> container summary
+    """
+    index = {}
+    for container in containers:
+        labels = container.get('Labels') or {}
+        if PROJECT_LABEL in labels and SERVICE_LABEL in labels:
+            index[(labels[PROJECT_LABEL], labels[SERVICE_LABEL])] = container
+    return index
+
+
+def plan_reconcile(targets: list, connected: set, containers: dict) -> list:
+    """Compares the state of each printer with the state of its container.
+    Containers of connected printers have to run, containers of disconnected printers have to be stopped. Paused
+    containers of disconnected printers are left alone if they were created with a standby timeout, since their
+    standby stop is still pending.
+
+    Args:
+        targets: list of StartTarget objects of all rules
+        connected: (compose file, service) of the targets whose printer is connected
+        containers: containers as returned by index_containers
+
+    Returns:
+        List of ReconcileAction objects, empty if every container is in its expected state
+    """
+    actions = []
+    for target in targets:
+        container = containers.get(get_container_key(target))
+        state = container.get('State', 'unknown') if container else 'missing'
+        standby = container is not None and STANDBY_LABEL in (container.get('Labels') or {})
+
+        if (target.compose_file, target.service) in connected:
+            if state == 'paused':
+                actions.append(ReconcileAction(target.name, 'unpause', create_unpause_command(target.compose_file, target.service), state))
+            elif state not in ('running', 'restarting'):
+                actions.append(ReconcileAction(target.name, 'start', create_start_command(target.compose_file, target.service), state))
+        elif state in ('running', 'restarting') or (state == 'paused' and not standby):
+            actions.append(ReconcileAction(target.name, 'stop', create_stop_command(target.compose_file, target.service), state))
+    return actions
+
+
+def run_actions(actions: list, concurrency: int = 4) -> list:
+    """Runs the commands of the actions in parallel, see run_commands_async
+
+    Args:
+        actions: list of ReconcileAction objects
+        concurrency: number of commands running at the same time
+
+    Returns:
+        List of exit codes in the order of the actions
+    """
+    return run_commands([action.command for action in actions], concurrency)
+
+
+def get_reconcile_lock_filepath() -> AnyStr:
+    """Gets the lock file preventing overlapping reconcile runs.
+    Root uses /run/octodocker/reconcile.lock, other users $XDG_RUNTIME_DIR/octodocker-reconcile.lock or
+    /run/user/<uid>/octodocker-reconcile.lock. These directories can only be written by their owner.
+
+    Returns:
+        path of the lock file
+    """
+    if os.getuid() == 0:
+        return os.path.join(RUNTIME_DIR, 'reconcile.lock')
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or f'/run/user/{os.getuid()}'
+    return os.path.join(runtime_dir, 'octodocker-reconcile.lock')
+
+
+def acquire_reconcile_lock(filepath: Optional[AnyStr] = None) -> Optional[TextIO]:
+    """Locks the reconcile lock file without waiting.
+    The file is created with mode 0600 and a symlink in its place is not followed.
+
+    Args:
+        filepath: path of the lock file, defaults to get_reconcile_lock_filepath()
+
+    Returns:
+        the open lock file, which holds the lock until it is closed, or None if another run holds the lock
+    """
+    if filepath is None:
+        filepath = get_reconcile_lock_filepath()
+        if os.getuid() == 0:
+            os.makedirs(RUNTIME_DIR, mode=0o755, exist_ok=True)
+    lock_file = os.fdopen(os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_NOFOLLOW | os.O_CLOEXEC, 0o600), 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
@@ -0,0 +1,236 @@
+import json
+import os
+import re
+from dataclasses import dataclass, fields, replace
+from typing import AnyStr, Optional
+
+# minimum memory limit accepted by docker
+MIN_MEMORY = 6 * 1024 * 1024
+_MEMORY_PATTERN = re.compile(r'^(\d+(?:\.\d+)?)\s*([bkmg]?)b?$', re.IGNORECASE)
+_MEMORY_UNITS = {'': 1, 'b': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}
+
+
+@dataclass
+class ResourceProfile:
+    """Class for the resource limits of an octoprint container, unset limits are not written"""
+    cpus: Optional[float] = None
+    mem_limit: Optional[AnyStr] = None
+    cpuset: Optional[AnyStr] = None
+    cpu_shares: Optional[int] = None
+    blkio_weight: Optional[int] = None
+
+    @property
+    def is_empty(self) -> bool:
+        """True if no limit is set"""
+        return all(getattr(self, profile_field.name) is None for profile_field in fields(self))
+
+
+RESOURCE_FIELDS = tuple(profile_field.name for profile_field in fields(ResourceProfile))
+
+
+def get_resource_defaults_filepath() -> AnyStr:
+    """Gets the filepath of the default resource profile.
+    Uses $XDG_CONFIG_HOME/octodocker/resources.json and falls back to ~/.config/octodocker/resources.json.
+
+    Returns:
+        filepath of the defaults file
+    """
+    base = os.environ.get('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser('~'), '.config')
+    return os.path.join(base, 'octodocker', 'resources.json')
+
+
+def parse_memory(value: AnyStr) -> int:
+    """Converts a docker memory value (e.g. 512m, 2g, 1048576) into bytes
+
+    Args:
+        value: memory value with an optional b, k, m or g unit
+
+    Returns:
+        number of bytes
+
+    Raises:
+        ValueError: if the value is not a valid memory value
+    """
+    match = _MEMORY_PATTERN.match(str(value).strip())
+    if match is None:
+        raise ValueError(f"mem_limit '{value}' is not a valid memory value (e.g. 512m or 2g)")
+    return int(float(match.group(1)) * _MEMORY_UNITS[match.group(2).lower()])
+
+
+def parse_cpuset(value: AnyStr) -> set:
+    """Converts a cpuset (e.g. 0-2,4) into the set of its cores
+
+    Args:
+        value: comma separated cores and core ranges
+
+    Returns:
+        set of core numbers
+
+    Raises:
+        ValueError: if the value is not a valid cpuset
+    """
+    cores = set()
+    for part in str(value).split(','):
+        first, _, last = part.strip().partition('-')
+        if not first.isdigit() or (last and not last.isdigit()):
+            raise ValueError(f"cpuset '{value}' is not a valid list of cores (e.g. 0-2,4)")
+        first, last = int(first), int(last or first)
+        if last < first:
+            raise ValueError(f"cpuset '{value}' contains the descending range {first}-{last}")
+        cores.update(range(first, last + 1))
+    return cores
+
+
+def get_host_resources() -> (int, Optional[int]):
+    """Gets the number of cores and the physical memory of the host
+
+    Returns:
+        (int, int) number of cores and bytes of memory (None if it can not be determined)
+    """
+    try:
+        memory = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        memory = None
+    return os.cpu_count() or 1, memory
+
+
+def create_resource_profile(values: dict) -> ResourceProfile:
+    """Creates a resource profile from a dictionary of values, None values are treated as not specified
+
+    Args:
+        values: dictionary mapping the field names to their values
+
+    Returns:
+        ResourceProfile object
+
+    Raises:
+        ValueError: if the dictionary contains unknown fields or values of the wrong type
+    """
+    unknown = set(values) - set(RESOURCE_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown resource field(s) {', '.join(sorted(unknown))}")
+
+    converters = {'cpus': float, 'mem_limit': str, 'cpuset': str, 'cpu_shares': int, 'blkio_weight': int}
+    profile = {}
+    for key, value in values.items():
+        if value is None:
+            continue
+        try:
+            profile[key] = converters[key](value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{key} '{value}' is not a valid value")
+    return ResourceProfile(**profile)
+
+
+def read_resource_defaults(filepath: Optional[AnyStr] = None) -> ResourceProfile:
+    """Reads the default resource profile, a JSON object with the fields of ResourceProfile.
+    A missing default file results in an empty profile.
+
+    Args:
+        filepath: filepath of the defaults file, defaults to get_resource_defaults_filepath()
+
+    Returns:
+        ResourceProfile object
+
+    Raises:
+        ValueError: if the file is no valid JSON object or contains invalid values
+    """
+    filepath = filepath or get_resource_defaults_filepath()
+    try:
+        with open(filepath, 'r') as file:
+            values = json.load(file)
+    except FileNotFoundError:
+        return ResourceProfile()
+    except json.JSONDecodeError as error:
+        raise ValueError(f"{filepath}: invalid JSON ({error})")
+
+    if not isinstance(values, dict):
+        raise ValueError(f"{filepath}: the resource defaults have to be a JSON object")
+    return create_resource_profile(values)
+
+
+def merge_resource_profiles(defaults: ResourceProfile, overrides: ResourceProfile) -> ResourceProfile:
+    """Merges two resource profiles, the set limits of the overrides replace the defaults
+
+    Args:
+        defaults: default profile
+        overrides: profile with the limits of a single printer
+
+    Returns:
+        merged ResourceProfile object
+    """
+    changes = {key: getattr(overrides, key) for key in RESOURCE_FIELDS if getattr(overrides, key) is not None}
+    return replace(defaults, **changes)
+
+
+def validate_resource_profile(profile: ResourceProfile, cores: Optional[int] = None, memory: Optional[int] = None):
+    """Validates a resource profile against the limits of docker and the resources of the host
+
+    Args:
+        profile: profile to validate
+        cores: number of cores of the host, defaults to the cores of this host
+        memory: bytes of memory of the host, defaults to the memory of this host
+
+    Raises:
+        ValueError: if one or more limits are invalid, the message lists all of them
+    """
+    if cores is None and memory is None:
+        cores, memory = get_host_resources()
+    errors = []
+
+    if profile.cpus is not None and not 0 < profile.cpus <= (cores or profile.cpus):
+        errors.append(f"cpus has to be between 0 and the {cores} cores of the host")
+
+    if profile.mem_limit is not None:
+        try:
+            mem_limit = parse_memory(profile.mem_limit)
+            if mem_limit < MIN_MEMORY:
+                errors.append("mem_limit has to be at least 6m")
+            elif memory is not None and mem_limit > memory:
+                errors.append(f"mem_limit exceeds the {memory // 1024 ** 2}m of memory of the host")
+        except ValueError as error:
+            errors.append(str(error))
+
+    if profile.cpuset is not None:
+        try:
+            highest = max(parse_cpuset(profile.cpuset))
+            if cores is not None and highest >= cores:
+                errors.append(f"cpuset uses core {highest}, the host has {cores} cores (0-{cores - 1})")
+        except ValueError as error:
+            errors.append(str(error))
+
+    if profile.cpu_shares is not None and profile.cpu_shares < 2:
+        errors.append("cpu_shares has to be at least 2")
+
+    if profile.blkio_weight is not None and not 10 <= profile.blkio_weight <= 1000:
+        errors.append("blkio_weight has to be between 10 and 1000")
+
+    if errors:
+        raise ValueError("\n".join(errors))
+
+
+def create_resource_config(profile: Optional[ResourceProfile]) -> AnyStr:
+    """Creates the compose file (version 2.4) keys of the limits of a resource profile
+
+    Args:
+        profile: resource profile or None
+
+    Returns:
+        keys indented for a service entry, empty if no limit is set
+    """
+    if profile is None:
+        return ""
+
+    config = ""
+    if profile.cpus is not None:
+        config += f"    cpus: {profile.cpus:g}\n"
+    if profile.mem_limit is not None:
+        config += f"    mem_limit: {profile.mem_limit}\n"
+    if profile.cpuset is not None:
+        config += f"    cpuset: \"{profile.cpuset}\"\n"
+    if profile.cpu_shares is not None:
+        config += f"    cpu_shares: {profile.cpu_shares}\n"
+    if profile.blkio_weight is not None:
+        config += ("    blkio_config:\n"
+                   f"      weight: {profile.blkio_weight}\n")
+    return config
@@ -0,0 +1,184 @@
+import os
+import tempfile
+from typing import AnyStr, Optional
+from .docker_creator import create_octoprint_service
+from .resource_profile import ResourceProfile
+
+SHARED_PROJECT_NAME = 'octodocker'
+SHARED_COMPOSE_FILENAME = 'docker-compose.yml'
+
+
+def get_service_name(device: AnyStr) -> AnyStr:
+    """Gets the service name of a device in the shared compose project, compose only accepts lower case names
+
+    Args:
+        device: device name (name in /dev) of the 3d printer
+
+    Returns:
+        service name
+    """
+    return device.lower()
+
+
+def get_shared_compose_filepath() -> AnyStr:
+    """Gets the filepath of the shared compose project under src/docker_manager/docker_files/ and creates the
+    directory if necessary
+
+    Returns:
+        absolute file path of the shared docker compose file
+    """
+    directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "docker_files")
+    if not os.path.isdir(directory):
+        os.mkdir(directory)
+    return os.path.join(directory, SHARED_COMPOSE_FILENAME)
+
+
+def split_compose_sections(content: AnyStr) -> (list, dict, dict):
+    """Splits a shared docker compose file into its header and the entries of the services and volumes sections.
+    Entries are the lines from a two space indented key up to the next entry or top level key, so every entry
+    can be replaced or removed without touching the text of the others.
+
+    Args:
+        content: content of the shared docker compose file
+
+    Returns:
+        (list, dict, dict) lines of the header and the service and volume entries (name -> text)
+    """
+    header = []
+    sections = {'services': {}, 'volumes': {}}
+    section = None
+    entry = None
+
+    for line in content.splitlines(keepends=True):
+        if line.strip() == '':
+            if section is None:
+                header.append(line)
+            continue
+        if not line.startswith(' '):
+            key = line.split(':', 1)[0].strip()
+            section = sections.get(key)
+            entry = None
+            if section is None:
+                header.append(line)
+            continue
+        if section is None:
+            header.append(line)
+        elif line.startswith('  ') and not line.startswith('   '):
+            entry = line.strip().rstrip(':')
+            section[entry] = line
+        elif entry is not None:
+            section[entry] += line
+
+    return header, sections['services'], sections['volumes']
+
+
+def join_compose_sections(header: list, services: dict, volumes: dict) -> AnyStr:
+    """Joins the parts returned by split_compose_sections into the content of a docker compose file
+
+    Args:
+        header: lines of the header
+        services: service entries (name -> text)
+        volumes: volume entries (name -> text)
+
+    Returns:
+        content of the docker compose file
+    """
+    content = ''.join(header).rstrip('\n') + '\n\n'
+    content += 'services:\n' + ''.join(services.values()) + '\n'
+    content += 'volumes:\n' + ''.join(volumes.values())
+    return content
+
+
+def read_shared_compose(filepath: AnyStr) -> (list, dict, dict):
+    """Reads and splits the shared docker compose file, a missing file results in an empty project
+
+    Args:
+        filepath: filepath of the shared docker compose file
+
+    Returns:
+        (list, dict, dict) as returned by split_compose_sections
+    """
+    try:
+        with open(filepath, 'r') as file:
+            return split_compose_sections(file.read())
+    except FileNotFoundError:
+        return ["version: '2.4'\n", f"name: {SHARED_PROJECT_NAME}\n"], {}, {}
+
+
+def write_shared_compose(filepath: AnyStr, content: AnyStr):
+    """Replaces the shared docker compose file atomically, so a running compose command never reads a partial file
+
+    Args:
+        filepath: filepath of the shared docker compose file
+        content: new content of the file
+    """
+    directory = os.path.dirname(os.path.abspath(filepath))
+    file_descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix='.docker-compose.', suffix='.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'w') as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, filepath)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def add_shared_service(port: int, device: AnyStr, filepath: Optional[AnyStr] = None, standby_timeout: Optional[int] = None, resources: Optional[ResourceProfile] = None) -> AnyStr:
+    """Adds the octoprint service of a printer to the shared compose project.
+    All services of the project share the default network of the project, every service has its own volume.
+    If no filepath is specified, the file docker-compose.yml under src/docker_manager/docker_files/ is used.
+
+    Args:
+        port: port under which the octoprint container should be accessible
+        device: device name (name in /dev) of the 3d printer for octoprint to connect to
+        filepath: filepath of the shared docker compose file
+        standby_timeout: seconds a disconnected printer's container stays paused before it is stopped
+        resources: cpu, memory and block io limits of the container
+
+    Returns:
+        absolute file path of the shared docker compose file
+
+    Raises:
+        ValueError: if the project already contains a service for the device
+    """
+    if filepath is None:
+        filepath = get_shared_compose_filepath()
+
+    header, services, volumes = read_shared_compose(filepath)
+    service = get_service_name(device)
+    if service in services:
+        raise ValueError(f"Service {service} already exists in {filepath}")
+
+    services[service] = create_octoprint_service(service, port, device, service, standby_timeout, resources)
+    volumes[service] = f"  {service}:\n"
+    write_shared_compose(filepath, join_compose_sections(header, services, volumes))
+    return filepath
+
+
+def remove_shared_service(device: AnyStr, filepath: Optional[AnyStr] = None) -> bool:
+    """Removes the octoprint service of a printer and its volume entry from the shared compose project.
+    The docker volume itself is kept.
+
+    Args:
+        device: device name (name in /dev) of the 3d printer
+        filepath: filepath of the shared docker compose file
+
+    Returns:
+        True if the service was removed, False if the project does not contain it
+    """
+    if filepath is None:
+        filepath = get_shared_compose_filepath()
+    if not os.path.isfile(filepath):
+        return False
+
+    header, services, volumes = read_shared_compose(filepath)
+    service = get_service_name(device)
+    if service not in services:
+        return False
+
+    del services[service]
+    volumes.pop(service, None)
+    write_shared_compose(filepath, join_compose_sections(header, services, volumes))
+    return True
@@ -0,0 +1,134 @@
+import time
+from dataclasses import dataclass
+from typing import AnyStr, Callable, Hashable, Optional
+
+
+@dataclass
+class PendingEvent:
+    """Class for the latest event of a key that has not settled yet"""
+    state: AnyStr
+    deadline: float
+    first_received: float
+    payload: object = None
+
+
+@dataclass
+class SettledEvent:
+    """Class for an event whose settle window elapsed and that changes the state of its key"""
+    key: Hashable
+    state: AnyStr
+    first_received: float
+    payload: object = None
+
+
+@dataclass
+class CoalescerStats:
+    """Class for the event counters of an EventCoalescer"""
+    received: int = 0
+    suppressed: int = 0
+    issued: int = 0
+
+
+class EventCoalescer:
+    """Class for collapsing bursts of events per key (e.g. add/remove/add of one printer) into their final state.
+    Every event restarts the settle window of its key. Once the window elapsed without further events, the latest
+    state is issued, unless it equals the state issued last for the key. Superseded and unchanged events are counted
+    as suppressed."""
+
+    def __init__(self, settle_window: float, clock: Callable[[], float] = time.monotonic):
+        self.settle_window = settle_window
+        self.clock = clock
+        self.stats = CoalescerStats()
+        self._pending = {}
+        self._issued = {}
+
+    def submit(self, key: Hashable, state: AnyStr, payload: object = None, now: Optional[float] = None):
+        """Records an event
+
+        Args:
+            key: key the event belongs to (e.g. the printer name)
+            state: desired state after the event (e.g. the udev action)
+            payload: data handed back with the settled event
+            now: time of the event, defaults to the clock
+        """
+        now = self.clock() if now is None else now
+        self.stats.received += 1
+
+        previous = self._pending.get(key)
+        if previous is not None:
+            self.stats.suppressed += 1
+        first_received = previous.first_received if previous is not None else now
+        self._pending[key] = PendingEvent(state, now + self.settle_window, first_received, payload)
+
+    def next_deadline(self) -> Optional[float]:
+        """Gets the time the next pending event settles
+
+        Returns:
+            deadline or None if no events are pending
+        """
+        if not self._pending:
+            return None
+        return min(event.deadline for event in self._pending.values())
+
+    def time_until_next(self, now: Optional[float] = None) -> Optional[float]:
+        """Gets the time until the next pending event settles
+
+        Args:
+            now: current time, defaults to the clock
+
+        Returns:
+            seconds (at least 0) or None if no events are pending
+        """
+        deadline = self.next_deadline()
+        if deadline is None:
+            return None
+        now = self.clock() if now is None else now
+        return max(0.0, deadline - now)
+
+    def pop_settled(self, now: Optional[float] = None) -> list:
+        """Removes all events whose settle window elapsed
+
+        Args:
+            now: current time, defaults to the clock
+
+        Returns:
+            List of SettledEvent objects for the keys whose state changed
+        """
+        now = self.clock() if now is None else now
+        settled = []
+        for key in [key for key, event in self._pending.items() if event.deadline <= now]:
+            event = self._pending.pop(key)
+            if self._issued.get(key) == event.state:
+                self.stats.suppressed += 1
+                continue
+            self._issued[key] = event.state
+            self.stats.issued += 1
+            settled.append(SettledEvent(key, event.state, event.first_received, event.payload))
+        return settled
+
+
+def replay_events(coalescer: EventCoalescer, events: list) -> list:
+    """Replays recorded events through a coalescer using their timestamps instead of the clock.
+    Settled events are collected at their deadlines, all remaining events are settled after the last event.
+
+    Args:
+        coalescer: coalescer to use
+        events: list of (time, key, state) tuples sorted by time
+
+    Returns:
+        List of (time, key, state) tuples of the issued events
+    """
+    issued = []
+
+    def collect(until: float):
+        while True:
+            deadline = coalescer.next_deadline()
+            if deadline is None or deadline > until:
+                return
+            issued.extend((deadline, event.key, event.state) for event in coalescer.pop_settled(deadline))
+
+    for timestamp, key, state in events:
+        collect(timestamp)
+        coalescer.submit(key, state, now=timestamp)
+    collect(float('inf'))
+    return issued
@@ -0,0 +1,329 @@
+import collections
+import shlex
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import AnyStr, Callable, Optional
+import udev_manager
+import docker_manager
+import timing
+from event_coalescer import EventCoalescer
+
+
+def run_command(command: AnyStr) -> int:
+    """Runs a command without a shell
+
+    Args:
+        command: command line to run
+
+    Returns:
+        exit code of the command
+    """
+    return subprocess.run(shlex.split(command), stdout=subprocess.DEVNULL).returncode
+
+
+def create_event_device_data(device) -> udev_manager.DeviceData:
+    """Creates the DeviceData object of an udev event from its properties.
+    The devpath is not resolved, since the parent devices of a remove event are already gone.
+
+    Args:
+        device: pyudev device of the event
+
+    Returns:
+        DeviceData object
+    """
+    return udev_manager.DeviceData(device.get("ID_PATH", None), device.get("ID_VENDOR_ID", None),
+                                   device.get("ID_MODEL_ID", None), device.get("ID_SERIAL", None), None,
+                                   device.get("ID_SERIAL_SHORT", None))
+
+
+class HotplugDaemon:
+    """Class for starting and stopping the octoprint containers on tty add and remove events.
+    The events are matched against the rules created with the OCTODOCKER_COMPOSE marker. The docker commands run
+    on a worker pool, so slow container starts neither block the event loop nor udevd. The actions of each printer
+    are queued and run one after another in the order of the events, printers do not wait for each other.
+    Events are coalesced per printer: a burst of add and remove events within the settle window results in at most
+    one start or stop for the final state.
+    Rules with a standby timeout (OCTODOCKER_STANDBY) pause the container on disconnect and stop it once the timeout
+    elapsed without a reconnect, so a reconnect within the timeout only has to unpause it. Every dispatched event
+    starts a new generation of its printer, a pause only schedules the standby stop and the standby stop only runs
+    if no later event of the printer was dispatched in the meantime.
+    If a docker socket is given, existing containers are started and stopped through the engine api with one
+    persistent connection per worker instead of a docker compose process.
+    Rules with a service (OCTODOCKER_SERVICE) belong to the shared compose project, only their service is started
+    or stopped."""
+
+    def __init__(self, rule_filepath: AnyStr, max_workers: int = 4, runner: Callable[[AnyStr], int] = run_command,
+                 socket_path: Optional[AnyStr] = None, settle_window: float = 0.5):
+        self.rule_filepath = rule_filepath
+        self.coalescer = EventCoalescer(settle_window)
+        self.runner = runner
+        self.socket_path = socket_path
+        self._clients = threading.local()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._queues = {}
+        self._generations = {}
+        self._locks_lock = threading.Lock()
+        self._standby_timers = {}
+
+    def find_rule(self, device_data: udev_manager.DeviceData) -> Optional[udev_manager.Rule]:
+        """Finds the rule of the device, the parsed rule file is reused as long as the file is unchanged
+
+        Args:
+            device_data: device data of the event
+
+        Returns:
+            Rule with a docker compose file or None
+        """
+        return udev_manager.find_compose_rule(udev_manager.load_rule_file(self.rule_filepath), device_data)
+
+    def handle_event(self, action: AnyStr, device, received: Optional[float] = None) -> list:
+        """Records an udev event for the container of its device and dispatches all settled events
+
+        Args:
+            action: udev action of the event
+            device: pyudev device of the event
+            received: time.monotonic() timestamp when the event was received
+
+        Returns:
+            List of futures of the dispatched docker commands
+        """
+        if action in ('add', 'remove'):
+            with timing.phase('rules.find'):
+                rule = self.find_rule(create_event_device_data(device))
+            if rule is not None:
+                self.coalescer.submit(rule.name, action, rule, received)
+        return self.dispatch_settled()
+
+    def dispatch_settled(self, now: Optional[float] = None) -> list:
+        """Starts or stops the containers of all printers whose events settled
+
+        Args:
+            now: current time.monotonic() timestamp
+
+        Returns:
+            List of futures of the dispatched docker commands
+        """
+        futures = []
+        for event in self.coalescer.pop_settled(now):
+            rule = event.payload
+            with self._locks_lock:
+                generation = self._generations.get(event.key, 0) + 1
+                self._generations[event.key] = generation
+            if event.state == 'add':
+                self.cancel_standby(event.key)
+                action = 'start'
+            elif rule.standby_timeout is not None:
+                action = 'pause'
+            else:
+                action = 'stop'
+            futures.append(self.submit_action(event.key, action, rule, event.first_received, generation))
+        return futures
+
+    def submit_action(self, name: AnyStr, action: AnyStr, rule: udev_manager.Rule, received: float, generation: Optional[int] = None) -> Future:
+        """Queues an action of a printer, the actions of a printer run one after another in the order they were queued
+
+        Args:
+            name: name of the printer
+            action: start, pause or stop
+            rule: rule of the printer
+            received: time.monotonic() timestamp when the event was received
+            generation: generation of the printer when the action was dispatched (see run_docker_command)
+
+        Returns:
+            Future of the latency returned by run_docker_command
+        """
+        future = Future()
+        with self._locks_lock:
+            queue = self._queues.setdefault(name, collections.deque())
+            queue.append((future, action, rule, received, generation))
+            # the running action stays in the queue, a worker is already draining a non empty queue
+            idle = len(queue) == 1
+        if idle:
+            self.executor.submit(self._drain_queue, name)
+        return future
+
+    def _drain_queue(self, name: AnyStr):
+        while True:
+            with self._locks_lock:
+                future, action, rule, received, generation = self._queues[name][0]
+            try:
+                future.set_result(self.run_docker_command(name, action, rule, received, generation))
+            except Exception as error:
+                future.set_exception(error)
+            with self._locks_lock:
+                queue = self._queues[name]
+                queue.popleft()
+                if not queue:
+                    del self._queues[name]
+                    return
+
+    def is_current(self, name: AnyStr, generation: Optional[int]) -> bool:
+        """Checks if no event of the printer was dispatched after the one of the given generation"""
+        with self._locks_lock:
+            return generation is None or self._generations.get(name, 0) == generation
+
+    def cancel_standby(self, name: AnyStr):
+        """Cancels the pending standby stop of a printer
+
+        Args:
+            name: name of the printer
+        """
+        with self._locks_lock:
+            timer = self._standby_timers.pop(name, None)
+        if timer is not None:
+            timer.cancel()
+
+    def schedule_standby_stop(self, name: AnyStr, rule: udev_manager.Rule, generation: Optional[int] = None):
+        """Stops the paused container of a printer once its standby timeout elapsed.
+        Nothing is scheduled if an event of the printer was dispatched after the pause.
+
+        Args:
+            name: name of the printer
+            rule: rule of the printer
+            generation: generation of the printer when the pause was dispatched
+        """
+        if not self.is_current(name, generation):
+            return
+
+        def expire():
+            with self._locks_lock:
+                if self._standby_timers.get(name) is not timer:
+                    return
+                del self._standby_timers[name]
+            self.submit_action(name, 'stop', rule, time.monotonic(), generation)
+
+        timer = threading.Timer(rule.standby_timeout, expire)
+        timer.daemon = True
+        with self._locks_lock:
+            previous = self._standby_timers.pop(name, None)
+            self._standby_timers[name] = timer
+        if previous is not None:
+            previous.cancel()
+        timer.start()
+
+    def get_engine_client(self) -> Optional[docker_manager.DockerEngineClient]:
+        """Gets the engine api client of the current worker thread
+
+        Returns:
+            DockerEngineClient or None if no docker socket is used
+        """
+        if self.socket_path is None:
+            return None
+        if not hasattr(self._clients, 'client'):
+            self._clients.client = docker_manager.DockerEngineClient(self.socket_path)
+        return self._clients.client
+
+    def run_engine_action(self, name: AnyStr, action: AnyStr, shared: bool = False) -> Optional[int]:
+        """Starts, pauses or stops the container of a printer through the engine api.
+        Starting a paused container unpauses it.
+
+        Args:
+            name: name of the printer
+            action: start, pause or stop
+            shared: the container is a service of the shared compose project
+
+        Returns:
+            0 on success, 1 on an api error or None if the container does not exist yet
+        """
+        client = self.get_engine_client()
+        container_name = docker_manager.get_container_name(name, shared)
+        try:
+            container = client.inspect_container(container_name)
+            if container is None:
+                return None
+            state = container.get('State', {})
+            if action == 'start' and state.get('Paused'):
+                client.unpause_container(container_name)
+            elif action == 'start':
+                client.start_container(container_name)
+            elif action == 'pause' and state.get('Running') and not state.get('Paused'):
+                client.pause_container(container_name)
+            elif action == 'stop':
+                client.stop_container(container_name)
+        except (docker_manager.DockerEngineError, OSError) as error:
+            print(f"{name}: docker engine api request failed: {error}", flush=True)
+            return 1
+        return 0
+
+    def get_commands(self, action: AnyStr, rule: udev_manager.Rule) -> list:
+        """Gets the docker compose commands of an action, each command is only run if the previous one failed
+
+        Args:
+            action: start, pause or stop
+            rule: rule of the printer
+
+        Returns:
+            List of commands
+        """
+        compose_file, service = rule.compose_file, rule.service
+        if action == 'pause':
+            return [docker_manager.create_pause_command(compose_file, service)]
+        if action == 'stop':
+            return [docker_manager.create_stop_command(compose_file, service)]
+        if rule.standby_timeout is not None:
+            return [docker_manager.create_unpause_command(compose_file, service), docker_manager.create_start_command(compose_file, service)]
+        return [docker_manager.create_start_command(compose_file, service)]
+
+    def run_docker_command(self, name: AnyStr, action: AnyStr, rule: udev_manager.Rule, received: float, generation: Optional[int] = None) -> Optional[float]:
+        """Runs the docker commands of an action and reports the time from the event until they finished.
+        Called by the queue of the printer (see submit_action).
+
+        Args:
+            name: name of the printer
+            action: start, pause or stop
+            rule: rule of the printer
+            received: time.monotonic() timestamp when the event was received
+            generation: generation of the printer when the action was dispatched. A pause schedules the standby stop
+                for this generation, a standby stop is skipped if a later event was dispatched.
+
+        Returns:
+            latency in seconds, None if a standby stop was skipped
+        """
+        if action == 'stop' and rule.standby_timeout is not None and not self.is_current(name, generation):
+            return None
+        with timing.phase(f'docker.{action}'):
+            exit_code = None
+            if self.socket_path is not None:
+                with timing.phase('docker.engine_api'):
+                    exit_code = self.run_engine_action(name, action, rule.service is not None)
+            if exit_code is None:
+                for command in self.get_commands(action, rule):
+                    with timing.phase('docker.compose'):
+                        exit_code = self.runner(command)
+                    if exit_code == 0:
+                        break
+        latency = time.monotonic() - received
+
+        state = {'start': 'running', 'pause': 'paused', 'stop': 'stopped'}[action]
+        if exit_code == 0:
+            print(f"{name}: {state} {latency * 1000:.0f} ms after the event", flush=True)
+            if action == 'pause':
+                self.schedule_standby_stop(name, rule, generation)
+        else:
+            print(f"{name}: {action} failed with exit code {exit_code}", flush=True)
+        return latency
+
+    def run(self):
+        """Listens for tty events until interrupted"""
+        import pyudev
+        context = pyudev.Context()
+        monitor = pyudev.Monitor.from_netlink(context)
+        monitor.filter_by('tty')
+        monitor.start()
+
+        print(f"Watching tty events for the rules in {self.rule_filepath}", flush=True)
+        try:
+            while True:
+                device = monitor.poll(timeout=self.coalescer.time_until_next())
+                if device is None:
+                    self.dispatch_settled()
+                else:
+                    self.handle_event(device.action, device, time.monotonic())
+        finally:
+            for name in list(self._standby_timers):
+                self.cancel_standby(name)
+            stats = self.coalescer.stats
+            print(f"{stats.received} events received, {stats.issued} commands issued, {stats.suppressed} events suppressed", flush=True)
+            self.executor.shutdown(wait=True)
@@ -0,0 +1,86 @@
+import csv
+import json
+import os
+from dataclasses import dataclass, fields
+from typing import AnyStr, Optional
+
+
+@dataclass
+class ManifestEntry:
+    """Class for a single printer entry of a manifest used to add several rules at once"""
+    name: AnyStr
+    serial: Optional[AnyStr] = None
+    path: Optional[AnyStr] = None
+    devpath: Optional[AnyStr] = None
+    vendor: Optional[AnyStr] = None
+    model: Optional[AnyStr] = None
+    port: Optional[int] = None
+
+
+MANIFEST_FIELDS = tuple(entry_field.name for entry_field in fields(ManifestEntry))
+
+
+def create_manifest_entry(values: dict, position: int) -> ManifestEntry:
+    """Creates a manifest entry from a dictionary of values.
+    Empty values are treated as not specified.
+
+    Args:
+        values: dictionary mapping the field names to their values
+        position: position of the entry in the manifest (used for error messages)
+
+    Returns:
+        ManifestEntry object
+
+    Raises:
+        ValueError: if the entry contains unknown fields, has no name or an invalid port
+    """
+    unknown = set(values) - set(MANIFEST_FIELDS)
+    if unknown:
+        raise ValueError(f"Entry {position}: unknown field(s) {', '.join(sorted(unknown, key=str))}")
+
+    cleaned = {key: str(value).strip() for key, value in values.items() if value is not None and str(value).strip()}
+    if 'name' not in cleaned:
+        raise ValueError(f"Entry {position}: name has to be specified")
+
+    if 'port' in cleaned:
+        try:
+            cleaned['port'] = int(cleaned['port'])
+        except ValueError:
+            raise ValueError(f"Entry {position}: port '{cleaned['port']}' is not a number")
+
+    return ManifestEntry(**cleaned)
+
+
+def read_manifest(filepath: AnyStr) -> list:
+    """Reads a manifest file containing several printers.
+    JSON manifests contain a list of objects, CSV manifests a header line with the field names.
+    The fields are name, serial, path, devpath, vendor, model and port.
+
+    Args:
+        filepath: filepath of the manifest (.json or .csv)
+
+    Returns:
+        List of ManifestEntry objects
+
+    Raises:
+        ValueError: if the manifest has an unknown format or contains invalid entries
+    """
+    extension = os.path.splitext(filepath)[1].lower()
+
+    with open(filepath, newline='') as file:
+        if extension == '.json':
+            rows = json.load(file)
+            if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+                raise ValueError("JSON manifest has to contain a list of objects")
+        elif extension == '.csv':
+            reader = csv.DictReader(file)
+            rows = []
+            for row in reader:
+                # the values of a row with more fields than the header are collected under the key None
+                if None in row:
+                    raise ValueError(f"Too many columns in row {reader.line_num}")
+                rows.append(row)
+        else:
+            raise ValueError(f"Unknown manifest format '{extension}', use .json or .csv")
+
+    return [create_manifest_entry(row, position) for position, row in enumerate(rows, start=1)]
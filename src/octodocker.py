@@ -1,8 +1,9 @@
 import argparse
 import sys
 import text
-from typing import AnyStr, Optional
-import controller
+from dataclasses import dataclass
+from typing import AnyStr, Callable, Optional
+import timing
 
 
 def add_optional_args(parser, dest_vendor: Optional[AnyStr] = None, dest_model:  Optional[AnyStr] = None, dest_file:  Optional[AnyStr] = None, dest_docker:  Optional[AnyStr] = None):
@@ -57,31 +58,32 @@ def show_optional_args(arg_dict: dict, arg_vendor: bool = False, arg_model: bool
         arg_dict['arg_docker'].help = text.docker_help
 
 
-def get_args():
-    """ Creates the arguments for the command line interface
-
-    Returns:
-        Dictionary with the values of the arguments as given by the user/caller
-    """
-    parser = argparse.ArgumentParser()
-    # hidden optional parameters (to support them in any position even with the use of subparsers)
-    add_optional_args(parser, 'vendor', 'model', 'file', 'docker')
-
-    # first argument (action to execute) {devices, rules, add, remove)
-    subparser = parser.add_subparsers(help='Commands', dest='command')
-    subparser.add_parser('devices', help=text.command_device_help)
-    rule_parser = subparser.add_parser('rules', help=text.command_rule_help)
-    add_parser = subparser.add_parser('add', help=text.command_add_help)
-    remove_parser = subparser.add_parser("remove", help=text.command_remove_help)
-
-    # rule action (display current rules)
+def build_rules_parser(rule_parser):
+    """Adds the arguments of the rules command (display current rules)"""
     optional_args = add_optional_args(rule_parser, dest_file='file2')
     show_optional_args(optional_args, arg_file=True)
 
-    # add action (add udev rule) {serial, path, devpath)
+
+def build_add_parser(add_parser):
+    """Adds the arguments of the add command (add udev rule) {serial, path, devpath}"""
     optional_args = add_optional_args(add_parser, 'vendor2', 'model2', 'file2', 'docker2')
     show_optional_args(optional_args, True, True, True, False)
-    add_parser.add_argument('name', type=str, metavar=text.add_name_metavar, help=text.add_name_help)
+    add_parser.add_argument('name', type=str, nargs='?', metavar=text.add_name_metavar, help=text.add_name_help)
+    add_parser.add_argument('--from', type=str, metavar=text.add_manifest_metavar, dest='manifest', default=None, help=text.add_manifest_help)
+    add_parser.add_argument('--global', action='store_true', dest='global_check', help=text.add_global_help)
+    add_parser.add_argument('--no-run', action='store_true', dest='use_daemon', help=text.add_no_run_help)
+    add_parser.add_argument('--standby', type=int, metavar=text.add_standby_metavar, dest='standby', default=None, help=text.add_standby_help)
+    add_parser.add_argument('--shared', action='store_true', dest='shared', help=text.add_shared_help)
+    add_parser.add_argument('--prepare', action='store_true', dest='prepare', help=text.add_prepare_help)
+    add_parser.add_argument('--grouped', action='store_true', dest='grouped', help=text.add_grouped_help)
+    add_parser.add_argument('--no-reload', action='store_false', dest='reload', help=text.no_reload_help)
+    add_parser.add_argument('--boot-guard', action='store_true', dest='boot_guard', help=text.add_boot_guard_help)
+    add_parser.add_argument('--cpus', type=float, metavar=text.cpus_metavar, dest='cpus', default=None, help=text.cpus_help)
+    add_parser.add_argument('--mem', type=str, metavar=text.mem_metavar, dest='mem_limit', default=None, help=text.mem_help)
+    add_parser.add_argument('--cpuset', type=str, metavar=text.cpuset_metavar, dest='cpuset', default=None, help=text.cpuset_help)
+    add_parser.add_argument('--cpu-shares', type=int, metavar=text.cpu_shares_metavar, dest='cpu_shares', default=None, help=text.cpu_shares_help)
+    add_parser.add_argument('--blkio-weight', type=int, metavar=text.blkio_weight_metavar, dest='blkio_weight', default=None, help=text.blkio_weight_help)
+    add_parser.add_argument('--resources', type=str, metavar=text.resources_metavar, dest='resources', default=None, help=text.resources_help)
     add_type_parser = add_parser.add_subparsers(help=text.add_type_help, dest='add_type')
     add_parser_serial = add_type_parser.add_parser('serial', help=text.add_type_serial_help)
     add_parser_path = add_type_parser.add_parser('path', help=text.add_type_path_help)
@@ -102,9 +104,13 @@ def get_args():
     show_optional_args(optional_args, True, True, True)
     add_parser_devpath.add_argument('devpath', type=str, help=text.add_devpath_help)
 
-    # remove action (remove udev rule) {serial, path/devpath, name}
+
+def build_remove_parser(remove_parser):
+    """Adds the arguments of the remove command (remove udev rule) {serial, path/devpath, name}"""
     optional_args = add_optional_args(remove_parser, dest_file='file2')
     show_optional_args(optional_args, arg_file=True)
+    remove_parser.add_argument('--shared', action='store_true', dest='shared', help=text.remove_shared_help)
+    remove_parser.add_argument('--no-reload', action='store_false', dest='reload', help=text.no_reload_help)
     remove_type_parser = remove_parser.add_subparsers(help=text.remove_type_help, dest='remove_type')
     remove_serial_parser = remove_type_parser.add_parser('serial', help=text.remove_type_serial_help)
     remove_path_parser = remove_type_parser.add_parser('path', help=text.remove_type_path_help)
@@ -125,7 +131,271 @@ def get_args():
     show_optional_args(optional_args, arg_file=True)
     remove_name_parser.add_argument('name', type=str, help=text.remove_name_help)
 
-    arg_dict = vars(parser.parse_args())
+
+def build_conflicts_parser(conflict_parser):
+    """Adds the arguments of the conflicts command (check all rule files of a directory)"""
+    conflict_parser.add_argument('--dir', type=str, metavar=text.directory_metavar, dest='directory', default='/etc/udev/rules.d', help=text.directory_help)
+
+
+def build_watch_parser(watch_parser):
+    """Adds the arguments of the watch command (hotplug daemon)"""
+    optional_args = add_optional_args(watch_parser, dest_file='file2')
+    show_optional_args(optional_args, arg_file=True)
+    watch_parser.add_argument('--workers', type=int, metavar=text.workers_metavar, dest='workers', default=4, help=text.workers_help)
+    watch_parser.add_argument('--settle', type=float, metavar=text.settle_metavar, dest='settle', default=0.5, help=text.settle_help)
+    watch_parser.add_argument('--engine', type=str, nargs='?', const='/var/run/docker.sock', metavar=text.engine_metavar, dest='engine', default=None, help=text.engine_help)
+
+
+def build_serve_parser(serve_parser):
+    """Adds the arguments of the serve command (command server)"""
+    serve_parser.add_argument('--socket', type=str, metavar=text.socket_metavar, dest='socket2', default=None, help=text.socket_help)
+
+
+def build_start_parser(start_parser):
+    """Adds the arguments of the start command (bulk start)"""
+    optional_args = add_optional_args(start_parser, dest_file='file2')
+    show_optional_args(optional_args, arg_file=True)
+    start_parser.add_argument('--parallel', type=int, metavar=text.start_parallel_metavar, dest='parallel', default=3, help=text.start_parallel_help)
+    start_parser.add_argument('--priority', type=str, nargs='+', metavar=text.start_priority_metavar, dest='priority', default=None, help=text.start_priority_help)
+    start_parser.add_argument('--timeout', type=float, metavar=text.start_timeout_metavar, dest='timeout', default=120, help=text.start_timeout_help)
+    start_parser.add_argument('--all', action='store_true', dest='all', help=text.start_all_help)
+    start_parser.add_argument('--boot', action='store_true', dest='boot', help=text.start_boot_help)
+
+
+def build_reconcile_parser(reconcile_parser):
+    """Adds the arguments of the reconcile command (converge containers to the connected printers)"""
+    optional_args = add_optional_args(reconcile_parser, dest_file='file2')
+    show_optional_args(optional_args, arg_file=True)
+    reconcile_parser.add_argument('--engine', type=str, metavar=text.engine_metavar, dest='engine', default='/var/run/docker.sock', help=text.reconcile_engine_help)
+    reconcile_parser.add_argument('--parallel', type=int, metavar=text.start_parallel_metavar, dest='parallel', default=4, help=text.workers_help)
+    reconcile_parser.add_argument('--dry-run', action='store_true', dest='dry_run', help=text.reconcile_dry_run_help)
+
+
+def build_check_parser(check_parser):
+    """Adds the arguments of the check command (prepared containers)"""
+    optional_args = add_optional_args(check_parser, dest_file='file2')
+    show_optional_args(optional_args, arg_file=True)
+    check_parser.add_argument('--engine', type=str, metavar=text.engine_metavar, dest='engine', default='/var/run/docker.sock', help=text.check_engine_help)
+
+
+def build_match_parser(match_parser):
+    """Adds the arguments of the match command (join the connected devices with the rules)"""
+    optional_args = add_optional_args(match_parser, dest_file='file2')
+    show_optional_args(optional_args, arg_file=True)
+    match_parser.add_argument('--json', action='store_true', dest='json', help=text.match_json_help)
+
+
+def build_optimize_parser(optimize_parser):
+    """Adds the arguments of the optimize command (rewrite the rule file)"""
+    optional_args = add_optional_args(optimize_parser, dest_file='file2')
+    show_optional_args(optional_args, arg_file=True)
+    optimize_parser.add_argument('--dry-run', action='store_true', dest='dry_run', help=text.optimize_dry_run_help)
+
+
+def run_devices(args: dict, file: AnyStr):
+    """Prints the connected usb devices"""
+    import controller
+    controller.print_devices()
+
+
+def run_rules(args: dict, file: AnyStr):
+    """Prints the rules of the udev rule file"""
+    import controller
+    controller.print_rules(file)
+
+
+def run_conflicts(args: dict, file: AnyStr):
+    """Prints the conflicting rules of a rule directory"""
+    import controller
+    controller.print_conflicts(args['directory'])
+
+
+def run_watch(args: dict, file: AnyStr):
+    """Runs the hotplug daemon"""
+    import controller
+    controller.run_hotplug_daemon(file, args['workers'], args['engine'], args['settle'])
+
+
+def run_start(args: dict, file: AnyStr):
+    """Starts the containers of the connected printers"""
+    import controller
+    controller.start_all(file, args['parallel'], args['timeout'], args.get('priority'), not args.get('all', False), args.get('boot', False))
+
+
+def run_reconcile(args: dict, file: AnyStr):
+    """Converges the containers to the connected printers"""
+    import controller
+    controller.reconcile(file, args['engine'], args['parallel'], args.get('dry_run', False))
+
+
+def run_check(args: dict, file: AnyStr):
+    """Checks if the containers of the rules are prepared"""
+    import controller
+    controller.check_instances(file, args['engine'])
+
+
+def run_match(args: dict, file: AnyStr):
+    """Prints which connected device matches which rule"""
+    import controller
+    controller.print_matches(file, args.get('json', False))
+
+
+def run_optimize(args: dict, file: AnyStr):
+    """Optimizes the rule file"""
+    import controller
+    controller.optimize_rule_file(file, args.get('dry_run', False))
+
+
+def run_add(args: dict, file: AnyStr):
+    """Adds a rule or the rules of a manifest"""
+    import controller
+    global_check = args.get('global_check', False)
+    use_daemon = args.get('use_daemon', False)
+    standby = args.get('standby')
+    shared = args.get('shared', False)
+    prepare = args.get('prepare', False)
+    reload = args.get('reload', True)
+    boot_guard = args.get('boot_guard', False)
+    overrides = {key: args.get(key) for key in ('cpus', 'mem_limit', 'cpuset', 'cpu_shares', 'blkio_weight')}
+
+    if args.get('manifest'):
+        controller.add_rules_from_manifest(file, args['manifest'], global_check=global_check, use_daemon=use_daemon, standby_timeout=standby, shared=shared, resource_overrides=overrides, resources_filepath=args.get('resources'), prepare=prepare, grouped=args.get('grouped', False), reload=reload, boot_guard=boot_guard)
+        return
+
+    name = args.get('name')
+    if not name:
+        print('Either a name or a manifest (--from) has to be specified')
+        sys.exit()
+    vendor = args.get('vendor') or args.get('vendor2') or args.get('vendor3')
+    model = args.get('model') or args.get('model2') or args.get('model3')
+    docker = args.get('docker') or args.get('docker2') or args.get('docker3')
+    serial = args.get('serial number', None)
+    path = args.get('path', None)
+    devpath = args.get('devpath', None)
+
+    if args.get('add_type') == 'devpath' and docker:
+        print('Docker is not supported when using devpath')
+        sys.exit()
+
+    if not docker and controller.has_resource_limits(overrides, args.get('resources')):
+        print('Resource limits can only be set for docker rules (-d)')
+        sys.exit()
+
+    if docker:
+        resources = controller.load_resource_profile(overrides, args.get('resources'))
+        controller.add_rule_docker(file, docker, name, vendor, model, path, serial, global_check=global_check, use_daemon=use_daemon, standby_timeout=standby, shared=shared, resources=resources, prepare=prepare, reload=reload, boot_guard=boot_guard)
+    else:
+        controller.add_rule(file, name, vendor, model, devpath, path, serial, global_check=global_check, reload=reload)
+    print('Rule added')
+
+
+def run_serve(args: dict, file: AnyStr):
+    """Runs the command server"""
+    import controller
+    import command_server
+    handlers = {name: COMMANDS[name].run for name in command_server.SERVED_COMMANDS}
+    try:
+        command_server.run_server(handlers, args.get('socket') or args.get('socket2'), controller.start_device_monitoring)
+    except ValueError as error:
+        print(error)
+
+
+def run_remove(args: dict, file: AnyStr):
+    """Removes the rules matching the name, path or serial number"""
+    import controller
+    serial = args.get('serial number', None)
+    path = args.get('path/devpath', None)
+    name = args.get('name', None)
+    controller.remove_rule(file, name, path, serial, args.get('shared', False), args.get('reload', True))
+    print('Rule removed')
+
+
+@dataclass
+class Command:
+    """Class for a command of the command line interface.
+    The arguments of a command are only added (build) if the command was chosen, the controller is only imported by
+    the handler (run), so starting the cli does not pay for commands or modules it does not use."""
+    help: AnyStr
+    build: Optional[Callable] = None
+    run: Optional[Callable] = None
+
+
+COMMANDS = {
+    'devices': Command(text.command_device_help, None, run_devices),
+    'rules': Command(text.command_rule_help, build_rules_parser, run_rules),
+    'add': Command(text.command_add_help, build_add_parser, run_add),
+    'remove': Command(text.command_remove_help, build_remove_parser, run_remove),
+    'conflicts': Command(text.command_conflicts_help, build_conflicts_parser, run_conflicts),
+    'watch': Command(text.command_watch_help, build_watch_parser, run_watch),
+    'start': Command(text.command_start_help, build_start_parser, run_start),
+    'reconcile': Command(text.command_reconcile_help, build_reconcile_parser, run_reconcile),
+    'check': Command(text.command_check_help, build_check_parser, run_check),
+    'match': Command(text.command_match_help, build_match_parser, run_match),
+    'optimize': Command(text.command_optimize_help, build_optimize_parser, run_optimize),
+    'serve': Command(text.command_serve_help, build_serve_parser, run_serve),
+}
+
+# options of the main parser which take a value
+_VALUE_OPTIONS = ('-v', '--vendor', '-m', '--model', '-f', '--file', '-d', '--docker', '--trace-file', '--socket')
+
+
+def is_value_option_prefix(argument: AnyStr) -> bool:
+    """Checks if an argument is an abbreviation argparse accepts for a long option taking a value (e.g. --vend).
+    A prefix of several options is rejected by argparse, so it does not matter which option it belongs to."""
+    return argument.startswith('--') and len(argument) > 2 and '=' not in argument \
+        and any(option.startswith(argument) for option in _VALUE_OPTIONS if option.startswith('--'))
+
+
+def find_command(argv: list) -> Optional[AnyStr]:
+    """Finds the command in the command line arguments without parsing them
+
+    Args:
+        argv: command line arguments without the program name
+
+    Returns:
+        name of the command or None if no command was given
+    """
+    skip = False
+    for argument in argv:
+        if skip:
+            skip = False
+        elif argument in _VALUE_OPTIONS or is_value_option_prefix(argument):
+            skip = True
+        elif not argument.startswith('-'):
+            return argument if argument in COMMANDS else None
+    return None
+
+
+def get_args(argv: Optional[list] = None):
+    """ Creates the arguments for the command line interface.
+    Only the arguments of the chosen command are added to the parser.
+
+    Args:
+        argv: command line arguments without the program name, defaults to sys.argv
+
+    Returns:
+        Dictionary with the values of the arguments as given by the user/caller
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    chosen = find_command(argv)
+
+    parser = argparse.ArgumentParser()
+    # hidden optional parameters (to support them in any position even with the use of subparsers)
+    add_optional_args(parser, 'vendor', 'model', 'file', 'docker')
+    parser.add_argument('--timings', action='store_true', dest='timings', help=text.timings_help)
+    parser.add_argument('--trace-file', type=str, metavar=text.trace_file_metavar, dest='trace_file', default=None, help=text.trace_file_help)
+    parser.add_argument('--socket', type=str, metavar=text.socket_metavar, dest='socket', default=None, help=text.socket_help)
+    parser.add_argument('--no-server', action='store_true', dest='no_server', help=text.no_server_help)
+    parser.add_argument('--sysfs', action='store_true', dest='sysfs', help=text.sysfs_help)
+
+    # first argument (action to execute)
+    subparser = parser.add_subparsers(help='Commands', dest='command')
+    for name, command in COMMANDS.items():
+        command_parser = subparser.add_parser(name, help=command.help)
+        if name == chosen and command.build is not None:
+            command.build(command_parser)
+
+    arg_dict = vars(parser.parse_args(argv))
     if not arg_dict.get('command'):
         parser.print_help()
         sys.exit()
@@ -133,7 +403,8 @@ def get_args():
 
 
 def process_args(args):
-    """Processes the arguments given by get_args and calls the corresponding functions in the controller module
+    """Processes the arguments given by get_args and calls the handler of the command, which calls the
+    corresponding functions in the controller module
 
     Args:
         args: args as returned by get_args
@@ -141,47 +412,48 @@ def process_args(args):
     file = args.get('file') or args.get('file2') or args.get('file3')
     if not file:
         file = '/etc/udev/rules.d/99-serial.rules'
-    command = args["command"]
+    if args.get('sysfs'):
+        import udev_manager
+        udev_manager.use_sysfs_backend()
 
-    if command == 'devices':
-        controller.print_devices()
-        sys.exit()
+    COMMANDS[args["command"]].run(args, file)
+    sys.exit()
 
-    if command == 'rules':
-        controller.print_rules(file)
-        sys.exit()
 
-    if command == 'add':
-        name = args.get('name')
-        vendor = args.get('vendor') or args.get('vendor2') or args.get('vendor3')
-        model = args.get('model') or args.get('model2') or args.get('model3')
-        docker = args.get('docker') or args.get('docker2') or args.get('docker3')
-        serial = args.get('serial number', None)
-        path = args.get('path', None)
-        devpath = args.get('devpath', None)
-
-        if args.get('add_type') == 'devpath' and docker:
-            print('Docker is not supported when using devpath')
-            sys.exit()
-
-        if docker:
-            controller.add_rule_docker(file, docker, name, vendor, model, path, serial)
-        else:
-            controller.add_rule(file, name, vendor, model, devpath, path, serial)
-        print('Rule added')
-        sys.exit()
+def run_on_server(args: dict) -> bool:
+    """Runs the command on the command server if one is running
 
-    if command == 'remove':
-        serial = args.get('serial number', None)
-        path = args.get('path/devpath', None)
-        name = args.get('name', None)
-        controller.remove_rule(file, name, path, serial)
-        print('Rule removed')
-        sys.exit()
+    Args:
+        args: args as returned by get_args
 
-    sys.exit()
+    Returns:
+        False if the command has to be run in this process
+    """
+    import command_server
+    response = command_server.send_request(args, args.get('socket'))
+    if response is None:
+        return False
+    sys.stdout.write(response['stdout'])
+    sys.stderr.write(response['stderr'])
+    sys.exit(response['status'])
+
+
+def main():
+    """Runs the command line interface, optionally recording the time spent in each phase of the command.
+    Commands are sent to a running command server, unless they are timed or --no-server is given."""
+    arguments = get_args()
+    timed = arguments.get('timings') or arguments.get('trace_file')
+    if not timed and not arguments.get('no_server') and arguments['command'] != 'serve':
+        run_on_server(arguments)
+
+    if timed:
+        timing.enable_timings()
+    try:
+        with timing.phase(f"command.{arguments['command']}"):
+            process_args(arguments)
+    finally:
+        timing.report(arguments.get('timings'), arguments.get('trace_file'))
 
 
 if __name__ == "__main__":
-    arguments = get_args()
-    process_args(arguments)
+    main()
@@ -14,9 +14,29 @@ command_add_help = 'Add a udev rule'
 command_remove_help = 'Remove a udev rule'
 command_device_help = 'Shows a list of all connected devices and their relevant data'
 command_rule_help = 'Shows a list of all udev rules and their data'
+command_conflicts_help = 'Shows names, paths and serial numbers used by more than one rule in any rule file of a directory'
+command_watch_help = 'Starts and stops the docker containers of rules added with --no-run when their printer is connected or disconnected'
+
+directory_help = 'Directory containing the udev rule files'
+directory_metavar = 'Directory'
+
+workers_help = 'number of docker commands that may run at the same time'
+workers_metavar = 'Workers'
+settle_help = 'seconds without further connect or disconnect events of a printer before its container is started or stopped (default 0.5)'
+settle_metavar = 'Seconds'
+engine_help = 'starts and stops existing containers through the docker engine api on the given socket (default /var/run/docker.sock) instead of docker compose'
+engine_metavar = 'Socket'
 
 add_name_help = 'Name to use for the device'
 add_name_metavar = 'DeviceName'
+add_manifest_help = 'adds all printers listed in a manifest file (.csv or .json with the fields name, serial, path, devpath, vendor, model, port) at once'
+add_manifest_metavar = 'Manifest'
+add_global_help = 'checks for duplicates in all rule files of the directory containing the rule file'
+add_no_run_help = 'only creates the symlink in the rule, the docker container is started and stopped by the watch command instead of udev'
+add_standby_help = 'pauses the docker container when the printer is disconnected and only stops it after the given number of seconds, so a reconnect does not have to start octoprint again'
+add_standby_metavar = 'Seconds'
+add_shared_help = 'adds the docker container as a service to one compose project shared by all printers instead of creating a project per printer'
+remove_shared_help = 'also removes the services of the removed rules from the shared compose project'
 add_type_help = 'Device identification Method'
 add_type_serial_help = 'identify a device through the use of a serial number'
 add_type_path_help = 'identify a device through the usb port (ID_PATH) its connected to (only use if no serial number is available)'
@@ -34,3 +54,45 @@ remove_type_name_help = 'remove udev rules associated with a name'
 remove_serial_help = 'serial number used in the rule'
 remove_path_help = 'path id or devpath used in the rule'
 remove_name_help = 'name used in the rule'
+cpus_help = 'number of cores the docker container may use (e.g. 1.5)'
+cpus_metavar = 'Cores'
+mem_help = 'memory limit of the docker container (e.g. 512m or 2g)'
+mem_metavar = 'Memory'
+cpuset_help = 'cores the docker container is pinned to (e.g. 0-1 or 2,3)'
+cpuset_metavar = 'Cores'
+cpu_shares_help = 'relative cpu weight of the docker container (default 1024)'
+cpu_shares_metavar = 'Shares'
+blkio_weight_help = 'relative block io weight of the docker container (10-1000)'
+blkio_weight_metavar = 'Weight'
+resources_help = 'json file with the default resource limits (default ~/.config/octodocker/resources.json)'
+resources_metavar = 'Filepath'
+timings_help = 'prints the time spent in each phase of the command to stderr'
+trace_file_help = 'writes the phases of the command as chrome trace json (chrome://tracing, ui.perfetto.dev) to the file'
+trace_file_metavar = 'Filepath'
+command_serve_help = 'keeps the rules and devices in memory and runs the devices, rules, add, remove and conflicts commands of other octodocker calls'
+socket_help = 'unix socket of the command server (default $XDG_RUNTIME_DIR/octodocker.sock)'
+socket_metavar = 'Socket'
+no_server_help = 'runs the command in this process even if a command server is running'
+command_start_help = 'starts the docker containers of the connected printers (e.g. after a reboot) with a limited number starting at the same time and prints when each octoprint instance is ready'
+start_parallel_help = 'number of containers starting at the same time (default 3)'
+start_parallel_metavar = 'Count'
+start_priority_help = 'names of the printers to start first, in this order'
+start_priority_metavar = 'Name'
+start_timeout_help = 'seconds to wait for an octoprint instance to answer (default 120)'
+start_timeout_metavar = 'Seconds'
+start_all_help = 'also starts the containers of printers that are not connected'
+command_reconcile_help = 'starts the stopped docker containers of connected printers and stops the running containers of disconnected printers (e.g. from a systemd timer)'
+reconcile_dry_run_help = 'only prints the containers that would be started or stopped'
+reconcile_engine_help = 'docker socket the container states are read from (default /var/run/docker.sock)'
+add_prepare_help = 'pulls the octoprint image if it is missing and creates the docker container without starting it, so connecting the printer only has to start the container'
+command_check_help = 'checks for every rule with a docker container whether the image is present and the container is created'
+check_engine_help = 'docker socket the image and container states are read from (default /var/run/docker.sock)'
+add_grouped_help = 'writes the rules of the manifest as one block grouped by vendor and model id, which udev skips for events of other devices'
+command_optimize_help = 'removes dead and duplicate rules and rewrites the rule file as a block grouped by vendor and model id, which udev skips for events of other devices'
+optimize_dry_run_help = 'only prints the changes as diff and the estimated matching cost before and after'
+no_reload_help = 'does not reload the udev rules after writing the rule file, by default udev reloads them and replays an event only for the connected devices of the changed rules'
+command_match_help = 'shows which connected device matches which rule, the devices without or with several rules and the rules without connected device'
+match_json_help = 'prints the result as json object'
+sysfs_help = 'reads the connected devices directly from sysfs and the udev database instead of using pyudev, which is faster on small boards but can not follow udev events'
+start_boot_help = 'enables the start commands of rules added with --boot-guard, which do nothing after a reboot until this ran, and starts the connected printers (run once at boot by a oneshot systemd unit)'
+add_boot_guard_help = 'the start command of the rule does nothing after a reboot until `start --boot` ran, only use it with the oneshot unit running the boot start (see README)'
@@ -0,0 +1,191 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import AnyStr, Callable, Optional, TextIO
+
+_NULL_PHASE = nullcontext()
+_recorder = None
+
+
+@dataclass
+class PhaseRecord:
+    """Class for a single finished phase of a PhaseRecorder"""
+    name: AnyStr
+    path: tuple
+    start: float
+    duration: float
+    thread_id: int
+
+
+class _Phase:
+    """Context manager recording one phase, phases entered within it are recorded as its children"""
+
+    __slots__ = ('recorder', 'name', 'start', 'path')
+
+    def __init__(self, recorder, name: AnyStr):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        stack = self.recorder._get_stack()
+        stack.append(self.name)
+        self.path = tuple(stack)
+        self.start = self.recorder.clock()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = self.recorder.clock()
+        self.recorder._get_stack().pop()
+        self.recorder._add(PhaseRecord(self.name, self.path, self.start, end - self.start, threading.get_ident()))
+        return False
+
+
+class PhaseRecorder:
+    """Class for recording the duration of named, possibly nested phases with a monotonic clock.
+    Phases are recorded per thread, so phases of worker threads do not nest into the phases of the main thread."""
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.origin = clock()
+        self.records = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _get_stack(self) -> list:
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _add(self, record: PhaseRecord):
+        with self._lock:
+            self.records.append(record)
+
+    def phase(self, name: AnyStr) -> _Phase:
+        """Creates the context manager recording a phase
+
+        Args:
+            name: name of the phase (e.g. rules.load)
+
+        Returns:
+            context manager
+        """
+        return _Phase(self, name)
+
+    def summarize(self) -> list:
+        """Sums up the recorded phases by their position in the phase tree
+
+        Returns:
+            List of (path, calls, total seconds) tuples, ordered by the first start of each phase
+        """
+        totals = {}
+        for record in sorted(self.records, key=lambda entry: entry.start):
+            calls, total = totals.get(record.path, (0, 0.0))
+            totals[record.path] = (calls + 1, total + record.duration)
+
+        # children are listed directly below their parents, phases still running have no entry of their own
+        position = {path: index for index, path in enumerate(totals)}
+        order = sorted(totals, key=lambda path: [position.get(path[:depth], -1) for depth in range(1, len(path) + 1)])
+        return [(path, *totals[path]) for path in order]
+
+    def format_summary(self) -> AnyStr:
+        """Formats the phase summary as a table with nested phases indented below their parents
+
+        Returns:
+            human readable phase breakdown
+        """
+        lines = [f"{'phase':<40} {'calls':>6} {'total ms':>10}"]
+        for path, calls, total in self.summarize():
+            lines.append(f"{'  ' * (len(path) - 1) + path[-1]:<40} {calls:>6} {total * 1000:>10.3f}")
+        return "\n".join(lines)
+
+    def to_chrome_trace(self) -> dict:
+        """Converts the recorded phases to the Chrome trace event format (chrome://tracing, Perfetto)
+
+        Returns:
+            dictionary to be written as JSON
+        """
+        pid = os.getpid()
+        events = [{
+            'name': record.name,
+            'cat': record.name.split('.', 1)[0],
+            'ph': 'X',
+            'ts': (record.start - self.origin) * 1e6,
+            'dur': record.duration * 1e6,
+            'pid': pid,
+            'tid': record.thread_id,
+        } for record in sorted(self.records, key=lambda entry: entry.start)]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, filepath: AnyStr):
+        """Writes the recorded phases as Chrome trace JSON
+
+        Args:
+            filepath: filepath of the trace file
+        """
+        with open(filepath, 'w') as file:
+            json.dump(self.to_chrome_trace(), file)
+
+
+def enable_timings(clock: Callable[[], float] = time.perf_counter) -> PhaseRecorder:
+    """Starts recording phases for the process
+
+    Args:
+        clock: monotonic clock to use
+
+    Returns:
+        the new PhaseRecorder
+    """
+    global _recorder
+    _recorder = PhaseRecorder(clock)
+    return _recorder
+
+
+def disable_timings() -> Optional[PhaseRecorder]:
+    """Stops recording phases
+
+    Returns:
+        the PhaseRecorder used until now or None if timings were disabled
+    """
+    global _recorder
+    recorder, _recorder = _recorder, None
+    return recorder
+
+
+def get_recorder() -> Optional[PhaseRecorder]:
+    """Gets the PhaseRecorder of the process, None if timings are disabled"""
+    return _recorder
+
+
+def phase(name: AnyStr):
+    """Creates the context manager recording a phase.
+    If timings are disabled, a shared no-op context manager is returned, so instrumented code costs a function call.
+
+    Args:
+        name: name of the phase (e.g. rules.load)
+
+    Returns:
+        context manager
+    """
+    if _recorder is None:
+        return _NULL_PHASE
+    return _recorder.phase(name)
+
+
+def report(print_summary: bool = False, trace_filepath: Optional[AnyStr] = None, file_object: Optional[TextIO] = None):
+    """Outputs the recorded phases, does nothing if timings are disabled
+
+    Args:
+        print_summary: print the phase breakdown
+        trace_filepath: write the phases as Chrome trace JSON to this file
+        file_object: file object the breakdown is printed to, defaults to stderr
+    """
+    if _recorder is None:
+        return
+    if print_summary:
+        print(_recorder.format_summary(), file=file_object or sys.stderr, flush=True)
+    if trace_filepath:
+        _recorder.write_chrome_trace(trace_filepath)
@@ -1,4 +1,14 @@
 from .udev_rule_creation import *
 from .udev_rulefile_utils import *
+from .udev_rule_parser import *
 from .udev_scraper import *
+from .sysfs_backend import *
 from .device_data import *
+from .rule_cache import *
+from .rule_file_io import *
+from .rule_directory import *
+from .device_matcher import *
+from .rule_grouping import *
+from .rule_cost import *
+from .rule_optimizer import *
+from .rule_reload import *
@@ -4,9 +4,12 @@ from typing import Optional, AnyStr
 
 @dataclass
 class DeviceData:
-    """Class for keeping track of device information"""
+    """Class for keeping track of device information.
+    serial is the ID_SERIAL property (vendor_model_serial), serial_short the ID_SERIAL_SHORT property, which is the
+    serial attribute of the usb device."""
     path: Optional[AnyStr]
     vendor_id: Optional[AnyStr]
     model_id: Optional[AnyStr]
     serial: Optional[AnyStr]
     devpath: Optional[AnyStr]
+    serial_short: Optional[AnyStr] = None
@@ -0,0 +1,151 @@
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+from .device_data import DeviceData
+from .udev_rule_parser import LONG_SERIAL_KEYS, MODEL_KEYS, SHORT_SERIAL_KEYS, VENDOR_KEYS, Rule, RuleFile
+
+
+def rule_matches_device(rule: Rule, device: DeviceData) -> bool:
+    """Checks if all device keys of a rule (serial, path, devpath, vendor id, model id) match the device.
+    ATTRS{serial} and ENV{ID_SERIAL_SHORT} are compared with the short serial of the device, ENV{ID_SERIAL} with
+    the long one.
+
+    Args:
+        rule: parsed rule
+        device: device data of the device
+
+    Returns:
+        True if every key used in the rule has the same value as the device
+    """
+    checks = ((rule.get(SHORT_SERIAL_KEYS), device.serial_short), (rule.get(LONG_SERIAL_KEYS), device.serial),
+              (rule.path, device.path), (rule.devpath, device.devpath),
+              (rule.get(VENDOR_KEYS), device.vendor_id), (rule.get(MODEL_KEYS), device.model_id))
+    return all(expected is None or expected == actual for expected, actual in checks)
+
+
+def get_index_values(rule_file: RuleFile, device: DeviceData) -> tuple:
+    """Gets the indexes of a rule file and the values of a device to look up in them, the serial index contains the
+    long and the short serials
+
+    Args:
+        rule_file: parsed rule file
+        device: device data of the device
+
+    Returns:
+        (index, value) tuples, the value may be None
+    """
+    return ((rule_file.serials, device.serial), (rule_file.serials, device.serial_short), (rule_file.paths, device.path),
+            (rule_file.devpaths, device.devpath))
+
+
+def find_device_rules(rule_file: RuleFile, device: DeviceData) -> list:
+    """Finds the rules of a rule file matching a device.
+    The candidates are looked up in the serial, path and devpath indexes of the rule file, so the cost does not
+    depend on the number of rules.
+
+    Args:
+        rule_file: parsed rule file
+        device: device data of the device
+
+    Returns:
+        List of matching rules in file order
+    """
+    candidates = {}
+    for index, value in get_index_values(rule_file, device):
+        if value is None:
+            continue
+        for rule in index.get(value, ()):
+            candidates[rule.line_number] = rule
+
+    return [rule for _, rule in sorted(candidates.items()) if rule_matches_device(rule, device)]
+
+
+def find_compose_rule(rule_file: RuleFile, device: DeviceData) -> Optional[Rule]:
+    """Finds the first rule matching a device that was created for the hotplug daemon
+
+    Args:
+        rule_file: parsed rule file
+        device: device data of the device
+
+    Returns:
+        Rule with a docker compose file or None
+    """
+    for rule in find_device_rules(rule_file, device):
+        if rule.compose_file:
+            return rule
+    return None
+
+
+@dataclass
+class DeviceMatch:
+    """Class for a connected device and the rules matching it"""
+    device: DeviceData
+    rules: list
+
+
+@dataclass
+class MatchReport:
+    """Class for the result of joining the connected devices with the rules of a rule file.
+    Devices matched by rules of more than one name are ambiguous, rules matching no connected device are unused."""
+    matched: list = field(default_factory=list)
+    unmatched: list = field(default_factory=list)
+    ambiguous: list = field(default_factory=list)
+    unused: list = field(default_factory=list)
+
+
+def index_vendor_model_rules(rule_file: RuleFile) -> dict:
+    """Indexes the rules matching devices only by vendor and model id, which the serial, path and devpath indexes
+    of the rule file do not contain
+
+    Args:
+        rule_file: parsed rule file
+
+    Returns:
+        (vendor id, model id) -> list of rules, None where the rule does not compare the id
+    """
+    index = {}
+    for rule in rule_file.rules:
+        if rule.is_comment or rule.action == 'remove' or rule.serial or rule.path or rule.devpath:
+            continue
+        key = (rule.get(VENDOR_KEYS), rule.get(MODEL_KEYS))
+        if key != (None, None):
+            index.setdefault(key, []).append(rule)
+    return index
+
+
+def match_devices(rule_file: RuleFile, devices: Iterable[DeviceData]) -> MatchReport:
+    """Joins the connected devices with the rules of a rule file in one pass over the devices.
+    The candidates of each device are looked up in the serial, path, devpath and vendor/model indexes, so the cost
+    does not depend on the number of rules.
+
+    Args:
+        rule_file: parsed rule file
+        devices: device data of the connected devices
+
+    Returns:
+        MatchReport with the devices matched by rules of exactly one name, the unmatched and ambiguous devices and
+        the unused rules in file order
+    """
+    vendor_models = index_vendor_model_rules(rule_file)
+    report = MatchReport()
+    used = set()
+    for device in devices:
+        candidates = {}
+        for index, value in get_index_values(rule_file, device):
+            if value is not None:
+                candidates.update((rule.line_number, rule) for rule in index.get(value, ()))
+        for key in ((device.vendor_id, device.model_id), (device.vendor_id, None), (None, device.model_id)):
+            candidates.update((rule.line_number, rule) for rule in vendor_models.get(key, ()))
+
+        rules = [rule for _, rule in sorted(candidates.items()) if rule_matches_device(rule, device)]
+        used.update(rule.line_number for rule in rules)
+        if not rules:
+            report.unmatched.append(device)
+        elif len({rule.name or rule.line_number for rule in rules}) > 1:
+            report.ambiguous.append(DeviceMatch(device, rules))
+        else:
+            report.matched.append(DeviceMatch(device, rules))
+
+    indexed = {rule.line_number: rule for index in (rule_file.serials, rule_file.paths, rule_file.devpaths, vendor_models)
+               for rules in index.values() for rule in rules}
+    report.unused = [rule for line_number, rule in sorted(indexed.items()) if line_number not in used]
+    return report
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import stat
+import tempfile
+from typing import AnyStr, Optional
+from .udev_rule_parser import RuleFile, RuleToken, parse_rules
+
+CACHE_VERSION = 2
+
+# parsed rule files of this process (absolute filepath -> (identity, digest, RuleFile)), used by long running
+# processes like the command server to skip reading the disk cache
+_memory_cache = {}
+
+
+def get_cache_directory() -> AnyStr:
+    """Gets the directory the parsed rule files are cached in.
+    Uses $XDG_CACHE_HOME/octodocker and falls back to ~/.cache/octodocker.
+
+    Returns:
+        path of the cache directory
+    """
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'octodocker')
+
+
+def get_cache_filepath(filepath: AnyStr, cache_dir: Optional[AnyStr] = None) -> AnyStr:
+    """Gets the path of the cache entry for a rule file
+
+    Args:
+        filepath: filepath of the udev rule file
+        cache_dir: directory of the cache, defaults to get_cache_directory()
+
+    Returns:
+        path of the cache entry
+    """
+    cache_dir = cache_dir or get_cache_directory()
+    key = hashlib.sha256(os.path.abspath(filepath).encode()).hexdigest()
+    return os.path.join(cache_dir, f'rules-{key}.json')
+
+
+def _file_identity(stat_result: os.stat_result) -> tuple:
+    return stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns
+
+
+def _is_private(stat_result: os.stat_result) -> bool:
+    # no other user can have placed or changed the entries of a cache owned by the current user and not writable
+    # by others
+    return stat_result.st_uid == os.getuid() and not stat_result.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def _read_cache(cache_filepath: AnyStr) -> Optional[dict]:
+    try:
+        if not _is_private(os.stat(os.path.dirname(cache_filepath))):
+            return None
+        with open(cache_filepath, 'rb') as file:
+            if not _is_private(os.fstat(file.fileno())):
+                return None
+            entry = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(entry, dict) or entry.get('version') != CACHE_VERSION:
+        return None
+    return entry
+
+
+def _decode_tokens(entry: dict, line_count: int) -> Optional[list]:
+    try:
+        line_tokens = [tuple(RuleToken(*token) for token in tokens) for tokens in entry['tokens']]
+    except (KeyError, TypeError):
+        return None
+    return line_tokens if len(line_tokens) == line_count else None
+
+
+def _write_cache(cache_filepath: AnyStr, entry: dict):
+    directory = os.path.dirname(cache_filepath)
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix='.rules-', suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'w') as file:
+                json.dump(entry, file, separators=(',', ':'))
+            os.replace(temp_path, cache_filepath)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    except OSError:
+        # the cache is an optimization only, a read-only or full disk must not break the command
+        pass
+
+
+def load_rule_file(filepath: AnyStr, cache_dir: Optional[AnyStr] = None, use_cache: bool = True) -> RuleFile:
+    """Reads and parses an udev rule file.
+    The tokens of the lines are cached in memory and as JSON on disk. A cache entry is only used if the inode, size
+    and modification time of the file as well as the hash of its content are unchanged, otherwise the file is parsed
+    again. Every call still reads and hashes the whole file, the cache only saves tokenizing the lines.
+    Cache files and directories not owned by the current user or writable by others are ignored.
+
+    Args:
+        filepath: filepath of the udev rule file
+        cache_dir: directory of the cache, defaults to get_cache_directory()
+        use_cache: if False, the file is always parsed and the cache is left untouched
+
+    Returns:
+        RuleFile object of the file
+    """
+    with open(filepath, 'rb') as file:
+        identity = _file_identity(os.fstat(file.fileno()))
+        data = file.read()
+
+    if not use_cache:
+        return parse_rules(data.decode())
+
+    digest = hashlib.sha256(data).hexdigest()
+    memory_key = os.path.abspath(filepath)
+    memory_entry = _memory_cache.get(memory_key)
+    if memory_entry is not None and memory_entry[:2] == (identity, digest):
+        return memory_entry[2]
+
+    content = data.decode()
+    cache_filepath = get_cache_filepath(filepath, cache_dir)
+    entry = _read_cache(cache_filepath)
+    line_tokens = None
+    if entry and entry.get('identity') == list(identity) and entry.get('digest') == digest:
+        line_tokens = _decode_tokens(entry, len(content.splitlines()))
+    if line_tokens is not None:
+        rule_file = parse_rules(content, line_tokens)
+    else:
+        rule_file = parse_rules(content)
+        tokens = [[[token.key, token.operator, token.value] for token in rule.tokens] for rule in rule_file.rules]
+        _write_cache(cache_filepath, {'version': CACHE_VERSION, 'identity': identity, 'digest': digest, 'tokens': tokens})
+
+    _memory_cache[memory_key] = (identity, digest, rule_file)
+    return rule_file
@@ -0,0 +1,94 @@
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from typing import AnyStr, Optional
+from .udev_rule_parser import tokenize_line
+
+# a comparison of an ATTRS key reads a sysfs attribute of every parent device walked, which costs about as much
+# as this many comparisons of properties already in memory
+PARENT_LOOKUP_WEIGHT = 10
+_MATCH_OPERATORS = ('==', '!=')
+
+
+@dataclass
+class UdevEvent:
+    """Class for the device of an udev event as seen by the rules: its properties (SUBSYSTEM, ACTION, ID_SERIAL, ...)
+    and the sysfs attributes of the device and its parents, starting with the device itself"""
+    properties: dict
+    attributes: list = field(default_factory=list)
+
+
+@dataclass
+class RuleCost:
+    """Class for the estimated cost of processing the rules of a file for one udev event"""
+    lines: int = 0
+    comparisons: int = 0
+    parent_lookups: int = 0
+    matched: int = 0
+
+    @property
+    def units(self) -> int:
+        """Total cost with the parent lookups weighted by PARENT_LOOKUP_WEIGHT"""
+        return self.comparisons + self.parent_lookups * PARENT_LOOKUP_WEIGHT
+
+
+def _matches_value(actual: Optional[AnyStr], pattern: AnyStr) -> bool:
+    actual = actual or ''
+    return any(fnmatchcase(actual, alternative) for alternative in pattern.split('|'))
+
+
+def _compare(key: AnyStr, pattern: AnyStr, event: UdevEvent, cost: RuleCost) -> bool:
+    cost.comparisons += 1
+    if key.startswith('ENV{'):
+        return _matches_value(event.properties.get(key[4:-1]), pattern)
+    if key.startswith('ATTRS{'):
+        attribute = key[6:-1]
+        for attributes in event.attributes:
+            cost.parent_lookups += 1
+            if attribute in attributes and _matches_value(attributes[attribute], pattern):
+                return True
+        return False
+    if key.startswith('ATTR{'):
+        attributes = event.attributes[0] if event.attributes else {}
+        return _matches_value(attributes.get(key[5:-1]), pattern)
+    return _matches_value(event.properties.get(key), pattern)
+
+
+def estimate_rule_cost(file_content: AnyStr, event: UdevEvent) -> RuleCost:
+    """Estimates the cost of processing a rule file for an event the way udevd evaluates it: the comparisons of a
+    rule are evaluated in order until the first one fails, a matching rule with GOTO skips all lines up to its LABEL.
+    Property comparisons count as one comparison, ATTRS comparisons additionally count every parent device walked.
+
+    Args:
+        file_content: content of the udev rule file
+        event: device of the event
+
+    Returns:
+        RuleCost of the event
+    """
+    cost = RuleCost()
+    goto = None
+    for line in file_content.splitlines():
+        tokens = tokenize_line(line)
+        if not tokens:
+            continue
+        if goto is not None:
+            if any(token.key == 'LABEL' and token.value == goto for token in tokens):
+                goto = None
+            continue
+        if all(token.key == 'LABEL' for token in tokens):
+            continue
+
+        cost.lines += 1
+        matched = True
+        for token in tokens:
+            if token.operator not in _MATCH_OPERATORS:
+                continue
+            if _compare(token.key, token.value, event, cost) != (token.operator == '=='):
+                matched = False
+                break
+        if not matched:
+            continue
+        if any(token.key not in ('GOTO', 'LABEL') and token.operator not in _MATCH_OPERATORS for token in tokens):
+            cost.matched += 1
+        goto = next((token.value for token in tokens if token.key == 'GOTO'), None)
+    return cost
@@ -0,0 +1,130 @@
+import os
+from dataclasses import dataclass, field
+from typing import AnyStr, Optional
+from .udev_rule_parser import RuleFile, parse_rules
+
+DEFAULT_RULE_DIRECTORY = '/etc/udev/rules.d'
+
+
+@dataclass(frozen=True)
+class RuleLocation:
+    """Class for the position of a rule in a rule file"""
+    filepath: AnyStr
+    line_number: int
+    name: Optional[AnyStr]
+
+
+@dataclass
+class RuleConflict:
+    """Class for a name, path or serial number used by rules at more than one location"""
+    kind: AnyStr
+    value: AnyStr
+    locations: list
+
+
+@dataclass
+class GlobalRuleIndex:
+    """Class for the merged name, serial and path indexes of all rule files in a directory.
+    The indexes map a value to the RuleLocation objects of the rules using it."""
+    files: list = field(default_factory=list)
+    skipped: list = field(default_factory=list)
+    names: dict = field(default_factory=dict)
+    serials: dict = field(default_factory=dict)
+    paths: dict = field(default_factory=dict)
+    devpaths: dict = field(default_factory=dict)
+
+    def has_path(self, path: AnyStr) -> bool:
+        """Checks if the path is used as ID_PATH or devpath in any rule"""
+        return path in self.paths or path in self.devpaths
+
+    def merge(self, filepath: AnyStr, rule_file: RuleFile):
+        """Adds the indexes of a parsed rule file to the global indexes
+
+        Args:
+            filepath: filepath of the rule file
+            rule_file: parsed rule file
+        """
+        self.files.append(filepath)
+        for own_index, file_index in ((self.names, rule_file.names), (self.serials, rule_file.serials),
+                                      (self.paths, rule_file.paths), (self.devpaths, rule_file.devpaths)):
+            for value, rules in file_index.items():
+                locations = own_index.setdefault(value, [])
+                locations.extend(RuleLocation(filepath, rule.line_number, rule.name) for rule in rules)
+
+
+def list_rule_files(directory: AnyStr) -> list:
+    """Lists all *.rules files of a directory in the order udev reads them
+
+    Args:
+        directory: rule directory
+
+    Returns:
+        sorted list of file paths
+    """
+    with os.scandir(directory) as entries:
+        return sorted(entry.path for entry in entries if entry.name.endswith('.rules') and entry.is_file())
+
+
+def scan_rule_file(filepath: AnyStr) -> Optional[RuleFile]:
+    """Reads and parses a rule file if it passes the prefilter.
+    Files which contain neither a SYMLINK nor an OctoPrint marker are not parsed.
+
+    Args:
+        filepath: filepath of the rule file
+
+    Returns:
+        RuleFile object or None if the file was skipped or could not be read
+    """
+    try:
+        with open(filepath, 'rb') as file:
+            data = file.read()
+    except OSError:
+        return None
+
+    # files without these markers can not contain rules relevant for the conflict detection
+    if b'SYMLINK' not in data and b'octoprint' not in data.lower():
+        return None
+    return parse_rules(data.decode(errors='replace'))
+
+
+def scan_rule_directory(directory: AnyStr = DEFAULT_RULE_DIRECTORY, max_workers: Optional[int] = None) -> GlobalRuleIndex:
+    """Scans all rule files of a directory in parallel and merges their indexes.
+
+    Args:
+        directory: rule directory
+        max_workers: maximum number of threads, defaults to the ThreadPoolExecutor default
+
+    Returns:
+        GlobalRuleIndex of all scanned files
+    """
+    # imported on use, so commands not scanning a directory do not load concurrent.futures
+    from concurrent.futures import ThreadPoolExecutor
+
+    filepaths = list_rule_files(directory)
+    index = GlobalRuleIndex()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for filepath, rule_file in zip(filepaths, executor.map(scan_rule_file, filepaths)):
+            if rule_file is None:
+                index.skipped.append(filepath)
+            else:
+                index.merge(filepath, rule_file)
+
+    return index
+
+
+def find_conflicts(index: GlobalRuleIndex) -> list:
+    """Finds all names, serial numbers and paths used by more than one rule
+
+    Args:
+        index: global rule index as created by scan_rule_directory
+
+    Returns:
+        List of RuleConflict objects
+    """
+    conflicts = []
+    for kind, kind_index in (('name', index.names), ('serial', index.serials), ('path', index.paths), ('devpath', index.devpaths)):
+        for value, locations in kind_index.items():
+            if len(locations) > 1:
+                conflicts.append(RuleConflict(kind, value, locations))
+    return conflicts
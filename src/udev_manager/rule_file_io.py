@@ -0,0 +1,104 @@
+import os
+import tempfile
+from typing import AnyStr, Callable, Iterable, Optional
+
+
+def _write_all(file_descriptor: int, data: bytes):
+    view = memoryview(data)
+    while view:
+        written = os.write(file_descriptor, view)
+        view = view[written:]
+
+
+def _fsync_directory(directory: AnyStr):
+    try:
+        file_descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(file_descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(file_descriptor)
+
+
+def append_rule_to_file(filepath: AnyStr, rule: AnyStr):
+    """Appends a rule to the udev file without rewriting the existing content.
+    The file is opened with O_APPEND, so only the bytes of the new rule are written, and synced to disk afterwards.
+    A line break is inserted first if the file does not end with one.
+
+    Args:
+        filepath: filepath of the udev rule file
+        rule: string of the new rule
+    """
+    if not rule.endswith("\n"):
+        rule += "\n"
+
+    file_descriptor = os.open(filepath, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        size = os.fstat(file_descriptor).st_size
+        if size > 0 and os.pread(file_descriptor, 1, size - 1) != b"\n":
+            rule = "\n" + rule
+        _write_all(file_descriptor, rule.encode())
+        os.fsync(file_descriptor)
+    finally:
+        os.close(file_descriptor)
+
+
+def write_rule_file(filepath: AnyStr, file_content: AnyStr):
+    """Replaces the content of the udev file atomically.
+    The content is written to a temporary file in the same directory, synced to disk and renamed over the original,
+    so the file is never left partially written. The permissions, owner and group of the original file are kept.
+
+    Args:
+        filepath: filepath of the udev rule file
+        file_content: new content of the file
+    """
+    replace_rule_file_lines(filepath, [file_content])
+
+
+def replace_rule_file_lines(filepath: AnyStr, lines: Iterable[AnyStr], should_replace: Optional[Callable[[], bool]] = None) -> bool:
+    """Replaces the content of the udev file atomically with the given lines.
+    The lines are streamed into a temporary file in the same directory, which is synced to disk and renamed over
+    the original. The permissions, owner and group of the original file are kept.
+
+    Args:
+        filepath: filepath of the udev rule file
+        lines: lines (including line breaks) of the new content, may be a generator
+        should_replace: called after all lines are written. If it returns False, the temporary file is discarded
+            and the original file is left untouched.
+
+    Returns:
+        True if the file was replaced
+    """
+    directory = os.path.dirname(os.path.abspath(filepath))
+    file_descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=".octodocker-", suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, 'w') as file:
+            try:
+                original = os.stat(filepath)
+            except FileNotFoundError:
+                os.fchmod(file.fileno(), 0o644)
+            else:
+                temp = os.fstat(file.fileno())
+                if (temp.st_uid, temp.st_gid) != (original.st_uid, original.st_gid):
+                    os.fchown(file.fileno(), original.st_uid, original.st_gid)
+                # after the owner, changing it clears the setuid and setgid bits
+                os.fchmod(file.fileno(), original.st_mode & 0o7777)
+            file.writelines(lines)
+            file.flush()
+            os.fsync(file.fileno())
+
+        if should_replace is not None and not should_replace():
+            os.unlink(temp_path)
+            return False
+
+        os.replace(temp_path, filepath)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+    _fsync_directory(directory)
+    return True
@@ -0,0 +1,190 @@
+import re
+from typing import AnyStr, Iterable, Optional
+from .udev_rule_parser import RuleToken, tokenize_line
+
+GROUP_LABEL_PREFIX = 'octodocker_'
+GROUP_END_LABEL = f'{GROUP_LABEL_PREFIX}end'
+# ATTRS keys walk the parent devices on every event, the usb_id builtin of 60-serial.rules already imports the
+# same values as properties of the tty device
+ENV_EQUIVALENTS = {
+    'ATTRS{idVendor}': 'ENV{ID_VENDOR_ID}',
+    'ATTRS{idProduct}': 'ENV{ID_MODEL_ID}',
+    'ATTRS{serial}': 'ENV{ID_SERIAL_SHORT}',
+}
+# values usb_id imports unchanged, other characters are replaced, so their attribute can not be converted
+_SAFE_VALUE_PATTERN = re.compile(r'^[A-Za-z0-9#+\-.:=@_]+$')
+_GROUP_KEYS = ('GOTO', 'LABEL')
+
+
+def format_rule(tokens: Iterable[RuleToken]) -> AnyStr:
+    """Formats rule tokens as a single rule line
+
+    Args:
+        tokens: tokens of the rule
+
+    Returns:
+        rule line without line break
+    """
+    return ', '.join(f'{token.key}{token.operator}"{token.value}"' for token in tokens)
+
+
+def convert_attrs_to_env(tokens: tuple) -> tuple:
+    """Replaces the ATTRS comparisons of vendor id, model id and serial number by the properties usb_id imports
+
+    Args:
+        tokens: tokens of a rule
+
+    Returns:
+        tokens with the convertible ATTRS comparisons replaced
+    """
+    return tuple(RuleToken(ENV_EQUIVALENTS[token.key], token.operator, token.value)
+                 if token.key in ENV_EQUIVALENTS and token.operator == '==' and _SAFE_VALUE_PATTERN.match(token.value)
+                 else token for token in tokens)
+
+
+def _get_value(tokens: tuple, keys: tuple) -> Optional[AnyStr]:
+    for token in tokens:
+        if token.key in keys and token.operator == '==':
+            return token.value
+    return None
+
+
+def get_group_label(vendor_id: Optional[AnyStr], model_id: Optional[AnyStr]) -> AnyStr:
+    """Gets the label ending the group of a vendor and model id
+
+    Args:
+        vendor_id: vendor id of the group
+        model_id: model id of the group
+
+    Returns:
+        label name
+    """
+    return re.sub(r'\W', '_', f"{GROUP_LABEL_PREFIX}{vendor_id or 'any'}_{model_id or 'any'}_end")
+
+
+def get_group_key(tokens: tuple) -> tuple:
+    """Gets the vendor and model id group of a rule.
+    The guards compare properties, so only values compared as properties can select the group.
+
+    Args:
+        tokens: tokens of the rule
+
+    Returns:
+        (str, str) vendor and model id, None if the rule does not compare it as property
+    """
+    return _get_value(tokens, ('ENV{ID_VENDOR_ID}',)), _get_value(tokens, ('ENV{ID_MODEL_ID}',))
+
+
+def is_group_line(tokens: tuple) -> bool:
+    """Checks if rule tokens are a guard or label of a grouped block.
+    GOTO and LABEL lines with other labels were not created by octodocker and are not group lines."""
+    return any(token.key in _GROUP_KEYS and token.value.startswith(GROUP_LABEL_PREFIX) for token in tokens)
+
+
+def group_rules(rule_lines: Iterable[AnyStr]) -> dict:
+    """Groups rules by their vendor and model id after converting their ATTRS comparisons (see convert_attrs_to_env).
+    Comments and the guard and label lines of a previous grouping are dropped.
+
+    Args:
+        rule_lines: rules, strings may contain several lines
+
+    Returns:
+        (vendor id, model id) -> list of token tuples in the order of the rules
+    """
+    groups = {}
+    for text in rule_lines:
+        for line in text.splitlines():
+            tokens = tokenize_line(line)
+            if not tokens or is_group_line(tokens):
+                continue
+            tokens = convert_attrs_to_env(tokens)
+            groups.setdefault(get_group_key(tokens), []).append(tokens)
+    return groups
+
+
+def _get_match_tokens(tokens: tuple) -> frozenset:
+    return frozenset(token for token in tokens if token.operator in ('==', '!=') and token.key != 'ACTION')
+
+
+def _get_action(tokens: tuple) -> Optional[AnyStr]:
+    return _get_value(tokens, ('ACTION',))
+
+
+def _format_rules(rules: list, guarded: set, merge_pairs: bool) -> list:
+    lines = []
+    merged = set()
+    for index, tokens in enumerate(rules):
+        if index in merged:
+            continue
+        pair = None
+        matches = _get_match_tokens(tokens)
+        # ATTRS comparisons are evaluated per parent device, negating them does not negate the match
+        guards = [token for token in tokens if token in matches - guarded and token.operator == '=='
+                  and token.key != 'SUBSYSTEM' and not token.key.startswith('ATTRS{')]
+        if merge_pairs and guards and _get_action(tokens) == 'add':
+            pair = next((other for other in range(index + 1, len(rules)) if other not in merged
+                         and _get_action(rules[other]) == 'remove' and _get_match_tokens(rules[other]) == matches), None)
+        if pair is None:
+            lines.append(format_rule(tokens))
+            continue
+
+        # the add and remove rule share their device match, one failed guard skips both
+        merged.add(pair)
+        name = _get_value(tokens, ('SYMLINK',)) or guards[0].value
+        label = re.sub(r'\W', '_', f"{GROUP_LABEL_PREFIX}{name}_end")
+        lines.extend(f'{token.key}!="{token.value}", GOTO="{label}"' for token in guards)
+        lines.append(format_rule(tokens))
+        lines.append(format_rule(rules[pair]))
+        lines.append(f'LABEL="{label}"')
+    return lines
+
+
+def format_groups(groups: dict, merge_pairs: bool = False) -> AnyStr:
+    """Formats grouped rules as a guarded block: a single SUBSYSTEM!="tty" check jumps over the whole block and each
+    vendor and model id group is skipped with ENV checks if the device does not match. Rules without vendor and
+    model id can not be skipped and are placed after the groups.
+    Every rule line stays a complete rule, so the rules can still be parsed and removed line by line.
+
+    Args:
+        groups: (vendor id, model id) -> list of token tuples as returned by group_rules, in the order of the block
+        merge_pairs: put each add rule and the remove rule with the same device match (create_startstop_udev_rule)
+            under a guard of their own, so a device not matching skips both with one comparison
+
+    Returns:
+        grouped rule block ending with a line break
+    """
+    lines = [f'SUBSYSTEM!="tty", GOTO="{GROUP_END_LABEL}"']
+    for (vendor_id, model_id), rules in sorted(groups.items(), key=lambda item: item[0] == (None, None)):
+        if vendor_id is None and model_id is None:
+            lines.extend(_format_rules(rules, set(), merge_pairs))
+            continue
+        label = get_group_label(vendor_id, model_id)
+        guarded = set()
+        if vendor_id is not None:
+            lines.append(f'ENV{{ID_VENDOR_ID}}!="{vendor_id}", GOTO="{label}"')
+            guarded.add(RuleToken('ENV{ID_VENDOR_ID}', '==', vendor_id))
+        if model_id is not None:
+            lines.append(f'ENV{{ID_MODEL_ID}}!="{model_id}", GOTO="{label}"')
+            guarded.add(RuleToken('ENV{ID_MODEL_ID}', '==', model_id))
+        lines.extend(_format_rules(rules, guarded, merge_pairs))
+        lines.append(f'LABEL="{label}"')
+    lines.append(f'LABEL="{GROUP_END_LABEL}"')
+    return '\n'.join(lines) + '\n'
+
+
+def create_grouped_rules(rule_lines: Iterable[AnyStr]) -> AnyStr:
+    """Creates a guarded block of rules, which udevd can skip for most events:
+    a single SUBSYSTEM!="tty" check jumps over the whole block, the rules are grouped by vendor and model id and
+    each group is skipped with one ENV check if the device does not match. ATTRS comparisons are converted to ENV
+    comparisons where usb_id imports the value, so matching does not walk the parent devices.
+    Every rule line stays a complete rule, so the rules can still be parsed and removed line by line.
+    Guard and label lines of a previous grouping are dropped, so a grouped block can be grouped again.
+
+    Args:
+        rule_lines: rules as created by create_udev_rule, create_startstop_udev_rule or create_symlink_udev_rule,
+            strings may contain several lines
+
+    Returns:
+        grouped rule block ending with a line break
+    """
+    return format_groups(group_rules(rule_lines))
@@ -0,0 +1,208 @@
+import re
+from dataclasses import dataclass, field
+from typing import AnyStr
+from .rule_file_io import replace_rule_file_lines
+from .rule_cost import RuleCost, UdevEvent, estimate_rule_cost
+from .rule_grouping import ENV_EQUIVALENTS, GROUP_LABEL_PREFIX, convert_attrs_to_env, format_groups, format_rule, get_group_key, is_group_line
+from .udev_rule_parser import tokenize_line
+
+_SEPARATORS = re.compile(r'[\s,]')
+_ASSIGN_OPERATORS = ('=', '+=', '-=', ':=')
+_ATTRIBUTE_EQUIVALENTS = {env: attrs for attrs, env in ENV_EQUIVALENTS.items()}
+
+
+@dataclass
+class OptimizeResult:
+    """Class for an optimized rule file and what was changed"""
+    content: AnyStr
+    dead: list = field(default_factory=list)
+    duplicates: list = field(default_factory=list)
+    converted: int = 0
+    kept: list = field(default_factory=list)
+
+
+def _is_fully_tokenized(line: AnyStr, tokens: tuple) -> bool:
+    return _SEPARATORS.sub('', line) == _SEPARATORS.sub('', format_rule(tokens))
+
+
+def _get_device_match(tokens: tuple) -> frozenset:
+    return frozenset(token for token in tokens if token.operator in ('==', '!=') and token.key != 'ACTION')
+
+
+def _is_tty_rule(tokens: tuple) -> bool:
+    return any(token.key == 'SUBSYSTEM' and token.operator == '==' and token.value == 'tty' for token in tokens)
+
+
+def _is_remove_rule(tokens: tuple) -> bool:
+    return any(token.key == 'ACTION' and token.operator == '==' and token.value == 'remove' for token in tokens)
+
+
+def _find_foreign_blocks(lines: list) -> set:
+    """Finds the lines from a GOTO not created by octodocker up to its LABEL, which have to stay unchanged in place"""
+    labels = {}
+    for index, line in enumerate(lines):
+        for token in tokenize_line(line):
+            if token.key == 'LABEL':
+                labels.setdefault(token.value, []).append(index)
+
+    block = set()
+    end = -1
+    for index, line in enumerate(lines):
+        for token in tokenize_line(line):
+            if token.key == 'GOTO' and not token.value.startswith(GROUP_LABEL_PREFIX):
+                # udevd ignores a GOTO without a LABEL after it
+                end = max([end] + [label for label in labels.get(token.value, ()) if label > index][:1])
+        if index <= end:
+            block.add(index)
+    return block
+
+
+def optimize_rules(file_content: AnyStr) -> OptimizeResult:
+    """Compacts the rules of a rule file and rewrites them as a guarded block (see format_groups):
+    - guard and label lines of a previous optimization (labels starting with octodocker_) are dropped and recreated
+    - rules without assignments and remove rules without a rule for the same device are dropped (dead)
+    - rules equal to an earlier rule (after the ATTRS conversion, ignoring the order of the keys) are dropped
+    - ATTRS comparisons are converted to ENV comparisons where usb_id imports the value
+    - vendor and model id groups with more rules are placed first, start/stop pairs share a guard
+    The block takes the place of the first rule moved into it. Comments, rules that are not for tty devices or can
+    not be parsed completely and everything from a GOTO not created by octodocker up to its LABEL are kept
+    unchanged in place.
+
+    Args:
+        file_content: content of the udev rule file
+
+    Returns:
+        OptimizeResult with the new content
+    """
+    result = OptimizeResult('')
+    lines = file_content.splitlines()
+    foreign = _find_foreign_blocks(lines)
+    output = []
+    block_position = None
+    rules = []
+    for index, line in enumerate(lines):
+        tokens = tokenize_line(line)
+        if not line.strip():
+            continue
+        if index in foreign or not tokens or not _is_fully_tokenized(line, tokens) or not _is_tty_rule(tokens) \
+                and not is_group_line(tokens):
+            result.kept.append(line)
+            output.append(line)
+            continue
+        if is_group_line(tokens):
+            continue
+        if not any(token.operator in _ASSIGN_OPERATORS for token in tokens):
+            result.dead.append(line)
+            continue
+        if block_position is None:
+            block_position = len(output)
+        converted = convert_attrs_to_env(tokens)
+        result.converted += converted != tokens
+        rules.append((line, converted))
+
+    device_rules = {_get_device_match(tokens) for _, tokens in rules if not _is_remove_rule(tokens)}
+    seen = set()
+    groups = {}
+    for line, tokens in rules:
+        if _is_remove_rule(tokens) and _get_device_match(tokens) not in device_rules:
+            result.dead.append(line)
+            continue
+        if frozenset(tokens) in seen:
+            result.duplicates.append(line)
+            continue
+        seen.add(frozenset(tokens))
+        groups.setdefault(get_group_key(tokens), []).append(tokens)
+
+    if groups:
+        # an event passes the guards of all groups in front of its own, larger groups first lowers the average
+        groups = dict(sorted(groups.items(), key=lambda item: -len(item[1])))
+        output[block_position:block_position] = format_groups(groups, merge_pairs=True).splitlines()
+    result.content = ''.join(f'{line}\n' for line in output)
+    return result
+
+
+def optimize_rule_file(filepath: AnyStr, write: bool = True) -> (AnyStr, OptimizeResult):
+    """Optimizes a rule file (see optimize_rules) and replaces it atomically.
+    The file is only replaced if its content did not change while the new content was written.
+
+    Args:
+        filepath: filepath of the udev rule file
+        write: replace the file, False only computes the result (dry run)
+
+    Returns:
+        (str, OptimizeResult) previous content of the file and the result
+
+    Raises:
+        ValueError: if the file was changed during the optimization
+    """
+    with open(filepath) as file:
+        content = file.read()
+    result = optimize_rules(content)
+    if not write or result.content == content:
+        return content, result
+
+    def unchanged() -> bool:
+        with open(filepath) as current:
+            return current.read() == content
+
+    if not replace_rule_file_lines(filepath, [result.content], unchanged):
+        raise ValueError(f"{filepath} was changed during the optimization, nothing was written")
+    return content, result
+
+
+def create_device_event(tokens: tuple, action: AnyStr = 'add') -> UdevEvent:
+    """Creates the event of a usb serial device matching a rule, used to estimate the cost of a rule file.
+    Values the rule compares as property or attribute are set as both, where usb_id imports the attribute
+    (see ENV_EQUIVALENTS). Attributes are placed on the usb device, three levels above the tty device.
+
+    Args:
+        tokens: tokens of the rule
+        action: udev action of the event
+
+    Returns:
+        UdevEvent with the properties and attributes the rule compares
+    """
+    properties = {'SUBSYSTEM': 'tty', 'ACTION': action}
+    usb_device = {}
+    for token in tokens:
+        if token.operator != '==':
+            continue
+        key = _ATTRIBUTE_EQUIVALENTS.get(token.key, token.key)
+        if key.startswith('ATTRS{'):
+            usb_device[key[6:-1]] = token.value
+        equivalent = ENV_EQUIVALENTS.get(key, key)
+        if equivalent.startswith('ENV{'):
+            properties[equivalent[4:-1]] = token.value
+    return UdevEvent(properties, [{}, {}, {}, usb_device, {}])
+
+
+def _average_cost(costs: list) -> RuleCost:
+    return RuleCost(*(round(sum(getattr(cost, name) for cost in costs) / len(costs))
+                      for name in ('lines', 'comparisons', 'parent_lookups', 'matched')))
+
+
+def compare_file_costs(before: AnyStr, after: AnyStr) -> dict:
+    """Estimates the cost of two versions of a rule file for an event of another subsystem, of an unknown tty device
+    and on average for the add events of the devices of the first version
+
+    Args:
+        before: content of the rule file before the change
+        after: content of the rule file after the change
+
+    Returns:
+        event description -> (RuleCost before, RuleCost after)
+    """
+    events = {
+        'other subsystem': UdevEvent({'SUBSYSTEM': 'block', 'ACTION': 'add'}),
+        'unknown tty device': UdevEvent({'SUBSYSTEM': 'tty', 'ACTION': 'add'}, [{}, {}, {}, {}, {}]),
+    }
+    costs = {name: (estimate_rule_cost(before, event), estimate_rule_cost(after, event)) for name, event in events.items()}
+
+    symlink_rules = {frozenset(tokens) for tokens in map(tokenize_line, before.splitlines())
+                     if any(token.key == 'SYMLINK' for token in tokens) and _is_tty_rule(tokens)}
+    devices = [create_device_event(tokens) for tokens in symlink_rules]
+    if devices:
+        costs[f'printer add (average of {len(devices)})'] = (
+            _average_cost([estimate_rule_cost(before, event) for event in devices]),
+            _average_cost([estimate_rule_cost(after, event) for event in devices]))
+    return costs
@@ -0,0 +1,73 @@
+import subprocess
+from typing import AnyStr, Callable, Iterable, Optional
+from .device_matcher import rule_matches_device
+from .udev_rule_parser import Rule
+from .udev_scraper import DeviceInventory, get_default_inventory
+
+UDEVADM = 'udevadm'
+
+
+def run_command(command: list) -> int:
+    """Runs a command and waits for it to finish
+
+    Args:
+        command: program and arguments
+
+    Returns:
+        exit code of the command, -1 if it could not be executed
+    """
+    try:
+        return subprocess.run(command, stdout=subprocess.DEVNULL).returncode
+    except OSError:
+        return -1
+
+
+def find_rule_sys_paths(rules: Iterable[Rule], inventory: Optional[DeviceInventory] = None) -> list:
+    """Finds the sys paths of the connected devices matching one of the rules.
+    Only rules identifying a device by serial, path or devpath are considered, guard lines of a grouped block and
+    rules for every device of a kind would otherwise select all devices.
+
+    Args:
+        rules: parsed rules
+        inventory: device inventory, the inventory of the process if None
+
+    Returns:
+        sorted list of sys paths
+    """
+    rules = [rule for rule in rules if not rule.is_comment and (rule.serial or rule.path or rule.devpath)]
+    devices = (inventory or get_default_inventory()).get_devices()
+    return sorted(sys_path for sys_path, device in devices.items() if any(rule_matches_device(rule, device) for rule in rules))
+
+
+def create_reload_commands(sys_paths: list, action: AnyStr = 'change') -> list:
+    """Creates the udevadm commands reloading the rules and replaying an event for the given devices only
+
+    Args:
+        sys_paths: sys paths of the devices to trigger
+        action: action of the triggered events
+
+    Returns:
+        list of commands, the trigger is left out if there are no devices
+    """
+    commands = [[UDEVADM, 'control', '--reload']]
+    if sys_paths:
+        commands.append([UDEVADM, 'trigger', f'--action={action}', *sys_paths])
+    return commands
+
+
+def reload_rules(sys_paths: list, action: AnyStr = 'change', runner: Callable[[list], int] = run_command) -> bool:
+    """Makes udevd reload the rule files and replays an event for the given devices, so changed rules apply to
+    connected devices without triggering every device of the host
+
+    Args:
+        sys_paths: sys paths of the devices to trigger
+        action: action of the triggered events, 'add' also runs the start commands of the rules
+        runner: runs a command and returns its exit code
+
+    Returns:
+        True if all commands succeeded, the devices are not triggered if the reload failed
+    """
+    for command in create_reload_commands(sys_paths, action):
+        if runner(command) != 0:
+            return False
+    return True
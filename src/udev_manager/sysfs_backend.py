@@ -0,0 +1,118 @@
+import os
+from typing import AnyStr, Optional
+
+
+class SysfsAttributes:
+    """Class for reading the sysfs attributes of a device like pyudev.Attributes: values are read on access and
+    returned as bytes without the trailing line break"""
+
+    def __init__(self, sys_path: AnyStr):
+        self.sys_path = sys_path
+
+    def get(self, key: AnyStr, default=None) -> Optional[bytes]:
+        """Reads an attribute of the device
+
+        Args:
+            key: name of the attribute file
+            default: value returned if the device does not have the attribute
+
+        Returns:
+            value of the attribute or default
+        """
+        try:
+            with open(os.path.join(self.sys_path, key), 'rb') as file:
+                return file.read().rstrip(b'\n')
+        except OSError:
+            return default
+
+
+class SysfsDevice:
+    """Class for a device read directly from sysfs and the udev database, providing the part of the pyudev.Device
+    interface used by DeviceInventory (sys_path, get, attributes and ancestors).
+    The properties are read from the udev database entry of the device once they are needed."""
+
+    def __init__(self, context: 'SysfsContext', sys_path: AnyStr):
+        self.context = context
+        self.sys_path = sys_path
+        self.attributes = SysfsAttributes(sys_path)
+        self._properties = None
+
+    @property
+    def properties(self) -> dict:
+        """Properties of the udev database entry of the device (E: lines), empty if there is no entry"""
+        if self._properties is None:
+            self._properties = self.context.read_properties(self.attributes.get('dev'))
+        return self._properties
+
+    def get(self, key: AnyStr, default=None) -> Optional[AnyStr]:
+        """Gets a property of the device.
+        Like with pyudev, a device without udev database entry (udevd not running or the device not processed yet)
+        has no properties, so it has no ID_PATH and is not listed by DeviceInventory.
+
+        Args:
+            key: name of the property
+            default: value returned if the device does not have the property
+
+        Returns:
+            value of the property or default
+        """
+        return self.properties.get(key, default)
+
+    @property
+    def ancestors(self):
+        """Parent devices from the closest one up to the root of /sys/devices"""
+        path = os.path.dirname(self.sys_path)
+        while len(path) > len(self.context.devices_root) and path.startswith(self.context.devices_root):
+            if os.path.exists(os.path.join(path, 'uevent')):
+                yield SysfsDevice(self.context, path)
+            path = os.path.dirname(path)
+
+
+class SysfsContext:
+    """Class for enumerating devices by walking sysfs with os.scandir instead of libudev, providing the part of the
+    pyudev.Context interface used by DeviceInventory.
+    The root is prepended to /sys and /run/udev/data, so a fake tree can be used. Udev events can not be received
+    without libudev, so an inventory using this context enumerates the devices on every request."""
+    monitoring = False
+
+    def __init__(self, root: AnyStr = '/'):
+        self.root = root
+        self.devices_root = os.path.join(os.path.realpath(os.path.join(root, 'sys', 'devices')), '')
+        self.database = os.path.join(root, 'run', 'udev', 'data')
+
+    def list_devices(self, subsystem: AnyStr) -> list:
+        """Lists the devices of a subsystem through the links of /sys/class
+
+        Args:
+            subsystem: subsystem (class) of the devices
+
+        Returns:
+            list of SysfsDevice objects
+        """
+        try:
+            entries = list(os.scandir(os.path.join(self.root, 'sys', 'class', subsystem)))
+        except FileNotFoundError:
+            return []
+        return [SysfsDevice(self, os.path.realpath(entry.path)) for entry in entries]
+
+    def read_properties(self, dev: Optional[bytes]) -> dict:
+        """Reads the properties of a character device from the udev database
+
+        Args:
+            dev: content of the dev attribute of the device (major:minor)
+
+        Returns:
+            property name -> value, empty if the device has no entry
+        """
+        if dev is None:
+            return {}
+        properties = {}
+        try:
+            with open(os.path.join(self.database, f"c{dev.decode('ascii')}")) as file:
+                for line in file:
+                    if line.startswith('E:'):
+                        key, _, value = line[2:].rstrip('\n').partition('=')
+                        properties[key] = value
+        except OSError:
+            return {}
+        return properties
@@ -30,41 +30,98 @@ def create_rule_env(parameter_name: AnyStr, parameter_value: AnyStr) -> AnyStr:
     return f'ENV{{{parameter_name}}}=="{parameter_value}"'
 
 
-def create_startstop_udev_rule(name: AnyStr, start_command: AnyStr, stop_command: AnyStr, serial: AnyStr = None, path: AnyStr = None, vendor_id: AnyStr = None, model_id: AnyStr = None) -> AnyStr:
+def create_env_match(serial: AnyStr = None, path: AnyStr = None, vendor_id: AnyStr = None, model_id: AnyStr = None) -> AnyStr:
     """
-    Creates an udev rule for a serial usb device. The udev rule creates a symlink to the device with the name specified in the name parameter
-    On connect and disconnect, the respective command is executed. The commands have to be specified with absolute file paths
+    Creates the match part of an udev rule comparing the environment variables udev imports for usb devices.
     Either the serial number or the path has to be specified.
 
     Args:
-        name: name for the usb device
-        start_command: linux command to execute when the device is connected. All file paths have to be absolute
-        stop_command: linux command to execute when the device is disconnected. All file paths have to be absolute
         serial: serial number of the device. If not specified, a path has to be specified
         path: usb path of the device. If not specified, a serial number has to be specified
         vendor_id: vendor it of the device
         model_id:  model id of the device
 
     Returns:
-        string of the complete udev rule
+        string of the match keys, ending with a separator
 
     Raises:
-        ValueError: If serial and devpath are None
+        ValueError: If serial and path are None
     """
-    config_add = f'SUBSYSTEM=="tty", '
+    config = f'SUBSYSTEM=="tty", '
 
     if vendor_id is not None:
-        config_add += f'{create_rule_env("ID_VENDOR_ID", vendor_id)}, '
+        config += f'{create_rule_env("ID_VENDOR_ID", vendor_id)}, '
     if model_id is not None:
-        config_add += f'{create_rule_env("ID_MODEL_ID", model_id)}, '
+        config += f'{create_rule_env("ID_MODEL_ID", model_id)}, '
 
     if serial is not None:
-        config_add += f'{create_rule_env("ID_SERIAL", serial)}, '
+        config += f'{create_rule_env("ID_SERIAL", serial)}, '
     elif path is not None:
-        config_add += f'{create_rule_env("ID_PATH", path)}, '
+        config += f'{create_rule_env("ID_PATH", path)}, '
     else:
         raise ValueError("Either serial or devpath has to be specified")
 
+    return config
+
+
+def create_symlink_udev_rule(name: AnyStr, compose_filepath: AnyStr, serial: AnyStr = None, path: AnyStr = None, vendor_id: AnyStr = None, model_id: AnyStr = None, standby_timeout: int = None, service: AnyStr = None) -> AnyStr:
+    """
+    Creates an udev rule for a serial usb device which only creates a symlink to the device with the name specified
+    in the name parameter. The docker compose file of the device is stored in the OCTODOCKER_COMPOSE environment
+    variable, so the hotplug daemon ('octodocker watch') can start and stop the container. If a standby timeout is
+    specified, it is stored in the OCTODOCKER_STANDBY environment variable. The service of a container in the
+    shared compose project is stored in the OCTODOCKER_SERVICE environment variable.
+    Either the serial number or the path has to be specified.
+
+    Args:
+        name: name for the usb device
+        compose_filepath: absolute filepath of the docker compose file of the device
+        serial: serial number of the device. If not specified, a path has to be specified
+        path: usb path of the device. If not specified, a serial number has to be specified
+        vendor_id: vendor it of the device
+        model_id:  model id of the device
+        standby_timeout: seconds the container stays paused after a disconnect before it is stopped
+        service: service of the container in the shared compose project
+
+    Returns:
+        string of the complete udev rule
+
+    Raises:
+        ValueError: If serial and path are None
+    """
+    config = create_env_match(serial, path, vendor_id, model_id)
+    config += (f'SYMLINK+="{name}", '
+               f'ENV{{OCTODOCKER_COMPOSE}}="{compose_filepath}"')
+    if standby_timeout is not None:
+        config += f', ENV{{OCTODOCKER_STANDBY}}="{standby_timeout}"'
+    if service is not None:
+        config += f', ENV{{OCTODOCKER_SERVICE}}="{service}"'
+    return config
+
+
+def create_startstop_udev_rule(name: AnyStr, start_command: AnyStr, stop_command: AnyStr, serial: AnyStr = None, path: AnyStr = None, vendor_id: AnyStr = None, model_id: AnyStr = None) -> AnyStr:
+    """
+    Creates an udev rule for a serial usb device. The udev rule creates a symlink to the device with the name specified in the name parameter
+    On connect and disconnect, the respective command is executed. The commands have to be specified with absolute file paths
+    Either the serial number or the path has to be specified.
+
+    Args:
+        name: name for the usb device
+        start_command: linux command to execute when the device is connected. All file paths have to be absolute
+        stop_command: linux command to execute when the device is disconnected. All file paths have to be absolute
+        serial: serial number of the device. If not specified, a path has to be specified
+        path: usb path of the device. If not specified, a serial number has to be specified
+        vendor_id: vendor it of the device
+        model_id:  model id of the device
+
+    Returns:
+        string of the complete udev rule
+
+    Raises:
+        ValueError: If serial and devpath are None
+    """
+    config_add = create_env_match(serial, path, vendor_id, model_id)
+
     config_remove = config_add
 
     config_add += (f'SYMLINK+="{name}", '
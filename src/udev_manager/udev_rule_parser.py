@@ -0,0 +1,193 @@
+import re
+from dataclasses import dataclass, field
+from typing import AnyStr, Optional
+from .device_data import DeviceData
+
+# a single "KEY{attribute}OPERATOR"value"" assignment or comparison, optionally followed by a comma.
+# The value may contain escaped characters, which keeps the expression free of nested quantifiers.
+_TOKEN_PATTERN = re.compile(r'\s*([A-Za-z_]+(?:\{[^{}"]*\})?)\s*(==|!=|\+=|-=|:=|=)\s*"((?:[^"\\]|\\.)*)"\s*,?')
+
+NAME_KEYS = ('SYMLINK',)
+VENDOR_KEYS = ('ATTRS{idVendor}', 'ENV{ID_VENDOR_ID}')
+MODEL_KEYS = ('ATTRS{idProduct}', 'ENV{ID_MODEL_ID}')
+# the serial attribute of the usb device is imported as ID_SERIAL_SHORT, ID_SERIAL also contains vendor and model
+SHORT_SERIAL_KEYS = ('ATTRS{serial}', 'ENV{ID_SERIAL_SHORT}')
+LONG_SERIAL_KEYS = ('ENV{ID_SERIAL}',)
+SERIAL_KEYS = SHORT_SERIAL_KEYS + LONG_SERIAL_KEYS
+DEVPATH_KEYS = ('ATTRS{devpath}',)
+PATH_KEYS = ('ENV{ID_PATH}',)
+COMPOSE_KEYS = ('ENV{OCTODOCKER_COMPOSE}',)
+STANDBY_KEYS = ('ENV{OCTODOCKER_STANDBY}',)
+SERVICE_KEYS = ('ENV{OCTODOCKER_SERVICE}',)
+RUN_KEYS = ('RUN',)
+
+
+@dataclass(frozen=True)
+class RuleToken:
+    """Class for a single key/operator/value entry of an udev rule"""
+    key: AnyStr
+    operator: AnyStr
+    value: AnyStr
+
+
+@dataclass
+class Rule:
+    """Class for a single line of an udev rule file.
+    Comments and blank lines are kept as rules without tokens, so the file can be reproduced from its rules."""
+    line_number: int
+    text: AnyStr
+    tokens: tuple = ()
+
+    @property
+    def is_comment(self) -> bool:
+        """True if the line is a comment or blank line"""
+        return len(self.tokens) == 0
+
+    def get(self, keys: tuple, operators: tuple = ('==',)) -> Optional[AnyStr]:
+        """Gets the value of the first token matching one of the keys and operators
+
+        Args:
+            keys: keys (e.g. ATTRS{serial}) to look for
+            operators: operators the token has to use
+
+        Returns:
+            value of the first matching token or None
+        """
+        for token in self.tokens:
+            if token.key in keys and token.operator in operators:
+                return token.value
+        return None
+
+    @property
+    def name(self) -> Optional[AnyStr]:
+        """Symlink name created by the rule"""
+        return self.get(NAME_KEYS, ('+=', '=', ':='))
+
+    @property
+    def action(self) -> Optional[AnyStr]:
+        """Action the rule is restricted to"""
+        return self.get(('ACTION',))
+
+    @property
+    def serial(self) -> Optional[AnyStr]:
+        """Serial number the rule matches"""
+        return self.get(SERIAL_KEYS)
+
+    @property
+    def path(self) -> Optional[AnyStr]:
+        """ID_PATH the rule matches"""
+        return self.get(PATH_KEYS)
+
+    @property
+    def devpath(self) -> Optional[AnyStr]:
+        """Devpath the rule matches"""
+        return self.get(DEVPATH_KEYS)
+
+    @property
+    def compose_file(self) -> Optional[AnyStr]:
+        """Docker compose file of rules created for the hotplug daemon"""
+        return self.get(COMPOSE_KEYS, ('=', ':='))
+
+    @property
+    def service(self) -> Optional[AnyStr]:
+        """Service of hotplug daemon rules whose container is part of the shared compose project"""
+        return self.get(SERVICE_KEYS, ('=', ':='))
+
+    @property
+    def run(self) -> Optional[AnyStr]:
+        """Command run by the rule"""
+        return self.get(RUN_KEYS, ('+=', '=', ':='))
+
+    @property
+    def standby_timeout(self) -> Optional[int]:
+        """Seconds the container of a hotplug daemon rule stays paused after a disconnect, None to stop it right away"""
+        value = self.get(STANDBY_KEYS, ('=', ':='))
+        return int(value) if value is not None and value.isdigit() else None
+
+    def to_device_data(self) -> DeviceData:
+        """Converts the match keys of the rule into a DeviceData object
+
+        Returns:
+            DeviceData object with the values used in the rule
+        """
+        return DeviceData(self.path, self.get(VENDOR_KEYS), self.get(MODEL_KEYS), self.serial, self.devpath)
+
+
+@dataclass
+class RuleFile:
+    """Class for a parsed udev rule file and its name, serial and path indexes.
+    The indexes map a value to the rules using it. Rules restricted to the remove action are not indexed
+    for serials and paths, since they always accompany an add rule."""
+    content: AnyStr
+    rules: list = field(default_factory=list)
+    names: dict = field(default_factory=dict)
+    serials: dict = field(default_factory=dict)
+    paths: dict = field(default_factory=dict)
+    devpaths: dict = field(default_factory=dict)
+
+    def has_path(self, path: AnyStr) -> bool:
+        """Checks if the path is used as ID_PATH or devpath in any rule"""
+        return path in self.paths or path in self.devpaths
+
+
+def tokenize_line(line: AnyStr) -> tuple:
+    """Splits a single rule line into its key/operator/value tokens.
+    Comments and blank lines result in an empty tuple, as do lines which can not be tokenized.
+
+    Args:
+        line: single line of an udev rule file
+
+    Returns:
+        tuple of RuleToken objects
+    """
+    stripped = line.strip()
+    if not stripped or stripped.startswith('#'):
+        return ()
+
+    tokens = []
+    position = 0
+    end = len(line)
+    while position < end:
+        match = _TOKEN_PATTERN.match(line, position)
+        if match is None:
+            break
+        tokens.append(RuleToken(match.group(1), match.group(2), match.group(3)))
+        position = match.end()
+    return tuple(tokens)
+
+
+def _add_to_index(index: dict, value: Optional[AnyStr], rule: Rule):
+    if value is not None:
+        index.setdefault(value, []).append(rule)
+
+
+def parse_rules(file_content: AnyStr, line_tokens: Optional[list] = None) -> RuleFile:
+    """Parses the content of an udev rule file in a single pass.
+
+    Args:
+        file_content: file content of the udev configuration file
+        line_tokens: tokens of every line as returned by tokenize_line (e.g. from a cache), the lines are tokenized
+            if not given
+
+    Returns:
+        RuleFile object containing all lines of the file and the name, serial, path and devpath indexes
+    """
+    rule_file = RuleFile(file_content)
+    lines = file_content.splitlines()
+    if line_tokens is None:
+        line_tokens = [tokenize_line(line) for line in lines]
+
+    for line_number, (line, tokens) in enumerate(zip(lines, line_tokens), start=1):
+        rule = Rule(line_number, line, tokens)
+        rule_file.rules.append(rule)
+        if rule.is_comment:
+            continue
+
+        _add_to_index(rule_file.names, rule.name, rule)
+        if rule.action == 'remove':
+            continue
+        _add_to_index(rule_file.serials, rule.serial, rule)
+        _add_to_index(rule_file.paths, rule.path, rule)
+        _add_to_index(rule_file.devpaths, rule.devpath, rule)
+
+    return rule_file
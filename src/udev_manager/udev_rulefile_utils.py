@@ -1,42 +1,59 @@
 import re
-from typing import AnyStr
+from typing import AnyStr, Callable, Iterable, Iterator, Optional
 from .device_data import DeviceData
+from .rule_file_io import replace_rule_file_lines
+from .udev_rule_parser import DEVPATH_KEYS, NAME_KEYS, PATH_KEYS, SERIAL_KEYS, Rule, RuleFile, parse_rules, tokenize_line
+
+
+def as_rule_file(file_content) -> RuleFile:
+    """Parses the file content unless it already is a parsed RuleFile
+
+    Args:
+        file_content: file content of the udev configuration file or a RuleFile object
+
+    Returns:
+        RuleFile object of the file content
+    """
+    if isinstance(file_content, RuleFile):
+        return file_content
+    return parse_rules(file_content)
 
 
 def get_serial_numbers(file_content: AnyStr) -> list:
     """Gets all serial numbers currently used in the udev file
 
     Args:
-        file_content: file content of the udev configuration file
+        file_content: file content of the udev configuration file or a parsed RuleFile
 
     Returns:
         List of all serial numbers used
     """
-    return re.findall('(?!.*remove)(?:ATTRS{serial}|ENV{ID_SERIAL})=="(.*?)"(?!.*remove)', file_content)
+    return list(as_rule_file(file_content).serials)
 
 
 def get_paths(file_content: AnyStr) -> list:
     """Gets all usb paths and devpaths currently used in the udev file
 
     Args:
-        file_content: file content of the udev configuration file
+        file_content: file content of the udev configuration file or a parsed RuleFile
 
     Returns:
         List of all paths and devpaths
     """
-    return re.findall('(?!.*remove)(?:ATTRS{devpath}|ENV{ID_PATH})=="(.*?)"(?!.*remove)', file_content)
+    rule_file = as_rule_file(file_content)
+    return list(rule_file.devpaths) + list(rule_file.paths)
 
 
 def get_names(file_content: AnyStr) -> list:
     """Gets all names (Symlink names) currently used in the udev file
 
     Args:
-        file_content: file content of the udev configuration file
+        file_content: file content of the udev configuration file or a parsed RuleFile
 
     Returns:
         List of all names (symlinks) used
     """
-    return re.findall('SYMLINK\+="(.*?)"', file_content)
+    return list(as_rule_file(file_content).names)
 
 
 def get_device_attribute(search_string: AnyStr, text: AnyStr, capture_group: int = 1):
@@ -63,41 +80,106 @@ def get_device_rules(file_content: AnyStr) -> dict:
     have an entry for the respective item, it is set to None.
 
     Args:
-        file_content: file content of the udev configuration file
+        file_content: file content of the udev configuration file or a parsed RuleFile
 
     Returns:
         Dictionary mapping the device names to their respective attributes.
         The attributes are stored as a DeviceData object.
     """
     devices = {}
-    entries = re.findall(".*SYMLINK.*\n", file_content)
-
-    for entry in entries:
-        name = get_device_attribute('SYMLINK\+="(.*?)"', entry)
-        vendor = get_device_attribute('(?:ATTRS{idVendor}|ENV{ID_VENDOR_ID})=="(.*?)"', entry)
-        product = get_device_attribute('(?:ATTRS{idProduct}|ENV{ID_MODEL_ID})=="(.*?)"', entry)
-        serial = get_device_attribute('(?:ATTRS{serial}|ENV{ID_SERIAL})=="(.*?)"', entry)
-        devpath = get_device_attribute('ATTRS{devpath}=="(.*?)"', entry)
-        path = get_device_attribute('ENV{ID_PATH}=="(.*?)"', entry)
 
+    for rule in as_rule_file(file_content).rules:
+        name = rule.name
         if name:
-            devices[name] = DeviceData(path, vendor, product, serial, devpath)
+            devices[name] = rule.to_device_data()
 
     return devices
 
 
-def remove_lines(text: AnyStr, to_remove: AnyStr, ) -> AnyStr:
-    """Removes a line from the text based on a pattern.
+def create_line_matcher(keys: tuple, value: AnyStr, operators: tuple = ('==',)) -> Callable[[AnyStr], bool]:
+    """Creates a matcher that checks whether a rule line compares one of the keys with the value.
+    Lines are first checked with a plain substring search for the quoted value and only tokenized if it is found,
+    so the time per line is linear in its length.
+
+    Args:
+        keys: keys (e.g. ATTRS{serial}) to look for
+        value: value the key has to be compared with
+        operators: operators the key has to be used with
+
+    Returns:
+        function returning True for matching lines
+    """
+    needle = f'"{value}"'
+
+    def matches(line: AnyStr) -> bool:
+        if needle not in line:
+            return False
+        return any(token.key in keys and token.operator in operators and token.value == value for token in tokenize_line(line))
+
+    return matches
+
+
+def remove_lines(text: AnyStr, matcher: Callable[[AnyStr], bool]) -> AnyStr:
+    """Removes lines from the text based on a matcher.
 
     Args:
         text: text to modify
-        to_remove: regex expression to use as a pattern
+        matcher: function returning True for the lines to remove (see create_line_matcher)
 
     Returns:
-        String without all lines containing a match to the pattern.
-        If no matches for the pattern were found, the string is returned unaltered
+        String without all lines the matcher returned True for.
+        If no lines matched, the string is returned unaltered
     """
-    return re.sub(f'.*{to_remove}.*\n?', '', text)
+    return ''.join(filter_lines(text.splitlines(keepends=True), matcher))
+
+
+def filter_lines(lines: Iterable[AnyStr], matcher: Callable[[AnyStr], bool]) -> Iterator[AnyStr]:
+    """Yields all lines the matcher returns False for.
+
+    Args:
+        lines: lines to filter
+        matcher: function returning True for the lines to remove
+
+    Returns:
+        Iterator over the remaining lines
+    """
+    for line in lines:
+        if not matcher(line):
+            yield line
+
+
+def create_serial_matcher(serial: AnyStr) -> Callable[[AnyStr], bool]:
+    """Creates a line matcher for rules using the serial number (ATTRS or ENV)"""
+    return create_line_matcher(SERIAL_KEYS, serial)
+
+
+def create_path_matcher(path: AnyStr) -> Callable[[AnyStr], bool]:
+    """Creates a line matcher for rules using the ID_PATH (ENV) or devpath (ATTRS)"""
+    return create_line_matcher(PATH_KEYS + DEVPATH_KEYS, path)
+
+
+def create_name_matcher(lines: Iterable[AnyStr], name: AnyStr) -> Optional[Callable[[AnyStr], bool]]:
+    """Creates a line matcher for all rules associated with a name (symlink name).
+    The rules are associated through the path or serial number used in the rule creating the symlink.
+
+    Args:
+        lines: lines of the udev configuration file
+        name: name (symlink) of the rules
+
+    Returns:
+        line matcher or None if no rule creates a symlink with the name
+    """
+    name_matcher = create_line_matcher(NAME_KEYS, name, ('+=', '=', ':='))
+    for line in lines:
+        if not name_matcher(line):
+            continue
+        rule = Rule(0, line, tokenize_line(line))
+        path = rule.get(PATH_KEYS + DEVPATH_KEYS)
+        if path is not None:
+            return create_path_matcher(path)
+        if rule.serial is not None:
+            return create_serial_matcher(rule.serial)
+    return None
 
 
 def remove_rule_by_serial(file_content: AnyStr, serial: AnyStr) -> AnyStr:
@@ -111,7 +193,7 @@ def remove_rule_by_serial(file_content: AnyStr, serial: AnyStr) -> AnyStr:
         udev file content with any rules that contain the specified serial number removed.
         If no matches were found, the string is returned unaltered
     """
-    return remove_lines(file_content, f'(?:ATTRS{{serial}}|ENV{{ID_SERIAL}})=="{serial}"')
+    return remove_lines(file_content, create_serial_matcher(serial))
 
 
 def remove_rule_by_path(file_content: AnyStr, path: AnyStr) -> AnyStr:
@@ -126,7 +208,7 @@ def remove_rule_by_path(file_content: AnyStr, path: AnyStr) -> AnyStr:
         udev file content with any rules that contain the specified path.
         If no matches were found, the string is returned unaltered.
     """
-    return remove_lines(file_content, f'(?:ENV{{ID_PATH}}|ATTRS{{devpath}})=="{path}"')
+    return remove_lines(file_content, create_path_matcher(path))
 
 
 def remove_rule_by_name(file_content: AnyStr, name: AnyStr) -> AnyStr:
@@ -140,15 +222,52 @@ def remove_rule_by_name(file_content: AnyStr, name: AnyStr) -> AnyStr:
         udev file content with any rules that contain the specified name.
         If no matches were found, the string is returned unaltered.
     """
-    path = [a+b for a, b in re.findall(f'(?:ENV{{ID_PATH}}|ATTRS{{devpath}})=="(.*?)".*SYMLINK\+="{name}"|SYMLINK\+="{name}".*(?:ENV{{ID_PATH}}|ATTRS{{devpath}})=="(.*?)"', file_content)]
-    if len(path) > 0:
-        return remove_lines(file_content, f'(?:ENV{{ID_PATH}}|ATTRS{{devpath}})=="{path[0]}"')
+    matcher = create_name_matcher(file_content.splitlines(), name)
+    if matcher is None:
+        return file_content
+    return remove_lines(file_content, matcher)
 
-    serial = [a+b for a, b in re.findall(f'(?:ATTRS{{serial}}|ENV{{ID_SERIAL}})=="(.*?)".*SYMLINK\+="{name}"|SYMLINK\+="{name}".*(?:ATTRS{{serial}}|ENV{{ID_SERIAL}})=="(.*?)"', file_content)]
-    if len(serial) > 0:
-        return remove_lines(file_content, f'(?:ATTRS{{serial}}|ENV{{ID_SERIAL}})=="{serial[0]}"')
 
-    return file_content
+def remove_rules_from_file(filepath: AnyStr, name: Optional[AnyStr] = None, path: Optional[AnyStr] = None, serial: Optional[AnyStr] = None) -> int:
+    """Removes rules from an udev rule file without loading the whole file into memory.
+    The file is read line by line and the remaining lines are streamed into a temporary file, which replaces the
+    original file atomically. If no rule matches, the file is left untouched.
+    Only one of the optional parameters has to be specified (serial > path > name).
+
+    Args:
+        filepath: filepath of the udev rule file
+        name: name (symlink) of the rules that should be removed
+        path: ID_PATH or devpath of the rules that should be removed
+        serial: serial number of the rules that should be removed
+
+    Returns:
+        number of removed lines
+    """
+    if serial:
+        matcher = create_serial_matcher(serial)
+    elif path:
+        matcher = create_path_matcher(path)
+    elif name:
+        with open(filepath) as file:
+            matcher = create_name_matcher(file, name)
+    else:
+        matcher = None
+
+    if matcher is None:
+        return 0
+
+    removed = 0
+
+    def counting_matcher(line: AnyStr) -> bool:
+        nonlocal removed
+        if matcher(line):
+            removed += 1
+            return True
+        return False
+
+    with open(filepath) as file:
+        replace_rule_file_lines(filepath, filter_lines(file, counting_matcher), lambda: removed > 0)
+    return removed
 
 
 def add_rule(file_content: AnyStr, rule: AnyStr, ) -> AnyStr:
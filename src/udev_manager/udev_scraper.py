@@ -1,37 +1,189 @@
-import pyudev
+from typing import AnyStr, Optional
 from .device_data import DeviceData
+from .sysfs_backend import SysfsContext
 
 
-def get_device_list() -> list[DeviceData]:
-    """
-    Creates a list of information of connected usb devices.
-    The included information is the vendor id, model id, serial number, path and devpath.
+class DeviceInventory:
+    """Class for keeping track of the connected usb serial devices.
+    The devices are stored as DeviceData objects keyed by their sys_path. Without a monitor, every call of
+    get_device_list enumerates the devices again. Once start_monitoring was called, the devices are only
+    enumerated once and kept up to date through the add and remove events of a pyudev monitor.
+    The devpaths of the parent devices are memoized, so devices sharing a hub resolve theirs without walking
+    all ancestors again.
+    pyudev is only imported once a context is needed, so commands not touching devices do not load it. Without
+    pyudev, the devices are read directly from sysfs (see SysfsContext)."""
 
-    Returns:
-        List of DeviceData objects
-    """
-    devices = []
+    def __init__(self, context=None):
+        if context is None:
+            try:
+                import pyudev
+                context = pyudev.Context()
+            except ImportError:
+                context = SysfsContext()
+        self.context = context
+        self.devices = {}
+        self.monitor = None
+        self._devpaths = {}
+        self._enumerated = False
 
-    context = pyudev.Context()
-    for device in context.list_devices(subsystem='tty'):
+    def create_device_data(self, device) -> Optional[DeviceData]:
+        """Creates the DeviceData object for a tty device
+
+        Args:
+            device: pyudev device
+
+        Returns:
+            DeviceData object or None if the device is not an usb device
+        """
         path = device.get("ID_PATH", None)
 
         # find better check if device is connected
         if path is None:
-            continue
+            return None
 
         vendor_id = device.get("ID_VENDOR_ID", None)
         model_id = device.get("ID_MODEL_ID", None)
         serial = device.get("ID_SERIAL", None)
+        serial_short = device.get("ID_SERIAL_SHORT", None)
+
+        return DeviceData(path, vendor_id, model_id, serial, self.resolve_devpath(device), serial_short)
 
+    def resolve_devpath(self, device) -> Optional[AnyStr]:
+        """Gets the devpath of the device or its closest ancestor having one.
+        The result is memoized for every ancestor walked.
+
+        Args:
+            device: pyudev device
+
+        Returns:
+            devpath or None if neither the device nor its ancestors have a devpath
+        """
         devpath = device.attributes.get("devpath", None)
+        if devpath is not None:
+            return devpath.decode('ascii')
+
+        visited = []
         for parent in device.ancestors:
+            if parent.sys_path in self._devpaths:
+                devpath = self._devpaths[parent.sys_path]
+                break
+
+            visited.append(parent.sys_path)
+            devpath = parent.attributes.get("devpath", None)
             if devpath is not None:
                 devpath = devpath.decode('ascii')
                 break
 
-            devpath = parent.attributes.get("devpath", None)
+        for sys_path in visited:
+            self._devpaths[sys_path] = devpath
+        return devpath
+
+    def enumerate(self):
+        """Enumerates all tty devices and replaces the stored devices"""
+        devices = {}
+        for device in self.context.list_devices(subsystem='tty'):
+            device_data = self.create_device_data(device)
+            if device_data is not None:
+                devices[device.sys_path] = device_data
+        self.devices = devices
+        self._enumerated = True
+
+    def apply_event(self, action: AnyStr, device):
+        """Updates the stored devices with an udev event
 
-        devices.append(DeviceData(path, vendor_id, model_id, serial, devpath))
+        Args:
+            action: udev action (add, change, remove, ...)
+            device: pyudev device of the event
+        """
+        if action == 'remove':
+            # the memoized devpaths stay valid, the sys_path of an usb device already encodes its port
+            self.devices.pop(device.sys_path, None)
+            return
+
+        device_data = self.create_device_data(device)
+        if device_data is None:
+            self.devices.pop(device.sys_path, None)
+        else:
+            self.devices[device.sys_path] = device_data
+
+    def start_monitoring(self):
+        """Starts a pyudev monitor for tty events and enumerates the devices once
+
+        Raises:
+            OSError: if the context can not receive udev events
+        """
+        if not getattr(self.context, 'monitoring', True):
+            raise OSError("the sysfs backend can not receive udev events")
+        if self.monitor is None:
+            import pyudev
+            self.monitor = pyudev.Monitor.from_netlink(self.context)
+            self.monitor.filter_by('tty')
+            self.monitor.start()
+        self.enumerate()
+
+    def update(self):
+        """Applies all pending monitor events or enumerates the devices again if no monitor is running"""
+        if self.monitor is None or not self._enumerated:
+            self.enumerate()
+            return
+
+        while True:
+            device = self.monitor.poll(timeout=0)
+            if device is None:
+                break
+            self.apply_event(device.action, device)
 
-    return devices
+    def get_devices(self) -> dict:
+        """Gets the currently connected usb devices with their sys path
+
+        Returns:
+            sys path -> DeviceData object
+        """
+        self.update()
+        return dict(self.devices)
+
+    def get_device_list(self) -> list:
+        """Gets the currently connected usb devices
+
+        Returns:
+            List of DeviceData objects
+        """
+        self.update()
+        return list(self.devices.values())
+
+
+_default_inventory = None
+
+
+def get_default_inventory() -> DeviceInventory:
+    """Gets the device inventory shared within the process
+
+    Returns:
+        DeviceInventory object
+    """
+    global _default_inventory
+    if _default_inventory is None:
+        _default_inventory = DeviceInventory()
+    return _default_inventory
+
+
+def use_sysfs_backend(root: AnyStr = '/'):
+    """Makes the device inventory of the process read the devices directly from sysfs instead of using pyudev
+
+    Args:
+        root: directory containing sys and run/udev/data
+    """
+    global _default_inventory
+    if not isinstance(getattr(_default_inventory, 'context', None), SysfsContext):
+        _default_inventory = DeviceInventory(SysfsContext(root))
+
+
+def get_device_list() -> list[DeviceData]:
+    """
+    Creates a list of information of connected usb devices.
+    The included information is the vendor id, model id, serial number, path and devpath.
+
+    Returns:
+        List of DeviceData objects
+    """
+    return get_default_inventory().get_device_list()
@@ -0,0 +1,115 @@
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+import src.command_server as command_server
+
+
+def print_rules(args, file):
+    print(f"rules of {file} in {os.path.basename(os.getcwd())}")
+    sys.exit()
+
+
+def fail_add(args, file):
+    print("name is already in use", file=sys.stderr)
+    sys.exit(3)
+
+
+def crash(args, file):
+    raise RuntimeError("broken")
+
+
+HANDLERS = {'rules': print_rules, 'add': fail_add, 'remove': crash}
+
+
+class TestCommandServer(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.directory.name, 'octodocker.sock')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def start_server(self):
+        server = command_server.CommandServer(self.socket_path, HANDLERS)
+        thread = threading.Thread(target=server.serve_forever, args=(0.01,))
+        thread.start()
+
+        def stop():
+            server.shutdown()
+            thread.join()
+            server.server_close()
+        self.addCleanup(stop)
+        return server
+
+    def test_run_command(self):
+        response = command_server.run_command(HANDLERS, {'command': 'rules', 'file': 'a.rules'}, self.directory.name)
+        self.assertEqual({'status': 0, 'stdout': f"rules of a.rules in {os.path.basename(self.directory.name)}\n", 'stderr': ''}, response)
+
+        response = command_server.run_command(HANDLERS, {'command': 'add'})
+        self.assertEqual(3, response['status'])
+        self.assertEqual("name is already in use\n", response['stderr'])
+
+        response = command_server.run_command(HANDLERS, {'command': 'remove'})
+        self.assertEqual(1, response['status'])
+        self.assertIn("RuntimeError: broken", response['stderr'])
+
+    def test_request_round_trip(self):
+        self.start_server()
+        self.assertEqual(0o600, os.stat(self.socket_path).st_mode & 0o777)
+
+        response = command_server.send_request({'command': 'rules', 'file': 'b.rules'}, self.socket_path)
+        self.assertEqual(0, response['status'])
+        self.assertTrue(response['stdout'].startswith("rules of b.rules"))
+
+        response = command_server.send_request({'command': 'add'}, self.socket_path)
+        self.assertEqual(3, response['status'])
+
+    def test_untrusted_server(self):
+        self.start_server()
+        os.chmod(self.directory.name, 0o777)
+        self.assertIsNone(command_server.send_request({'command': 'rules'}, self.socket_path))
+        os.chmod(self.directory.name, 0o700)
+
+        with mock.patch.object(command_server, 'get_peer_uid', return_value=os.getuid() + 1):
+            self.assertIsNone(command_server.send_request({'command': 'rules'}, self.socket_path))
+
+    def test_local_options(self):
+        self.start_server()
+        self.assertIsNone(command_server.send_request({'command': 'rules', 'sysfs': True}, self.socket_path))
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(self.socket_path)
+            connection.sendall(json.dumps({'args': {'command': 'rules', 'sysfs': True}}).encode() + b'\n')
+            with connection.makefile('rb') as response:
+                response = json.loads(response.readline())
+        self.assertEqual(1, response['status'])
+        self.assertIn('--sysfs', response['stderr'])
+
+    def test_socket_path(self):
+        with mock.patch.object(os, 'getuid', return_value=0):
+            self.assertEqual('/run/octodocker/octodocker.sock', command_server.get_socket_path())
+        with mock.patch.object(os, 'getuid', return_value=1000), mock.patch.dict(os.environ, {'XDG_RUNTIME_DIR': ''}):
+            self.assertEqual('/run/user/1000/octodocker.sock', command_server.get_socket_path())
+
+    def test_fallback_without_server(self):
+        self.assertIsNone(command_server.send_request({'command': 'rules'}, self.socket_path))
+        self.assertIsNone(command_server.send_request({'command': 'watch'}, self.socket_path))
+
+    def test_stale_socket(self):
+        server = command_server.CommandServer(self.socket_path, HANDLERS)
+        with self.assertRaises(ValueError):
+            command_server.CommandServer(self.socket_path, HANDLERS)
+        # a socket file left behind by a killed server is replaced
+        server.socket.close()
+        command_server.CommandServer(self.socket_path, HANDLERS).server_close()
+        self.assertFalse(os.path.exists(self.socket_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import controller  # noqa: E402
+import docker_manager  # noqa: E402
+import udev_manager  # noqa: E402
+
+
+def get_run_commands(rule):
+    return {parsed.action: parsed.run for parsed in udev_manager.parse_rules(rule).rules}
+
+
+class TestDockerRule(unittest.TestCase):
+
+    def test_default_rule_starts_without_boot_marker(self):
+        commands = get_run_commands(controller.create_docker_rule('/tmp/P1.yml', 'Printer1', None, None, None, 'S1'))
+        self.assertEqual(docker_manager.create_start_command('/tmp/P1.yml'), commands['add'])
+        self.assertNotIn(docker_manager.BOOT_MARKER, commands['add'])
+
+    def test_boot_guarded_rule(self):
+        commands = get_run_commands(controller.create_docker_rule('/tmp/P1.yml', 'Printer1', None, None, None, 'S1', boot_guard=True))
+        self.assertEqual(docker_manager.create_boot_guarded_command(docker_manager.create_start_command('/tmp/P1.yml')), commands['add'])
+        self.assertEqual(docker_manager.create_stop_command('/tmp/P1.yml'), commands['remove'])
+
+
+
+class TestManifestResources(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.rule_file = os.path.join(self.directory.name, '99-test.rules')
+        self.manifest = os.path.join(self.directory.name, 'printers.json')
+        open(self.rule_file, 'w').close()
+        with open(self.manifest, 'w') as file:
+            json.dump([{'name': 'P1', 'serial': 'S1'}, {'name': 'P2', 'serial': 'S2'}], file)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_no_profile_without_docker_entries(self):
+        with mock.patch.object(controller, 'load_resource_profile') as load:
+            controller.add_rules_from_manifest(self.rule_file, self.manifest, reload=False)
+        load.assert_not_called()
+        with open(self.rule_file) as file:
+            self.assertEqual(2, len(udev_manager.parse_rules(file.read()).rules))
+
+    def test_reject_resource_limits_without_docker_entries(self):
+        with self.assertRaises(SystemExit):
+            controller.add_rules_from_manifest(self.rule_file, self.manifest, resource_overrides={'cpus': 1.0}, reload=False)
+        with open(self.rule_file) as file:
+            self.assertEqual('', file.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
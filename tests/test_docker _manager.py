@@ -42,6 +42,25 @@ class TestDockerCreation(unittest.TestCase):
             file.assert_called_once_with("custom/file/path")
             self.assertEqual(result, "custom/file/path")
 
+    def test_create_standby_commands(self):
+        result = docker_creator.create_standby_start_command('filepath', 'Printer1')
+        self.assertEqual("/bin/sh -c '/usr/bin/systemctl stop octodocker-standby-Printer1.timer octodocker-standby-Printer1.service; "
+                         "/usr/bin/docker compose -f filepath unpause || /usr/bin/docker compose -f filepath up -d'", result)
+        result = docker_creator.create_standby_stop_command('filepath', 'Printer1', 600)
+        self.assertEqual("/bin/sh -c '/usr/bin/docker compose -f filepath pause && "
+                         "/usr/bin/systemd-run --collect --unit=octodocker-standby-Printer1 --on-active=600 "
+                         "/usr/bin/docker compose -f filepath stop'", result)
+
+    def test_write_docker_compose_standby(self):
+        file = mock_open(read_data="")
+        writer = MockWrite()
+        file.return_value.write = writer.write_data
+
+        with patch('builtins.open', file):
+            docker_creator.create_docker_compose(5000, "Printer1", standby_timeout=600)
+            expected = docker_compose_sample.replace("    ports:\n", "    labels:\n      octodocker.standby-timeout: \"600\"\n    ports:\n")
+            self.assertEqual(expected, writer.content)
+
 
 if __name__ == '__main__':
     unittest.main()
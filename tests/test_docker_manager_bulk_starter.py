@@ -0,0 +1,140 @@
+import asyncio
+import os
+import shlex
+import subprocess
+import tempfile
+import unittest
+import src.docker_manager as docker_manager
+
+
+class FakeDocker:
+    """Records the started commands and the number of containers starting at the same time"""
+
+    def __init__(self, start_delay=0.01, ready_delay=0.02, exit_codes=None, never_ready=()):
+        self.start_delay = start_delay
+        self.ready_delay = ready_delay
+        self.exit_codes = exit_codes or {}
+        self.never_ready = never_ready
+        self.commands = []
+        self.active = 0
+        self.max_active = 0
+
+    async def runner(self, command):
+        self.commands.append(command)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.start_delay)
+        exit_code = self.exit_codes.get(command, 0)
+        if exit_code != 0:
+            self.active -= 1
+        return exit_code
+
+    async def wait_ready(self, port, ready_timeout):
+        await asyncio.sleep(self.ready_delay)
+        self.active -= 1
+        return port not in self.never_ready
+
+
+def run_bulk_start(targets, docker, concurrency=2, ready_timeout=1):
+    return asyncio.run(docker_manager.bulk_start_async(targets, concurrency, ready_timeout, docker.runner, docker.wait_ready))
+
+
+class TestBulkStart(unittest.TestCase):
+
+    def test_concurrency_limit(self):
+        targets = [docker_manager.StartTarget(f'P{i}', f'/tmp/P{i}.yml', port=5000 + i) for i in range(6)]
+        docker = FakeDocker()
+        results = run_bulk_start(targets, docker, concurrency=2)
+        self.assertEqual(docker.max_active, 2)
+        self.assertEqual(len(results), 6)
+        self.assertTrue(all(result.time_to_ready is not None for result in results))
+
+    def test_priority_order(self):
+        targets = [docker_manager.StartTarget('P1', '/tmp/P1.yml'),
+                   docker_manager.StartTarget('P2', '/tmp/P2.yml', priority=1),
+                   docker_manager.StartTarget('P3', '/tmp/P3.yml'),
+                   docker_manager.StartTarget('P4', '/tmp/P4.yml', priority=2)]
+        results = run_bulk_start(targets, FakeDocker(), concurrency=1)
+        self.assertEqual([result.name for result in results], ['P4', 'P2', 'P1', 'P3'])
+
+    def test_shared_service_command(self):
+        docker = FakeDocker()
+        run_bulk_start([docker_manager.StartTarget('P1', '/tmp/shared.yml', 'p1')], docker)
+        self.assertEqual(docker.commands, ['/usr/bin/docker compose -f /tmp/shared.yml up -d p1'])
+
+    def test_failed_and_not_ready(self):
+        targets = [docker_manager.StartTarget('P1', '/tmp/P1.yml', port=5001),
+                   docker_manager.StartTarget('P2', '/tmp/P2.yml', port=5002)]
+        docker = FakeDocker(exit_codes={'/usr/bin/docker compose -f /tmp/P1.yml up -d': 1}, never_ready=(5002,))
+        results = {result.name: result for result in run_bulk_start(targets, docker)}
+        self.assertEqual(results['P1'].exit_code, 1)
+        self.assertIsNone(results['P1'].time_to_ready)
+        self.assertEqual(results['P2'].exit_code, 0)
+        self.assertIsNone(results['P2'].time_to_ready)
+        self.assertEqual(len(results['P2'].errors), 1)
+
+    def test_wait_until_ready(self):
+        answers = iter([False, False, True])
+
+        async def check(port):
+            return next(answers)
+
+        self.assertTrue(asyncio.run(docker_manager.wait_until_ready(5000, 1, 0.001, check)))
+        self.assertFalse(asyncio.run(docker_manager.wait_until_ready(5000, 0, 0.001, lambda port: asyncio.sleep(0, False))))
+
+    def test_parse_start_command(self):
+        self.assertEqual(docker_manager.parse_start_command(docker_manager.create_start_command('/tmp/P1.yml')), ('/tmp/P1.yml', None))
+        self.assertEqual(docker_manager.parse_start_command(docker_manager.create_start_command('/tmp/s.yml', 'p1')), ('/tmp/s.yml', 'p1'))
+        standby_command = docker_manager.create_standby_start_command('/tmp/s.yml', 'P1', 'p1')
+        self.assertEqual(docker_manager.parse_start_command(standby_command), ('/tmp/s.yml', 'p1'))
+        self.assertIsNone(docker_manager.parse_start_command(docker_manager.create_stop_command('/tmp/P1.yml')))
+
+    def test_boot_guarded_command(self):
+        guarded = docker_manager.create_boot_guarded_command(docker_manager.create_start_command('/tmp/s.yml', 'p1'))
+        self.assertEqual(docker_manager.parse_start_command(guarded), ('/tmp/s.yml', 'p1'))
+        standby = docker_manager.create_boot_guarded_command(docker_manager.create_standby_start_command('/tmp/s.yml', 'P1', 'p1'))
+        self.assertTrue(standby.startswith(f"/bin/sh -c 'test -e {docker_manager.BOOT_MARKER} || exit 0; /usr/bin/systemctl"))
+
+        with tempfile.TemporaryDirectory() as directory:
+            marker = os.path.join(directory, 'octodocker', 'booted')
+            output = os.path.join(directory, 'started')
+            command = docker_manager.create_boot_guarded_command(f'/usr/bin/touch {output}', marker)
+            subprocess.run(shlex.split(command), check=True)
+            self.assertFalse(os.path.exists(output))
+
+            docker_manager.mark_boot_started(marker)
+            subprocess.run(shlex.split(command), check=True)
+            self.assertTrue(os.path.exists(output))
+
+    def test_run_commands(self):
+        running = []
+        peak = []
+
+        async def runner(command):
+            if command == 'c':
+                raise FileNotFoundError(command)
+            running.append(command)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(command)
+            return 3 if command == 'b' else 0
+
+        exit_codes = asyncio.run(docker_manager.run_commands_async(['a', 'b', 'c', 'd'], 2, runner))
+        self.assertEqual(exit_codes, [0, 3, -1, 0])
+        self.assertEqual(max(peak), 2)
+
+    def test_prepare_command(self):
+        self.assertEqual(docker_manager.create_prepare_command('/tmp/s.yml', 'p1'), '/usr/bin/docker compose -f /tmp/s.yml create --pull missing p1')
+
+    def test_read_compose_port(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = os.path.join(directory, 'docker-compose.yml')
+            docker_manager.add_shared_service(5001, 'P1', filepath)
+            docker_manager.add_shared_service(5002, 'P2', filepath)
+            self.assertEqual(docker_manager.read_compose_port(filepath, 'p2'), 5002)
+            self.assertIsNone(docker_manager.read_compose_port(filepath, 'p3'))
+            self.assertIsNone(docker_manager.read_compose_port(os.path.join(directory, 'missing.yml')))
+
+
+if __name__ == '__main__':
+    unittest.main()
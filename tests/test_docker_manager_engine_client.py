@@ -0,0 +1,126 @@
+import json
+import os
+import socketserver
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import unquote
+import src.docker_manager as docker_manager
+
+
+class FakeEngineHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def send_json(self, status, content=None):
+        body = json.dumps(content).encode() if content is not None else b''
+        self.send_response(status)
+        if content is not None:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.requests.append(('GET', self.path, None))
+        if self.path.split('?')[0].endswith('/containers/json'):
+            self.send_json(200, [{'Names': [f'/{name}'], 'State': state, 'Labels': {}} for name, state in self.server.containers.items()])
+            return
+        if self.path.startswith('/v1.41/images/'):
+            name = self.path[len('/v1.41/images/'):-len('/json')]
+            if name in self.server.images:
+                self.send_json(200, {'Id': 'sha256:abc', 'RepoTags': [f'{name}:latest']})
+            else:
+                self.send_json(404, {'message': f'No such image: {name}'})
+            return
+        name = self.path.split('/')[3]
+        if name in self.server.containers:
+            self.send_json(200, {'Name': f'/{name}', 'State': {'Status': self.server.containers[name]}})
+        else:
+            self.send_json(404, {'message': f'No such container: {name}'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length)) if length else None
+        self.server.requests.append(('POST', self.path, body))
+        parts = self.path.split('?')[0].split('/')
+        name, action = parts[3], parts[4]
+        if name not in self.server.containers:
+            self.send_json(404, {'message': f'No such container: {name}'})
+            return
+        state = 'running' if action == 'start' else 'exited'
+        unchanged = self.server.containers[name] == state
+        self.server.containers[name] = state
+        self.send_json(304 if unchanged else 204)
+
+
+class FakeEngineServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path):
+        super().__init__(socket_path, FakeEngineHandler)
+        self.requests = []
+        self.containers = {}
+        self.images = set()
+        self.connections = 0
+
+
+class TestDockerEngineClient(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.directory.name, 'docker.sock')
+        self.server = FakeEngineServer(self.socket_path)
+        threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True).start()
+        self.client = docker_manager.DockerEngineClient(self.socket_path, timeout=5)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def test_start_stop_inspect(self):
+        name = docker_manager.get_container_name('Printer1')
+        self.server.containers[name] = 'created'
+        self.assertTrue(self.client.start_container(name))
+        self.assertFalse(self.client.start_container(name))
+        self.assertEqual('running', self.client.inspect_container(name)['State']['Status'])
+        self.assertTrue(self.client.stop_container(name, timeout=1))
+        self.assertEqual('exited', self.client.inspect_container(name)['State']['Status'])
+        self.assertIn(('POST', f'/v1.41/containers/{name}/stop?t=1', None), self.server.requests)
+
+    def test_missing_container(self):
+        self.assertIsNone(self.client.inspect_container('missing'))
+        with self.assertRaises(docker_manager.DockerEngineError):
+            self.client.start_container('missing')
+
+    def test_list_containers(self):
+        self.server.containers[docker_manager.get_container_name('Printer1')] = 'created'
+        containers = self.client.list_containers([docker_manager.PROJECT_LABEL])
+        self.assertEqual([['/printer1-octoprint-1']], [container['Names'] for container in containers])
+        path = self.server.requests[-1][1]
+        self.assertIn('all=1', path)
+        self.assertIn('com.docker.compose.project', unquote(path))
+
+    def test_inspect_image(self):
+        self.assertIsNone(self.client.inspect_image(docker_manager.OCTOPRINT_IMAGE))
+        self.server.images.add(docker_manager.OCTOPRINT_IMAGE)
+        self.assertEqual('sha256:abc', self.client.inspect_image(docker_manager.OCTOPRINT_IMAGE)['Id'])
+        self.assertEqual('/v1.41/images/octoprint/octoprint/json', self.server.requests[-1][1])
+
+    def test_persistent_connection(self):
+        for _ in range(5):
+            self.client.inspect_container('missing')
+        self.assertEqual(1, self.server.connections)
+
+
+if __name__ == '__main__':
+    unittest.main()
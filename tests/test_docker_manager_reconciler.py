@@ -0,0 +1,86 @@
+import asyncio
+import os
+import tempfile
+import unittest
+import src.docker_manager as docker_manager
+
+
+def create_container(project, service, state, standby=False):
+    labels = {docker_manager.PROJECT_LABEL: project, docker_manager.SERVICE_LABEL: service}
+    if standby:
+        labels[docker_manager.STANDBY_LABEL] = '300'
+    return {'Id': f'{project}-{service}', 'State': state, 'Labels': labels}
+
+
+class TestReconciler(unittest.TestCase):
+
+    def setUp(self):
+        self.targets = [docker_manager.StartTarget('P1', '/tmp/docker-compose.P1.yml'),
+                        docker_manager.StartTarget('P2', '/tmp/docker-compose.P2.yml'),
+                        docker_manager.StartTarget('P3', '/tmp/shared.yml', 'p3'),
+                        docker_manager.StartTarget('P4', '/tmp/shared.yml', 'p4')]
+
+    def plan(self, connected, containers):
+        connected = {(target.compose_file, target.service) for target in self.targets if target.name in connected}
+        actions = docker_manager.plan_reconcile(self.targets, connected, docker_manager.index_containers(containers))
+        return {action.name: (action.action, action.state) for action in actions}
+
+    def test_index_containers(self):
+        index = docker_manager.index_containers([create_container('p1', 'octoprint', 'running'), {'Id': 'other', 'Labels': {}}])
+        self.assertEqual(list(index), [('p1', 'octoprint')])
+
+    def test_converged(self):
+        containers = [create_container('p1', 'octoprint', 'running'), create_container('p2', 'octoprint', 'exited'),
+                      create_container('octodocker', 'p3', 'running')]
+        self.assertEqual(self.plan({'P1', 'P3'}, containers), {})
+
+    def test_start_connected(self):
+        containers = [create_container('p1', 'octoprint', 'exited'), create_container('octodocker', 'p3', 'paused')]
+        self.assertEqual(self.plan({'P1', 'P2', 'P3'}, containers),
+                         {'P1': ('start', 'exited'), 'P2': ('start', 'missing'), 'P3': ('unpause', 'paused')})
+
+    def test_stop_disconnected(self):
+        containers = [create_container('p1', 'octoprint', 'running'), create_container('p2', 'octoprint', 'paused', standby=True),
+                      create_container('octodocker', 'p3', 'paused'), create_container('octodocker', 'p4', 'exited')]
+        self.assertEqual(self.plan(set(), containers), {'P1': ('stop', 'running'), 'P3': ('stop', 'paused')})
+
+    def test_commands(self):
+        connected = {('/tmp/shared.yml', 'p3')}
+        actions = docker_manager.plan_reconcile(self.targets, connected, {})
+        self.assertEqual([action.command for action in actions], ['/usr/bin/docker compose -f /tmp/shared.yml up -d p3'])
+
+    def test_run_action_commands(self):
+        running = []
+        peak = []
+
+        async def runner(command):
+            running.append(command)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(command)
+            if 'P2' in command:
+                raise FileNotFoundError(command)
+            return 0
+
+        actions = docker_manager.plan_reconcile(self.targets, {(target.compose_file, target.service) for target in self.targets}, {})
+        exit_codes = asyncio.run(docker_manager.run_commands_async([action.command for action in actions], 2, runner))
+        self.assertEqual(exit_codes, [0, -1, 0, 0])
+        self.assertEqual(max(peak), 2)
+
+    def test_reconcile_lock(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = os.path.join(directory, 'reconcile.lock')
+            with docker_manager.acquire_reconcile_lock(filepath) as lock:
+                self.assertIsNotNone(lock)
+                self.assertIsNone(docker_manager.acquire_reconcile_lock(filepath))
+            docker_manager.acquire_reconcile_lock(filepath).close()
+            self.assertEqual(os.stat(filepath).st_mode & 0o777, 0o600)
+
+            link = os.path.join(directory, 'link.lock')
+            os.symlink(filepath, link)
+            with self.assertRaises(OSError):
+                docker_manager.acquire_reconcile_lock(link)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+import unittest
+import src.docker_manager as docker_manager
+from src.docker_manager import ResourceProfile
+
+
+class TestResourceProfile(unittest.TestCase):
+
+    def test_parse_memory(self):
+        self.assertEqual(512 * 1024 ** 2, docker_manager.parse_memory('512m'))
+        self.assertEqual(2 * 1024 ** 3, docker_manager.parse_memory('2G'))
+        self.assertEqual(1536 * 1024 ** 2, docker_manager.parse_memory('1.5gb'))
+        self.assertEqual(4096, docker_manager.parse_memory('4096'))
+        with self.assertRaises(ValueError):
+            docker_manager.parse_memory('lots')
+
+    def test_parse_cpuset(self):
+        self.assertEqual({0, 1, 2, 4}, docker_manager.parse_cpuset('0-2,4'))
+        with self.assertRaises(ValueError):
+            docker_manager.parse_cpuset('3-1')
+        with self.assertRaises(ValueError):
+            docker_manager.parse_cpuset('a')
+
+    def test_validate_resource_profile(self):
+        docker_manager.validate_resource_profile(ResourceProfile(2, '1g', '0-3', 512, 500), cores=4, memory=8 * 1024 ** 3)
+
+        with self.assertRaises(ValueError) as context:
+            docker_manager.validate_resource_profile(ResourceProfile(8, '16g', '2-5', 1, 5), cores=4, memory=8 * 1024 ** 3)
+        message = str(context.exception)
+        self.assertIn('cpus', message)
+        self.assertIn('mem_limit', message)
+        self.assertIn('core 5', message)
+        self.assertIn('cpu_shares', message)
+        self.assertIn('blkio_weight', message)
+
+    def test_read_and_merge_defaults(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = os.path.join(directory, 'resources.json')
+            self.assertTrue(docker_manager.read_resource_defaults(filepath).is_empty)
+
+            with open(filepath, 'w') as file:
+                json.dump({'cpus': 1, 'mem_limit': '512m', 'blkio_weight': 200}, file)
+            defaults = docker_manager.read_resource_defaults(filepath)
+
+            with open(filepath, 'w') as file:
+                json.dump({'gpus': 1}, file)
+            with self.assertRaises(ValueError):
+                docker_manager.read_resource_defaults(filepath)
+
+        merged = docker_manager.merge_resource_profiles(defaults, ResourceProfile(cpus=2.5, cpuset='1'))
+        self.assertEqual(ResourceProfile(2.5, '512m', '1', None, 200), merged)
+
+    def test_create_resource_config(self):
+        self.assertEqual('', docker_manager.create_resource_config(None))
+        config = docker_manager.create_resource_config(ResourceProfile(1.5, '512m', '0-1', 512, 300))
+        self.assertEqual('    cpus: 1.5\n'
+                         '    mem_limit: 512m\n'
+                         '    cpuset: "0-1"\n'
+                         '    cpu_shares: 512\n'
+                         '    blkio_config:\n'
+                         '      weight: 300\n', config)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+import src.docker_manager as docker_manager
+
+
+class TestSharedCompose(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.directory.name, 'docker-compose.yml')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self):
+        with open(self.filepath) as file:
+            return file.read()
+
+    def test_add_shared_service(self):
+        docker_manager.add_shared_service(5000, 'Printer1', self.filepath)
+        docker_manager.add_shared_service(5001, 'Printer2', self.filepath, standby_timeout=600)
+        content = self.read()
+
+        header, services, volumes = docker_manager.split_compose_sections(content)
+        self.assertEqual("version: '2.4'\nname: octodocker", ''.join(header).strip())
+        self.assertEqual(['printer1', 'printer2'], list(services))
+        self.assertEqual(['printer1', 'printer2'], list(volumes))
+        self.assertEqual(docker_manager.create_octoprint_service('printer1', 5000, 'Printer1', 'printer1'), services['printer1'])
+        self.assertIn('octodocker.standby-timeout: "600"', services['printer2'])
+        self.assertIn('      - /dev/Printer2:/dev/ttyUSB0\n', services['printer2'])
+
+    def test_add_shared_service_duplicate(self):
+        docker_manager.add_shared_service(5000, 'Printer1', self.filepath)
+        with self.assertRaises(ValueError):
+            docker_manager.add_shared_service(5001, 'Printer1', self.filepath)
+
+    def test_remove_shared_service_keeps_other_entries(self):
+        docker_manager.add_shared_service(5000, 'Printer1', self.filepath)
+        docker_manager.add_shared_service(5001, 'Printer2', self.filepath)
+        # manual edits of other services survive
+        content = self.read().replace("  printer1:\n    image: octoprint/octoprint\n", "  printer1:\n    image: octoprint/octoprint:latest\n")
+        with open(self.filepath, 'w') as file:
+            file.write(content)
+
+        self.assertTrue(docker_manager.remove_shared_service('Printer2', self.filepath))
+        self.assertFalse(docker_manager.remove_shared_service('Printer2', self.filepath))
+
+        header, services, volumes = docker_manager.split_compose_sections(self.read())
+        self.assertEqual(['printer1'], list(services))
+        self.assertEqual(['printer1'], list(volumes))
+        self.assertIn('octoprint/octoprint:latest', services['printer1'])
+
+    def test_service_commands(self):
+        self.assertEqual('/usr/bin/docker compose -f file up -d printer1', docker_manager.create_start_command('file', 'printer1'))
+        self.assertEqual('/usr/bin/docker compose -f file stop printer1', docker_manager.create_stop_command('file', 'printer1'))
+        self.assertEqual('octodocker-printer1-1', docker_manager.get_container_name('Printer1', shared=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+import src.event_coalescer as event_coalescer
+
+
+class TestEventCoalescer(unittest.TestCase):
+
+    def replay(self, events, settle_window=1.0):
+        coalescer = event_coalescer.EventCoalescer(settle_window)
+        return event_coalescer.replay_events(coalescer, events), coalescer.stats
+
+    def test_single_event(self):
+        issued, stats = self.replay([(0.0, 'Printer1', 'add')])
+        self.assertEqual([(1.0, 'Printer1', 'add')], issued)
+        self.assertEqual(event_coalescer.CoalescerStats(1, 0, 1), stats)
+
+    def test_burst_collapses_to_final_state(self):
+        events = [(0.0, 'Printer1', 'add'), (0.2, 'Printer1', 'remove'), (0.4, 'Printer1', 'add'), (0.5, 'Printer1', 'remove')]
+        issued, stats = self.replay(events)
+        self.assertEqual([(1.5, 'Printer1', 'remove')], issued)
+        self.assertEqual(event_coalescer.CoalescerStats(4, 3, 1), stats)
+
+    def test_flap_back_to_issued_state_is_suppressed(self):
+        events = [(0.0, 'Printer1', 'add'), (5.0, 'Printer1', 'remove'), (5.3, 'Printer1', 'add')]
+        issued, stats = self.replay(events)
+        self.assertEqual([(1.0, 'Printer1', 'add')], issued)
+        self.assertEqual(event_coalescer.CoalescerStats(3, 2, 1), stats)
+
+    def test_keys_are_independent(self):
+        events = [(0.0, 'Printer1', 'add'), (0.5, 'Printer2', 'add'), (0.9, 'Printer1', 'remove'), (3.0, 'Printer2', 'remove')]
+        issued, _ = self.replay(events)
+        self.assertEqual([(1.5, 'Printer2', 'add'), (1.9, 'Printer1', 'remove'), (4.0, 'Printer2', 'remove')], issued)
+
+    def test_zero_window_issues_immediately(self):
+        coalescer = event_coalescer.EventCoalescer(0, clock=lambda: 10.0)
+        coalescer.submit('Printer1', 'add', payload='compose.yml')
+        settled = coalescer.pop_settled()
+        self.assertEqual([event_coalescer.SettledEvent('Printer1', 'add', 10.0, 'compose.yml')], settled)
+        self.assertIsNone(coalescer.time_until_next())
+
+
+if __name__ == '__main__':
+    unittest.main()
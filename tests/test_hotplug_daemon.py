@@ -0,0 +1,132 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+import src.hotplug_daemon as hotplug_daemon
+
+udev_manager = hotplug_daemon.udev_manager
+docker_manager = hotplug_daemon.docker_manager
+
+
+class FakeDevice:
+    def __init__(self, serial):
+        self.properties = {'ID_SERIAL': serial, 'ID_PATH': f'path-{serial}'}
+
+    def get(self, key, default=None):
+        return self.properties.get(key, default)
+
+
+class FakeRunner:
+    """Records the commands, commands containing a blocked word wait until it is released"""
+
+    def __init__(self):
+        self.commands = []
+        self.lock = threading.Lock()
+        self.blocked = {}
+
+    def block(self, word):
+        self.blocked[word] = threading.Event()
+
+    def release(self, word):
+        self.blocked.pop(word).set()
+
+    def __call__(self, command):
+        with self.lock:
+            self.commands.append(command)
+        for word, event in list(self.blocked.items()):
+            if word in command:
+                event.wait(5)
+        return 0
+
+
+def compose(name):
+    return f'/tmp/docker-compose.{name}.yml'
+
+
+class TestHotplugDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.rule_file = os.path.join(self.directory.name, '99-serial.rules')
+        with open(self.rule_file, 'w') as file:
+            file.write('\n'.join([udev_manager.create_symlink_udev_rule('P1', compose('P1'), serial='S1'),
+                                  udev_manager.create_symlink_udev_rule('P2', compose('P2'), serial='S2'),
+                                  udev_manager.create_symlink_udev_rule('P3', compose('P3'), serial='S3', standby_timeout=0)]) + '\n')
+        self.runner = FakeRunner()
+        self.daemon = hotplug_daemon.HotplugDaemon(self.rule_file, max_workers=4, runner=self.runner, settle_window=10)
+        self.now = time.monotonic()
+
+    def tearDown(self):
+        for event in self.runner.blocked.values():
+            event.set()
+        self.daemon.executor.shutdown(wait=True)
+        self.directory.cleanup()
+
+    def send(self, action, serial, delay=0.0):
+        self.now += delay
+        self.daemon.handle_event(action, FakeDevice(serial), self.now)
+
+    def dispatch(self):
+        self.now += 20
+        return self.daemon.dispatch_settled(self.now)
+
+    def wait(self, futures):
+        return [future.result(timeout=5) for future in futures]
+
+    def test_actions_of_a_printer_keep_their_order(self):
+        self.runner.block('P1.yml up')
+        self.send('add', 'S1')
+        started = self.dispatch()
+        self.send('remove', 'S1')
+        stopped = self.dispatch()
+        self.send('add', 'S2')
+        other = self.dispatch()
+
+        # the second printer does not wait for the blocked start of the first one
+        self.wait(other)
+        self.assertEqual([docker_manager.create_start_command(compose('P1')), docker_manager.create_start_command(compose('P2'))],
+                         self.runner.commands)
+
+        self.runner.release('P1.yml up')
+        self.wait(started + stopped)
+        self.assertEqual(docker_manager.create_stop_command(compose('P1')), self.runner.commands[-1])
+
+    def test_coalescing(self):
+        self.send('add', 'S1')
+        self.send('remove', 'S1', 0.1)
+        self.send('add', 'S1', 0.1)
+        self.wait(self.dispatch())
+        self.assertEqual([docker_manager.create_start_command(compose('P1'))], self.runner.commands)
+        self.assertEqual((3, 1), (self.daemon.coalescer.stats.received, self.daemon.coalescer.stats.issued))
+
+        # the printer is already running, a settled add does not start it again
+        self.send('add', 'S1')
+        self.assertEqual([], self.dispatch())
+
+    def test_standby_stop(self):
+        self.send('remove', 'S3')
+        self.wait(self.dispatch())
+        deadline = time.monotonic() + 5
+        while len(self.runner.commands) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual([docker_manager.create_pause_command(compose('P3')), docker_manager.create_stop_command(compose('P3'))],
+                         self.runner.commands)
+
+    def test_reconnect_during_pause_cancels_the_standby_stop(self):
+        self.runner.block('pause')
+        self.send('remove', 'S3')
+        paused = self.dispatch()
+        self.send('add', 'S3')
+        started = self.dispatch()
+        self.runner.release('pause')
+        self.wait(paused + started)
+
+        # the standby timeout is 0, a standby stop scheduled by the pause would run right away
+        time.sleep(0.2)
+        self.assertEqual([docker_manager.create_pause_command(compose('P3')), docker_manager.create_unpause_command(compose('P3'))],
+                         self.runner.commands)
+
+
+if __name__ == '__main__':
+    unittest.main()
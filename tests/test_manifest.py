@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+import src.manifest as manifest
+
+
+class TestManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, file_name, content):
+        filepath = os.path.join(self.directory.name, file_name)
+        with open(filepath, 'w') as file:
+            file.write(content)
+        return filepath
+
+    def test_read_csv(self):
+        filepath = self.write('manifest.csv', 'name,serial,path,port\nPrinter1,1234,,5000\nPrinter2,,UsbPath,\n')
+        result = manifest.read_manifest(filepath)
+        self.assertEqual([manifest.ManifestEntry('Printer1', serial='1234', port=5000),
+                          manifest.ManifestEntry('Printer2', path='UsbPath')], result)
+
+    def test_read_json(self):
+        filepath = self.write('manifest.json', '[{"name": "Printer1", "devpath": "1.1", "vendor": "83kr"}]')
+        result = manifest.read_manifest(filepath)
+        self.assertEqual([manifest.ManifestEntry('Printer1', devpath='1.1', vendor='83kr')], result)
+
+    def test_invalid_entries(self):
+        with self.assertRaises(ValueError):
+            manifest.read_manifest(self.write('manifest.json', '[{"serial": "1234"}]'))
+        with self.assertRaises(ValueError):
+            manifest.read_manifest(self.write('manifest.json', '[{"name": "Printer1", "color": "red"}]'))
+        with self.assertRaises(ValueError):
+            manifest.read_manifest(self.write('manifest.csv', 'name,port\nPrinter1,abc\n'))
+        with self.assertRaises(ValueError):
+            manifest.read_manifest(self.write('manifest.yml', ''))
+
+    def test_too_many_columns(self):
+        with self.assertRaisesRegex(ValueError, 'Too many columns in row 3'):
+            manifest.read_manifest(self.write('manifest.csv', 'name,port\nPrinter1,5000\nPrinter2,5001,extra\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
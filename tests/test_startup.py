@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+CLI = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'octodocker.py')
+
+# modules only needed by some commands, importing them costs a noticeable part of the cold start
+HEAVY_MODULES = ('pyudev', 'hotplug_daemon', 'http.client', 'concurrent.futures', 'docker_manager.engine_client')
+
+
+def get_imported_modules(arguments: list) -> set:
+    result = subprocess.run([sys.executable, '-X', 'importtime', CLI, '--no-server', *arguments], stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True, timeout=60)
+    return {line.split('|')[-1].strip() for line in result.stderr.splitlines() if line.startswith('import time:')}
+
+
+class TestStartupBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.rule_file = os.path.join(self.directory.name, '99-serial.rules')
+        with open(self.rule_file, 'w') as file:
+            file.write('SUBSYSTEM=="tty", ATTRS{serial}=="serial1", SYMLINK+="Printer1"\n')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assertNoHeavyModules(self, arguments: list):
+        modules = get_imported_modules(arguments)
+        self.assertIn('controller', modules)
+        self.assertEqual([], [module for module in HEAVY_MODULES if module in modules])
+
+    def test_rules_command(self):
+        self.assertNoHeavyModules(['rules', '-f', self.rule_file])
+
+    def test_remove_command(self):
+        self.assertNoHeavyModules(['remove', '-f', self.rule_file, 'name', 'Unknown'])
+
+    def test_abbreviated_option(self):
+        result = subprocess.run([sys.executable, CLI, '--no-server', '--vend', '2c99', 'rules', '-f', self.rule_file],
+                                capture_output=True, text=True, timeout=60)
+        self.assertEqual(0, result.returncode, result.stderr)
+        self.assertIn('Printer1', result.stdout)
+
+    def test_help_does_not_import_controller(self):
+        modules = get_imported_modules(['--help'])
+        self.assertNotIn('controller', modules)
+        self.assertNotIn('udev_manager', modules)
+
+
+if __name__ == '__main__':
+    unittest.main()
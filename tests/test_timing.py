@@ -0,0 +1,73 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+import src.timing as timing
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 1.0
+        return self.now
+
+
+class TestTiming(unittest.TestCase):
+
+    def tearDown(self):
+        timing.disable_timings()
+
+    def test_disabled_phase_is_shared_no_op(self):
+        self.assertIsNone(timing.get_recorder())
+        self.assertIs(timing.phase('a'), timing.phase('b'))
+        with timing.phase('a'):
+            pass
+        output = io.StringIO()
+        timing.report(True, None, output)
+        self.assertEqual('', output.getvalue())
+
+    def test_nested_phases(self):
+        recorder = timing.enable_timings(FakeClock())
+        with timing.phase('command.add'):
+            for _ in range(2):
+                with timing.phase('rules.load'):
+                    pass
+            with timing.phase('rules.append'):
+                pass
+
+        summary = recorder.summarize()
+        self.assertEqual([(('command.add',), 1, 7.0),
+                          (('command.add', 'rules.load'), 2, 2.0),
+                          (('command.add', 'rules.append'), 1, 1.0)], summary)
+
+        output = io.StringIO()
+        timing.report(True, None, output)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(4, len(lines))
+        self.assertTrue(lines[2].startswith('  rules.load'))
+
+    def test_chrome_trace(self):
+        timing.enable_timings(FakeClock())
+        with timing.phase('command.rules'):
+            with timing.phase('rules.load'):
+                pass
+
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = os.path.join(directory, 'trace.json')
+            timing.report(False, filepath)
+            with open(filepath) as file:
+                trace = json.load(file)
+
+        events = trace['traceEvents']
+        self.assertEqual(['command.rules', 'rules.load'], [event['name'] for event in events])
+        self.assertEqual('X', events[0]['ph'])
+        self.assertEqual(3e6, events[0]['dur'])
+        self.assertEqual(2e6, events[1]['ts'])
+        self.assertEqual('rules', events[1]['cat'])
+
+
+if __name__ == '__main__':
+    unittest.main()
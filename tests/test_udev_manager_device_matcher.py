@@ -0,0 +1,80 @@
+import unittest
+import src.udev_manager as udev_manager
+from test_data import udev_rules_data
+
+
+def create_device(path, vendor_id, model_id, serial_short, devpath):
+    # like usb_id, the long serial contains vendor and model
+    return udev_manager.DeviceData(path, vendor_id, model_id, f'{vendor_id}_Printer_{serial_short}', devpath, serial_short)
+
+
+class TestDeviceMatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.rule_file = udev_manager.parse_rules(udev_rules_data + 'SUBSYSTEM=="tty", ENV{ID_SERIAL}=="abc", SYMLINK+="Printer9", ENV{OCTODOCKER_COMPOSE}="/compose.yml"\n')
+
+    def test_find_device_rules(self):
+        device = udev_manager.DeviceData('UsbPathTo1', 'm78', 'ab4g', 'other', '1.5')
+        result = udev_manager.find_device_rules(self.rule_file, device)
+        self.assertEqual(['Printer8', 'Printer5'], [rule.name for rule in result])
+
+    def test_find_device_rules_vendor_mismatch(self):
+        device = udev_manager.DeviceData('UsbPathTo1', 'm79', 'ab4g', None, None)
+        self.assertEqual([], udev_manager.find_device_rules(self.rule_file, device))
+
+    def test_find_compose_rule(self):
+        device = udev_manager.DeviceData(None, None, None, 'abc', None)
+        result = udev_manager.find_compose_rule(self.rule_file, device)
+        self.assertEqual('Printer9', result.name)
+        self.assertEqual('/compose.yml', result.compose_file)
+        self.assertIsNone(udev_manager.find_compose_rule(self.rule_file, udev_manager.DeviceData(None, None, None, 'kise', None)))
+
+
+    def test_serial_keys(self):
+        device = create_device('pci-usb-0:1.1', '1a86', '7523', 'SER1', '1.1')
+        rules = {'short': udev_manager.create_udev_rule('Short', serial='SER1'),
+                 'env_short': 'SUBSYSTEM=="tty", ENV{ID_SERIAL_SHORT}=="SER1", SYMLINK+="EnvShort"',
+                 'long': 'SUBSYSTEM=="tty", ENV{ID_SERIAL}=="1a86_Printer_SER1", SYMLINK+="Long"',
+                 'long_as_short': udev_manager.create_udev_rule('LongAsShort', serial='1a86_Printer_SER1'),
+                 'short_as_long': 'SUBSYSTEM=="tty", ENV{ID_SERIAL}=="SER1", SYMLINK+="ShortAsLong"'}
+        result = {key: udev_manager.rule_matches_device(udev_manager.parse_rules(rule).rules[0], device) for key, rule in rules.items()}
+        self.assertEqual({'short': True, 'env_short': True, 'long': True, 'long_as_short': False, 'short_as_long': False}, result)
+
+        rule_file = udev_manager.parse_rules('\n'.join(rules.values()))
+        self.assertEqual(['Short', 'EnvShort', 'Long'], [rule.name for rule in udev_manager.find_device_rules(rule_file, device)])
+
+
+class TestMatchDevices(unittest.TestCase):
+
+    def setUp(self):
+        self.rule_file = udev_manager.parse_rules('\n'.join([
+            udev_manager.create_udev_rule('P1', serial='S1'),
+            # start/stop rules compare the long ID_SERIAL
+            udev_manager.create_startstop_udev_rule('P2', '/usr/bin/start p2', '/usr/bin/stop p2', serial='1a86_Printer_S2'),
+            udev_manager.create_udev_rule('P3', path='pci-usb-0:1.3'),
+            udev_manager.create_udev_rule('Duplicate', serial='S3'),
+            udev_manager.create_udev_rule('P3copy', serial='S3'),
+            'SUBSYSTEM=="tty", ATTRS{idVendor}=="0403", ATTRS{idProduct}=="6001", SYMLINK+="Adapter"',
+            udev_manager.create_udev_rule('Missing', serial='S9'),
+        ]))
+
+    def test_match_devices(self):
+        devices = [create_device('pci-usb-0:1.1', '1a86', '7523', 'S1', '1.1'),
+                   create_device('pci-usb-0:1.2', '1a86', '7523', 'S2', '1.2'),
+                   create_device('pci-usb-0:1.3', '1a86', '7523', 'S3', '1.3'),
+                   create_device('pci-usb-0:1.4', '0403', '6001', 'FT1', '1.4'),
+                   create_device('pci-usb-0:1.5', '2341', '0043', 'X', '1.5')]
+        report = udev_manager.match_devices(self.rule_file, devices)
+        self.assertEqual([('S1', ['P1']), ('S2', ['P2']), ('FT1', ['Adapter'])],
+                         [(match.device.serial_short, [rule.name for rule in match.rules]) for match in report.matched])
+        self.assertEqual([['P3', 'Duplicate', 'P3copy']], [[rule.name for rule in match.rules] for match in report.ambiguous])
+        self.assertEqual(['X'], [device.serial_short for device in report.unmatched])
+        self.assertEqual(['Missing'], [rule.name for rule in report.unused])
+
+    def test_vendor_model_index(self):
+        index = udev_manager.index_vendor_model_rules(self.rule_file)
+        self.assertEqual([('0403', '6001')], list(index))
+
+
+if __name__ == '__main__':
+    unittest.main()
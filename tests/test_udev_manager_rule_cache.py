@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import src.udev_manager.rule_cache as rule_cache
+import src.udev_manager.udev_rule_parser as udev_rule_parser
+from test_data import udev_rules_data
+
+
+class TestRuleCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.directory.name, 'cache')
+        self.filepath = os.path.join(self.directory.name, '99-serial.rules')
+        with open(self.filepath, 'w') as file:
+            file.write(udev_rules_data)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def load_from_disk(self):
+        rule_cache._memory_cache.clear()
+        return rule_cache.load_rule_file(self.filepath, self.cache_dir)
+
+    def test_cache_hit_skips_parsing(self):
+        first = rule_cache.load_rule_file(self.filepath, self.cache_dir)
+        with patch.object(udev_rule_parser, 'tokenize_line') as tokenize:
+            second = self.load_from_disk()
+            tokenize.assert_not_called()
+        self.assertEqual(first, second)
+
+    def test_foreign_cache_is_ignored(self):
+        rule_cache.load_rule_file(self.filepath, self.cache_dir)
+        cache_filepath = rule_cache.get_cache_filepath(self.filepath, self.cache_dir)
+        for path, mode in ((cache_filepath, 0o666), (self.cache_dir, 0o777)):
+            original_mode = os.stat(path).st_mode
+            os.chmod(path, mode)
+            with patch.object(udev_rule_parser, 'tokenize_line', wraps=udev_rule_parser.tokenize_line) as tokenize:
+                result = self.load_from_disk()
+                tokenize.assert_called()
+            os.chmod(path, original_mode)
+            self.assertEqual(8, len(result.names))
+
+    def test_changed_file_is_parsed_again(self):
+        rule_cache.load_rule_file(self.filepath, self.cache_dir)
+        with open(self.filepath, 'a') as file:
+            file.write('SUBSYSTEM=="tty", ATTRS{serial}=="new", SYMLINK+="Printer9"\n')
+        result = rule_cache.load_rule_file(self.filepath, self.cache_dir)
+        self.assertIn('Printer9', result.names)
+
+    def test_corrupt_cache_falls_back(self):
+        os.makedirs(self.cache_dir)
+        with open(rule_cache.get_cache_filepath(self.filepath, self.cache_dir), 'wb') as file:
+            file.write(b'not json')
+        result = rule_cache.load_rule_file(self.filepath, self.cache_dir)
+        self.assertEqual(8, len(result.names))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -67,6 +67,14 @@ class TestUdevRuleCreation(unittest.TestCase):
         with self.assertRaises(ValueError):
             rule_creator.create_startstop_udev_rule("Printer1", "start", "stop", None, None, "83kr", "48hs")
 
+    def test_create_symlink_rule(self):
+        result = rule_creator.create_symlink_udev_rule("Printer1", "/compose.yml", "1234")
+        self.assertEqual('SUBSYSTEM=="tty", ENV{ID_SERIAL}=="1234", SYMLINK+="Printer1", ENV{OCTODOCKER_COMPOSE}="/compose.yml"', result)
+        result = rule_creator.create_symlink_udev_rule("Printer1", "/compose.yml", path="UsbPath", vendor_id="83kr")
+        self.assertEqual('SUBSYSTEM=="tty", ENV{ID_VENDOR_ID}=="83kr", ENV{ID_PATH}=="UsbPath", SYMLINK+="Printer1", ENV{OCTODOCKER_COMPOSE}="/compose.yml"', result)
+        with self.assertRaises(ValueError):
+            rule_creator.create_symlink_udev_rule("Printer1", "/compose.yml")
+
 
 if __name__ == '__main__':
     unittest.main()
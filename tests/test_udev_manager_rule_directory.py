@@ -0,0 +1,41 @@
+import os
+import tempfile
+import unittest
+import src.udev_manager.rule_directory as rule_directory
+from test_data import udev_rules_data
+
+
+class TestRuleDirectory(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.write('99-serial.rules', udev_rules_data)
+        self.write('50-other.rules', 'SUBSYSTEM=="tty", ATTRS{serial}=="kise", SYMLINK+="Printer1"\n')
+        self.write('10-distro.rules', 'KERNEL=="sd*", GROUP="disk"\n')
+        self.write('notes.txt', 'SYMLINK+="Printer2"\n')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, file_name, content):
+        with open(os.path.join(self.directory.name, file_name), 'w') as file:
+            file.write(content)
+
+    def test_scan_rule_directory(self):
+        index = rule_directory.scan_rule_directory(self.directory.name, max_workers=2)
+        self.assertEqual(['50-other.rules', '99-serial.rules'], [os.path.basename(path) for path in index.files])
+        self.assertEqual(['10-distro.rules'], [os.path.basename(path) for path in index.skipped])
+        self.assertEqual(2, len(index.names['Printer1']))
+        self.assertTrue(index.has_path('UsbPathTo1'))
+
+    def test_find_conflicts(self):
+        index = rule_directory.scan_rule_directory(self.directory.name)
+        conflicts = {(conflict.kind, conflict.value): conflict for conflict in rule_directory.find_conflicts(index)}
+        self.assertEqual({('name', 'Printer1'), ('serial', 'kise')}, set(conflicts))
+        locations = conflicts[('serial', 'kise')].locations
+        self.assertEqual([('50-other.rules', 1, 'Printer1'), ('99-serial.rules', 7, 'Printer3')],
+                         [(os.path.basename(location.filepath), location.line_number, location.name) for location in locations])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import src.udev_manager.rule_file_io as rule_file_io
+
+
+class TestRuleFileIO(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.directory.name, '99-serial.rules')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self):
+        with open(self.filepath) as file:
+            return file.read()
+
+    def test_append_rule(self):
+        with open(self.filepath, 'w') as file:
+            file.write('rule1\n')
+        rule_file_io.append_rule_to_file(self.filepath, 'rule2')
+        self.assertEqual('rule1\nrule2\n', self.read())
+
+    def test_append_rule_missing_line_break(self):
+        with open(self.filepath, 'w') as file:
+            file.write('rule1')
+        rule_file_io.append_rule_to_file(self.filepath, 'rule2\n')
+        self.assertEqual('rule1\nrule2\n', self.read())
+
+    def test_write_rule_file_keeps_mode(self):
+        with open(self.filepath, 'w') as file:
+            file.write('rule1\n')
+        os.chmod(self.filepath, 0o640)
+        rule_file_io.write_rule_file(self.filepath, 'rule2\n')
+        self.assertEqual('rule2\n', self.read())
+        self.assertEqual(0o640, os.stat(self.filepath).st_mode & 0o777)
+
+    @unittest.skipUnless(os.getuid() == 0, "changing the owner requires root")
+    def test_write_rule_file_keeps_owner(self):
+        with open(self.filepath, 'w') as file:
+            file.write('rule1\n')
+        os.chown(self.filepath, 1234, 5678)
+        rule_file_io.write_rule_file(self.filepath, 'rule2\n')
+        self.assertEqual((1234, 5678), (os.stat(self.filepath).st_uid, os.stat(self.filepath).st_gid))
+
+    def test_write_rule_file_failure_keeps_original(self):
+        with open(self.filepath, 'w') as file:
+            file.write('rule1\n')
+        with patch.object(rule_file_io.os, 'fsync', side_effect=OSError):
+            with self.assertRaises(OSError):
+                rule_file_io.write_rule_file(self.filepath, 'rule2\n')
+        self.assertEqual('rule1\n', self.read())
+        self.assertEqual(['99-serial.rules'], os.listdir(self.directory.name))
+
+
+if __name__ == '__main__':
+    unittest.main()
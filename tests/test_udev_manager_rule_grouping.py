@@ -0,0 +1,86 @@
+import unittest
+import src.udev_manager as udev_manager
+
+
+def create_rules():
+    return [udev_manager.create_udev_rule('P1', serial='S1', vendor_id='0483', product_id='5740'),
+            udev_manager.create_startstop_udev_rule('P2', '/usr/bin/start p2', '/usr/bin/stop p2', serial='S2', vendor_id='1a86', model_id='7523'),
+            udev_manager.create_udev_rule('P3', serial='S3', vendor_id='0483', product_id='5740'),
+            udev_manager.create_udev_rule('P4', devpath='1.4'),
+            udev_manager.create_udev_rule('P5', serial='has space', vendor_id='0483', product_id='5740')]
+
+
+def create_tty_event(serial, vendor_id, model_id, action='add'):
+    properties = {'SUBSYSTEM': 'tty', 'ACTION': action, 'ID_VENDOR_ID': vendor_id, 'ID_MODEL_ID': model_id,
+                  'ID_SERIAL_SHORT': serial, 'ID_SERIAL': serial}
+    attributes = [{}, {}, {}, {'idVendor': vendor_id, 'idProduct': model_id, 'serial': serial, 'devpath': '1.9'}, {}]
+    return udev_manager.UdevEvent(properties, attributes)
+
+
+class TestRuleGrouping(unittest.TestCase):
+
+    def test_create_grouped_rules(self):
+        lines = udev_manager.create_grouped_rules(create_rules()).splitlines()
+        self.assertEqual('SUBSYSTEM!="tty", GOTO="octodocker_end"', lines[0])
+        self.assertEqual('ENV{ID_VENDOR_ID}!="0483", GOTO="octodocker_0483_5740_end"', lines[1])
+        self.assertEqual('ENV{ID_MODEL_ID}!="5740", GOTO="octodocker_0483_5740_end"', lines[2])
+        self.assertEqual('SUBSYSTEM=="tty", ENV{ID_VENDOR_ID}=="0483", ENV{ID_MODEL_ID}=="5740", ENV{ID_SERIAL_SHORT}=="S1", SYMLINK+="P1"', lines[3])
+        self.assertIn('ENV{ID_SERIAL_SHORT}=="S3"', lines[4])
+        self.assertEqual('SUBSYSTEM=="tty", ENV{ID_VENDOR_ID}=="0483", ENV{ID_MODEL_ID}=="5740", ATTRS{serial}=="has space", SYMLINK+="P5"', lines[5])
+        self.assertEqual('LABEL="octodocker_0483_5740_end"', lines[6])
+        self.assertEqual('SUBSYSTEM=="tty", ATTRS{devpath}=="1.4", SYMLINK+="P4"', lines[-2])
+        self.assertEqual('LABEL="octodocker_end"', lines[-1])
+
+    def test_group_again(self):
+        grouped = udev_manager.create_grouped_rules(create_rules())
+        self.assertEqual(grouped, udev_manager.create_grouped_rules([grouped]))
+
+    def test_parse_grouped_rules(self):
+        rule_file = udev_manager.parse_rules(udev_manager.create_grouped_rules(create_rules()))
+        self.assertEqual({'P1', 'P2', 'P3', 'P4', 'P5'}, set(rule_file.names))
+        self.assertIn('S1', rule_file.serials)
+        self.assertIn('1.4', rule_file.devpaths)
+        content = udev_manager.remove_rule_by_serial(rule_file.content, 'S1')
+        self.assertNotIn('P1', content)
+
+    def test_grouped_rules_match_the_same_rules(self):
+        standalone = '\n'.join(create_rules())
+        grouped = udev_manager.create_grouped_rules(create_rules())
+        for event in (create_tty_event('S1', '0483', '5740'), create_tty_event('S2', '1a86', '7523'),
+                      create_tty_event('S2', '1a86', '7523', 'remove'), create_tty_event('X', 'ffff', '0001')):
+            self.assertEqual(udev_manager.estimate_rule_cost(standalone, event).matched,
+                             udev_manager.estimate_rule_cost(grouped, event).matched)
+
+    def test_grouped_rules_cost_less(self):
+        standalone = '\n'.join(create_rules())
+        grouped = udev_manager.create_grouped_rules(create_rules())
+        event = create_tty_event('X', 'ffff', '0001')
+        self.assertLess(udev_manager.estimate_rule_cost(grouped, event).units, udev_manager.estimate_rule_cost(standalone, event).units)
+
+        other_subsystem = udev_manager.UdevEvent({'SUBSYSTEM': 'block', 'ACTION': 'add'})
+        cost = udev_manager.estimate_rule_cost(grouped, other_subsystem)
+        self.assertEqual((1, 1, 0), (cost.lines, cost.comparisons, cost.parent_lookups))
+
+
+class TestRuleCost(unittest.TestCase):
+
+    def test_attrs_walk_parents(self):
+        event = create_tty_event('S1', '0483', '5740')
+        cost = udev_manager.estimate_rule_cost('SUBSYSTEM=="tty", ATTRS{idVendor}=="0483", SYMLINK+="P1"', event)
+        self.assertEqual((1, 2, 4, 1), (cost.lines, cost.comparisons, cost.parent_lookups, cost.matched))
+        self.assertEqual(2 + 4 * udev_manager.PARENT_LOOKUP_WEIGHT, cost.units)
+
+        cost = udev_manager.estimate_rule_cost('SUBSYSTEM=="tty", ATTRS{idVendor}=="ffff", SYMLINK+="P1"', event)
+        self.assertEqual((5, 0), (cost.parent_lookups, cost.matched))
+
+    def test_goto_and_alternatives(self):
+        content = ('ACTION!="add|change", GOTO="end"\n'
+                   'ENV{ID_SERIAL}=="S*", SYMLINK+="P1"\n'
+                   'LABEL="end"\n')
+        self.assertEqual(1, udev_manager.estimate_rule_cost(content, create_tty_event('S1', '0483', '5740')).matched)
+        cost = udev_manager.estimate_rule_cost(content, create_tty_event('S1', '0483', '5740', 'remove'))
+        self.assertEqual((1, 0), (cost.lines, cost.matched))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+import src.udev_manager as udev_manager
+
+START = '/usr/bin/docker compose -f /opt/docker-compose.yml up -d p2'
+STOP = '/usr/bin/docker compose -f /opt/docker-compose.yml stop p2'
+
+
+def create_content():
+    return '\n'.join([
+        '# printers of the lab',
+        udev_manager.create_udev_rule('P1', serial='S1', vendor_id='0483', product_id='5740'),
+        udev_manager.create_startstop_udev_rule('P2', START, STOP, serial='S2'),
+        udev_manager.create_udev_rule('P1', serial='S1', vendor_id='0483', product_id='5740'),
+        'SUBSYSTEM=="tty", ENV{ID_SERIAL}=="GONE", ACTION=="remove", RUN+="/usr/bin/stop gone"',
+        'SUBSYSTEM=="tty", ENV{ID_SERIAL}=="NOTHING"',
+        'KERNEL=="ttyACM0", SYMLINK+="acm"',
+    ]) + '\n'
+
+
+class TestRuleOptimizer(unittest.TestCase):
+
+    def test_optimize_rules(self):
+        result = udev_manager.optimize_rules(create_content())
+        self.assertEqual(['# printers of the lab', 'KERNEL=="ttyACM0", SYMLINK+="acm"'], result.kept)
+        self.assertEqual(2, len(result.dead))
+        self.assertEqual(1, len(result.duplicates))
+        self.assertEqual(2, result.converted)
+
+        lines = result.content.splitlines()
+        self.assertEqual('# printers of the lab', lines[0])
+        self.assertEqual('SUBSYSTEM!="tty", GOTO="octodocker_end"', lines[1])
+        self.assertEqual('LABEL="octodocker_end"', lines[-2])
+        self.assertEqual('KERNEL=="ttyACM0", SYMLINK+="acm"', lines[-1])
+        self.assertIn('SUBSYSTEM=="tty", ENV{ID_VENDOR_ID}=="0483", ENV{ID_MODEL_ID}=="5740", ENV{ID_SERIAL_SHORT}=="S1", SYMLINK+="P1"', lines)
+        self.assertNotIn('GONE', result.content)
+        self.assertNotIn('NOTHING', result.content)
+
+    def test_keep_user_blocks(self):
+        content = ('SUBSYSTEM!="tty", GOTO="my_end"\n'
+                   'ATTRS{idVendor}=="1234", SYMLINK+="mydev"\n'
+                   'LABEL="my_end"\n')
+        self.assertEqual(content, udev_manager.optimize_rules(content).content)
+
+        content = ('# mine\n'
+                   'ACTION!="add", GOTO="my_end"\n'
+                   'SUBSYSTEM=="tty", ATTRS{serial}=="M1", SYMLINK+="mine"\n'
+                   'LABEL="my_end"\n'
+                   + udev_manager.create_udev_rule('P1', serial='S1') + '\n'
+                   'KERNEL=="ttyACM0", SYMLINK+="acm"\n')
+        lines = udev_manager.optimize_rules(content).content.splitlines()
+        self.assertEqual(content.splitlines()[:4], lines[:4])
+        self.assertEqual('SUBSYSTEM!="tty", GOTO="octodocker_end"', lines[4])
+        self.assertEqual('KERNEL=="ttyACM0", SYMLINK+="acm"', lines[-1])
+        self.assertEqual(lines, udev_manager.optimize_rules('\n'.join(lines)).content.splitlines())
+
+    def test_same_devices_after_optimizing(self):
+        devices = [udev_manager.DeviceData('pci-usb-0:1.1', '0483', '5740', '0483_Printer_S1', '1.1', 'S1'),
+                   udev_manager.DeviceData('pci-usb-0:1.2', '1a86', '7523', 'S2', '1.2', 'SHORT2'),
+                   udev_manager.DeviceData('pci-usb-0:1.3', '0483', '5740', '0483_Printer_S3', '1.3', 'S3')]
+
+        def resolve(content):
+            report = udev_manager.match_devices(udev_manager.parse_rules(content), devices)
+            return {match.device.path: sorted({rule.name for rule in match.rules if rule.name}) for match in report.matched + report.ambiguous}
+
+        content = create_content()
+        optimized = udev_manager.optimize_rules(content).content
+        self.assertIn('ENV{ID_SERIAL_SHORT}=="S1"', optimized)
+        self.assertEqual({'pci-usb-0:1.1': ['P1'], 'pci-usb-0:1.2': ['P2']}, resolve(content))
+        self.assertEqual(resolve(content), resolve(optimized))
+
+    def test_merge_pairs(self):
+        lines = udev_manager.optimize_rules(create_content()).content.splitlines()
+        guard = lines.index('ENV{ID_SERIAL}!="S2", GOTO="octodocker_S2_end"')
+        self.assertIn(START, lines[guard + 1])
+        self.assertIn(STOP, lines[guard + 2])
+        self.assertEqual('LABEL="octodocker_S2_end"', lines[guard + 3])
+
+    def test_optimize_again(self):
+        content = udev_manager.optimize_rules(create_content()).content
+        self.assertEqual(content, udev_manager.optimize_rules(content).content)
+
+        rule_file = udev_manager.parse_rules(content)
+        self.assertEqual({'P1', 'P2', 'acm'}, set(rule_file.names))
+        # the guard of a removed pair only remains until the next optimization
+        content = udev_manager.remove_rule_by_serial(content, 'S2')
+        self.assertEqual({'P1', 'acm'}, set(udev_manager.parse_rules(content).names))
+        self.assertNotIn('S2', udev_manager.optimize_rules(content).content)
+
+    def test_compare_file_costs(self):
+        before = create_content()
+        after = udev_manager.optimize_rules(before).content
+        costs = udev_manager.compare_file_costs(before, after)
+        self.assertIn('printer add (average of 2)', costs)
+        for event, (cost_before, cost_after) in costs.items():
+            self.assertLess(cost_after.units, cost_before.units, event)
+
+    def test_optimize_rule_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = os.path.join(directory, '99-octoprint.rules')
+            with open(filepath, 'w') as file:
+                file.write(create_content())
+            content, result = udev_manager.optimize_rule_file(filepath, write=False)
+            self.assertEqual(create_content(), content)
+            with open(filepath) as file:
+                self.assertEqual(create_content(), file.read())
+
+            udev_manager.optimize_rule_file(filepath)
+            with open(filepath) as file:
+                self.assertEqual(result.content, file.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
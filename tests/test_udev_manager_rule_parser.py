@@ -0,0 +1,33 @@
+import unittest
+import src.udev_manager.udev_rule_parser as rule_parser
+from test_data import udev_rules_data
+
+
+class TestUdevRuleParser(unittest.TestCase):
+
+    def test_tokenize_line(self):
+        result = rule_parser.tokenize_line('SUBSYSTEM=="tty", ATTRS{serial}=="1234", SYMLINK+="Printer1"')
+        self.assertEqual((rule_parser.RuleToken('SUBSYSTEM', '==', 'tty'),
+                          rule_parser.RuleToken('ATTRS{serial}', '==', '1234'),
+                          rule_parser.RuleToken('SYMLINK', '+=', 'Printer1')), result)
+
+    def test_tokenize_comment(self):
+        self.assertEqual((), rule_parser.tokenize_line('# SYMLINK+="Printer1"'))
+        self.assertEqual((), rule_parser.tokenize_line('   '))
+
+    def test_parse_rules_preserves_lines(self):
+        result = rule_parser.parse_rules(udev_rules_data)
+        self.assertEqual(udev_rules_data.splitlines(), [rule.text for rule in result.rules])
+
+    def test_parse_rules_indexes(self):
+        result = rule_parser.parse_rules(udev_rules_data)
+        self.assertEqual(8, len(result.names))
+        self.assertEqual(['Printer3'], [rule.name for rule in result.serials['kise']])
+        self.assertEqual(['Printer5'], [rule.name for rule in result.paths['UsbPathTo1']])
+        self.assertEqual(['Printer1'], [rule.name for rule in result.devpaths['1.1']])
+        self.assertTrue(result.has_path('1.5'))
+        self.assertFalse(result.has_path('nonExistentPath'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import src.udev_manager as udev_manager
+from src.udev_manager.udev_scraper import DeviceInventory
+from test_udev_manager_scraper import FakeContext, FakeDevice, create_tty
+
+
+class FakeRunner:
+    def __init__(self, exit_codes=None):
+        self.commands = []
+        self.exit_codes = list(exit_codes or [])
+
+    def __call__(self, command):
+        self.commands.append(command)
+        return self.exit_codes.pop(0) if self.exit_codes else 0
+
+
+class TestRuleReload(unittest.TestCase):
+
+    def setUp(self):
+        hub = FakeDevice('/sys/devices/usb1/1-1', attributes={'devpath': b'1'})
+        self.first = create_tty('1.1', hub, 'serial1')
+        self.second = create_tty('1.2', hub, 'serial2')
+        self.inventory = DeviceInventory(FakeContext([self.first, self.second]))
+
+    def find_sys_paths(self, content):
+        return udev_manager.find_rule_sys_paths(udev_manager.parse_rules(content).rules, self.inventory)
+
+    def test_find_rule_sys_paths(self):
+        self.assertEqual([self.second.sys_path], self.find_sys_paths(udev_manager.create_udev_rule('P2', serial='serial2')))
+        self.assertEqual([self.first.sys_path], self.find_sys_paths(udev_manager.create_udev_rule('P1', path='path-1.1')))
+        self.assertEqual([], self.find_sys_paths(udev_manager.create_udev_rule('P3', serial='serial3')))
+
+    def test_find_rule_sys_paths_by_serial_key(self):
+        # the long ID_SERIAL of the fake devices differs from their short serial
+        self.assertEqual('1a86_USB_Serial_serial2', self.inventory.get_devices()[self.second.sys_path].serial)
+        self.assertEqual([self.second.sys_path], self.find_sys_paths('SUBSYSTEM=="tty", ENV{ID_SERIAL_SHORT}=="serial2", SYMLINK+="P2"'))
+        self.assertEqual([self.second.sys_path], self.find_sys_paths('SUBSYSTEM=="tty", ENV{ID_SERIAL}=="1a86_USB_Serial_serial2", SYMLINK+="P2"'))
+        self.assertEqual([], self.find_sys_paths('SUBSYSTEM=="tty", ENV{ID_SERIAL}=="serial2", SYMLINK+="P2"'))
+        self.assertEqual([], self.find_sys_paths(udev_manager.create_udev_rule('P2', serial='1a86_USB_Serial_serial2')))
+
+    def test_rules_without_device_key_select_nothing(self):
+        content = ('ENV{ID_VENDOR_ID}!="1a86", GOTO="octodocker_1a86_7523_end"\n'
+                   'SUBSYSTEM=="tty", ATTRS{idVendor}=="1a86", SYMLINK+="any"\n')
+        self.assertEqual([], self.find_sys_paths(content))
+
+    def test_reload_and_trigger(self):
+        runner = FakeRunner()
+        sys_paths = [self.first.sys_path, self.second.sys_path]
+        self.assertTrue(udev_manager.reload_rules(sys_paths, 'add', runner))
+        self.assertEqual([['udevadm', 'control', '--reload'],
+                          ['udevadm', 'trigger', '--action=add', *sys_paths]], runner.commands)
+
+    def test_reload_without_devices(self):
+        runner = FakeRunner()
+        self.assertTrue(udev_manager.reload_rules([], runner=runner))
+        self.assertEqual([['udevadm', 'control', '--reload']], runner.commands)
+
+    def test_no_trigger_after_failed_reload(self):
+        runner = FakeRunner([1])
+        self.assertFalse(udev_manager.reload_rules([self.first.sys_path], runner=runner))
+        self.assertEqual(1, len(runner.commands))
+
+
+if __name__ == '__main__':
+    unittest.main()
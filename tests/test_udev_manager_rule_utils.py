@@ -1,4 +1,7 @@
+import os
+import tempfile
 import unittest
+from unittest import mock
 import src.udev_manager.udev_rulefile_utils as udev_utils
 from test_data import udev_rules_data
 
@@ -97,6 +100,47 @@ class TestUdevRuleCreation(unittest.TestCase):
         result = udev_utils.remove_rule_by_name(udev_rules_data, "nonExistentPrinter")
         self.assertEqual(udev_rules_data, result)
 
+    def test_remove_rules_from_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = os.path.join(directory, '99-serial.rules')
+            with open(filepath, 'w') as file:
+                file.write(udev_rules_data)
+
+            self.assertEqual(2, udev_utils.remove_rules_from_file(filepath, name="Printer3"))
+            with open(filepath) as file:
+                self.assertEqual(udev_utils.remove_rule_by_name(udev_rules_data, "Printer3"), file.read())
+
+            inode = os.stat(filepath).st_ino
+            self.assertEqual(0, udev_utils.remove_rules_from_file(filepath, serial="nonExistentSerial"))
+            self.assertEqual(inode, os.stat(filepath).st_ino)
+            self.assertEqual(['99-serial.rules'], os.listdir(directory))
+
+    def test_remove_rule_adversarial_long_lines(self):
+        # inputs that make the .*pattern.* based removal backtrack quadratically
+        long_lines = [
+            'a' * 1000000 + '\n',
+            'SUBSYSTEM=="tty", ' + 'ATTRS{serial}=="' * 100000 + '\n',
+            'SUBSYSTEM=="tty", ' + 'SYMLINK+="Printer1' * 100000 + '\n',
+            'SUBSYSTEM=="tty", ' + 'ENV{ID_SERIAL}=="kise", ' * 50000 + 'SYMLINK+="Printer9"\n',
+        ]
+        file_content = udev_rules_data + ''.join(long_lines)
+
+        with mock.patch.object(udev_utils, 'tokenize_line', wraps=udev_utils.tokenize_line) as tokenize:
+            result = udev_utils.remove_rule_by_serial(file_content, "3940855329")
+            self.assertEqual(file_content.count("\n") - 1, result.count("\n"))
+            result = udev_utils.remove_rule_by_path(file_content, "nonExistentPath")
+            self.assertEqual(file_content, result)
+            result = udev_utils.remove_rule_by_name(file_content, "Printer9")
+            self.assertNotIn("Printer9", result)
+            self.assertNotIn("kise", result)
+
+        # lines without the quoted value are skipped by the substring search, only the Printer9 line is tokenized
+        tokenized = [call.args[0] for call in tokenize.call_args_list]
+        self.assertTrue(tokenized)
+        for line in long_lines[:3]:
+            self.assertNotIn(line, tokenized)
+        self.assertIn(long_lines[3], tokenized)
+
 
 if __name__ == '__main__':
     unittest.main()
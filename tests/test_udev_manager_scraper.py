@@ -0,0 +1,94 @@
+import unittest
+import src.udev_manager.udev_scraper as udev_scraper
+from src.udev_manager.device_data import DeviceData
+
+
+class FakeAttributes:
+    def __init__(self, device):
+        self.device = device
+
+    def get(self, key, default=None):
+        self.device.attribute_reads += 1
+        return self.device.attribute_values.get(key, default)
+
+
+class FakeDevice:
+    def __init__(self, sys_path, properties=None, attributes=None, parent=None, action=None):
+        self.sys_path = sys_path
+        self.properties = properties or {}
+        self.attribute_values = attributes or {}
+        self.attribute_reads = 0
+        self.attributes = FakeAttributes(self)
+        self.parent = parent
+        self.action = action
+
+    def get(self, key, default=None):
+        return self.properties.get(key, default)
+
+    @property
+    def ancestors(self):
+        parent = self.parent
+        while parent is not None:
+            yield parent
+            parent = parent.parent
+
+
+class FakeContext:
+    def __init__(self, devices):
+        self.devices = devices
+
+    def list_devices(self, subsystem):
+        return list(self.devices)
+
+
+class FakeMonitor:
+    def __init__(self, events):
+        self.events = list(events)
+
+    def poll(self, timeout=None):
+        return self.events.pop(0) if self.events else None
+
+
+def create_tty(name, hub, serial):
+    usb_device = FakeDevice(f'{hub.sys_path}/{name}', attributes={'devpath': name.encode()}, parent=hub)
+    interface = FakeDevice(f'{usb_device.sys_path}/{name}:1.0', parent=usb_device)
+    properties = {'ID_PATH': f'path-{name}', 'ID_VENDOR_ID': '1a86', 'ID_MODEL_ID': '7523',
+                  'ID_SERIAL': f'1a86_USB_Serial_{serial}', 'ID_SERIAL_SHORT': serial}
+    return FakeDevice(f'{interface.sys_path}/tty/{serial}', properties, parent=interface)
+
+
+class TestDeviceInventory(unittest.TestCase):
+
+    def setUp(self):
+        self.hub = FakeDevice('/sys/devices/usb1/1-1', attributes={'devpath': b'1'})
+        self.first = create_tty('1.1', self.hub, 'serial1')
+        self.second = create_tty('1.2', self.hub, 'serial2')
+        self.unrelated = FakeDevice('/sys/devices/virtual/tty/tty0')
+        self.inventory = udev_scraper.DeviceInventory(FakeContext([self.first, self.second, self.unrelated]))
+
+    def test_get_device_list(self):
+        result = self.inventory.get_device_list()
+        self.assertEqual([DeviceData('path-1.1', '1a86', '7523', '1a86_USB_Serial_serial1', '1.1', 'serial1'),
+                          DeviceData('path-1.2', '1a86', '7523', '1a86_USB_Serial_serial2', '1.2', 'serial2')], result)
+
+    def test_devpath_memoized_per_parent(self):
+        self.inventory.enumerate()
+        reads = self.first.parent.parent.attribute_reads
+        self.inventory.enumerate()
+        self.assertEqual(reads, self.first.parent.parent.attribute_reads)
+        self.assertEqual(0, self.hub.attribute_reads)
+
+    def test_monitor_events(self):
+        self.inventory.enumerate()
+        third = create_tty('1.3', self.hub, 'serial3')
+        third.action = 'add'
+        self.second.action = 'remove'
+        self.inventory.monitor = FakeMonitor([third, self.second])
+        self.inventory.context.devices = []
+
+        result = self.inventory.get_device_list()
+        self.assertEqual(['serial1', 'serial3'], [device.serial_short for device in result])
+
+
+if __name__ == '__main__':
+    unittest.main()
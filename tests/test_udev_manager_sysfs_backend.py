@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+import src.udev_manager as udev_manager
+from src.udev_manager.device_data import DeviceData
+from src.udev_manager.udev_scraper import DeviceInventory
+
+USB_DEVICE = 'sys/devices/pci0000:00/0000:00:14.0/usb1/1-1/1-1.2'
+TTY_DEVICE = f'{USB_DEVICE}/1-1.2:1.0/ttyUSB0/tty/ttyUSB0'
+ID_PATH = 'pci-0000:00:14.0-usb-0:1.2:1.0'
+
+
+def write_device(root, path, attributes):
+    os.makedirs(os.path.join(root, path), exist_ok=True)
+    for key, value in {'uevent': '', **attributes}.items():
+        with open(os.path.join(root, path, key), 'w') as file:
+            file.write(f'{value}\n')
+
+
+def link_class(root, name, path):
+    os.makedirs(os.path.join(root, 'sys/class/tty'), exist_ok=True)
+    os.symlink(os.path.join('../../..', path), os.path.join(root, 'sys/class/tty', name))
+
+
+def create_fake_sysfs(root, database=True):
+    write_device(root, 'sys/devices/pci0000:00/0000:00:14.0/usb1/1-1', {'devpath': '1', 'idVendor': '1d6b', 'idProduct': '0002'})
+    write_device(root, USB_DEVICE, {'devpath': '1.2', 'idVendor': '1a86', 'idProduct': '7523', 'serial': 'SER1'})
+    write_device(root, f'{USB_DEVICE}/1-1.2:1.0', {})
+    write_device(root, f'{USB_DEVICE}/1-1.2:1.0/ttyUSB0', {})
+    write_device(root, TTY_DEVICE, {'dev': '188:0'})
+    write_device(root, 'sys/devices/virtual/tty/tty0', {'dev': '4:0'})
+    link_class(root, 'ttyUSB0', TTY_DEVICE)
+    link_class(root, 'tty0', 'sys/devices/virtual/tty/tty0')
+
+    os.makedirs(os.path.join(root, 'run/udev/data'))
+    with open(os.path.join(root, 'run/udev/data/c4:0'), 'w') as file:
+        file.write('E:ID_MM_CANDIDATE=1\n')
+    if database:
+        with open(os.path.join(root, 'run/udev/data/c188:0'), 'w') as file:
+            file.write(f'S:serial/by-id/usb-1a86_USB_Serial_SER1-if00-port0\nE:ID_PATH={ID_PATH}\n'
+                       'E:ID_VENDOR_ID=1a86\nE:ID_MODEL_ID=7523\nE:ID_SERIAL=1a86_USB_Serial_SER1\n')
+
+
+class TestSysfsBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_device_list(self):
+        create_fake_sysfs(self.root)
+        inventory = DeviceInventory(udev_manager.SysfsContext(self.root))
+        self.assertEqual([DeviceData(ID_PATH, '1a86', '7523', '1a86_USB_Serial_SER1', '1.2')], inventory.get_device_list())
+
+    def test_ancestors(self):
+        create_fake_sysfs(self.root)
+        context = udev_manager.SysfsContext(self.root)
+        device = next(device for device in context.list_devices('tty') if device.sys_path.endswith('ttyUSB0'))
+        # directories without uevent file (usb1, the pci devices of the fake tree) are not devices
+        self.assertEqual(['ttyUSB0', '1-1.2:1.0', '1-1.2', '1-1'], [os.path.basename(parent.sys_path) for parent in device.ancestors])
+
+    def test_missing_database_entry(self):
+        create_fake_sysfs(self.root, database=False)
+        context = udev_manager.SysfsContext(self.root)
+        device = next(device for device in context.list_devices('tty') if device.sys_path.endswith('ttyUSB0'))
+        self.assertEqual({}, device.properties)
+        self.assertIsNone(device.get('ID_VENDOR_ID'))
+        # like with pyudev, devices without ID_PATH are not listed
+        self.assertEqual([], DeviceInventory(context).get_device_list())
+
+    def test_missing_tree(self):
+        inventory = DeviceInventory(udev_manager.SysfsContext(self.root))
+        self.assertEqual([], inventory.get_device_list())
+        with self.assertRaises(OSError):
+            inventory.start_monitoring()
+
+
+if __name__ == '__main__':
+    unittest.main()